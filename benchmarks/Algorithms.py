@@ -0,0 +1,201 @@
+"""
+Scaling benchmark of the Graph algorithms.
+
+Every algorithm runs on directed and undirected synthetic graphs of increasing
+size, its result is checked against a slow but obvious reference
+implementation, and a power law t = c * n^k is fitted to the timings. The
+results are saved as JSON. Given the JSON of a previous run, exponents that
+grew more than EXPONENT_TOLERANCE over the same sizes are reported as regressions, and so is any
+result that doesn't match its reference. Either makes the run fail.
+
+    python -m benchmarks.Algorithms results.json [baseline.json] [sizes...]
+"""
+from graph.Graph import Graph, Order
+from typing import Callable
+import json
+import math
+import random
+import sys
+import time
+
+import numpy as np
+
+EXPONENT_TOLERANCE = 0.3
+# Fitted exponents above this are marked as super-linear in the report
+SUPERLINEAR = 1.2
+
+def undirected_graph(n_vertices : int, extra_edges : float = 0.5, seed : int = 0) -> Graph[int]:
+    """A random tree plus 'extra_edges' * n random edges, every edge in both directions with the same weight"""
+    rng = random.Random(seed)
+    edges = [(v, rng.randrange(v), rng.randint(1, 9)) for v in range(1, n_vertices)]
+    edges += [(rng.randrange(n_vertices), rng.randrange(n_vertices), rng.randint(1, 9)) for _ in range(int(extra_edges * n_vertices))]
+    graph : Graph[int] = Graph()
+    graph.add_many(range(n_vertices))
+    graph.connect_many((s, t, w) for s, t, w in edges if s != t)
+    graph.connect_many((t, s, w) for s, t, w in edges if s != t)
+    return graph
+
+def directed_graph(n_vertices : int, component_size : int = 25, seed : int = 0) -> Graph[int]:
+    """
+    Strongly connected components of 'component_size' vertices, each a cycle
+    with random chords, linked forwards so they stay apart. Weights are random.
+    """
+    rng = random.Random(seed)
+    edges = []
+    for first in range(0, n_vertices, component_size):
+        size = min(component_size, n_vertices - first)
+        for i in range(size):
+            edges.append((first + i, first + (i + 1) % size, rng.randint(1, 9)))
+            if rng.random() < 0.3:
+                edges.append((first + i, first + rng.randrange(size), rng.randint(1, 9)))
+        if first > 0:
+            edges.append((first - 1, first, rng.randint(1, 9)))
+    graph : Graph[int] = Graph()
+    graph.add_many(range(n_vertices))
+    graph.connect_many((s, t, w) for s, t, w in edges if s != t)
+    return graph
+
+
+### Reference implementations ##########################################
+
+def _adjacency(graph : Graph, without : object = None) -> dict:
+    return {v : {u : graph.get_connection_weight(v, u) for u in graph.adjacent_vertices(v) if u != without}
+            for v in graph.vertices if v != without}
+
+def _reachable(adjacency : dict, start : object) -> set:
+    reached, pending = {start}, [start]
+    while pending:
+        for u in adjacency[pending.pop()]:
+            if u not in reached:
+                reached.add(u)
+                pending.append(u)
+    return reached
+
+def _reference_components(adjacency : dict) -> set[frozenset]:
+    """Vertices that reach each other, which are the connected components when every edge goes both ways"""
+    reach = {v : _reachable(adjacency, v) for v in adjacency}
+    return {frozenset(u for u in reach[v] if v in reach[u]) for v in adjacency}
+
+def reference_connected_components(graph : Graph) -> set[frozenset]:
+    return _reference_components(_adjacency(graph))
+
+def reference_cut_vertices(graph : Graph) -> set:
+    """Vertices whose removal leaves more (strongly) connected components"""
+    n_components = len(_reference_components(_adjacency(graph)))
+    return {v for v in graph.vertices if len(_reference_components(_adjacency(graph, without=v))) > n_components}
+
+def reference_dijkstra(graph : Graph, source : object) -> dict:
+    """Bellman-Ford distances"""
+    adjacency = _adjacency(graph)
+    distances = {v : math.inf for v in adjacency}
+    distances[source] = 0
+    for _ in range(len(adjacency)):
+        changed = False
+        for v, neighbors in adjacency.items():
+            for u, w in neighbors.items():
+                if distances[v] + w < distances[u]:
+                    distances[u] = distances[v] + w
+                    changed = True
+        if not changed:
+            break
+    return distances
+
+def reference_reverse_graph(graph : Graph) -> set[tuple]:
+    return {(u, v, w) for v, neighbors in _adjacency(graph).items() for u, w in neighbors.items()}
+
+
+### Algorithms ##########################################
+
+def _edges(graph : Graph) -> set[tuple]:
+    return {(v, u, graph.get_connection_weight(v, u)) for v in graph.vertices for u in graph.adjacent_vertices(v)}
+
+def _check_dijkstra(graph : Graph, result : tuple[dict, dict]) -> bool:
+    distances, paths = result
+    if distances != reference_dijkstra(graph, 0):
+        return False
+    # Every path must start at the source and add up to its distance
+    return all(path[0] == 0 and sum(graph.get_connection_weight(a, b) for a, b in zip(path, path[1:])) == distances[v]
+               for v, path in paths.items() if path)
+
+# name, what is timed, and whether its result matches the reference
+ALGORITHMS : list[tuple[str, Callable[[Graph], object], Callable[[Graph, object], bool]]] = [
+    ("connected_components", lambda g : g.connected_components,
+     lambda g, r : {frozenset(c) for c in r} == reference_connected_components(g)),
+    ("cut_vertices", lambda g : g.cut_vertices,
+     lambda g, r : set(r) == reference_cut_vertices(g)),
+    ("dijkstra", lambda g : g.dijkstra(0), _check_dijkstra),
+    ("travel_full_graph", lambda g : g.travel_full_graph(0, Order.DEPTH),
+     lambda g, r : sorted(r) == sorted(g.vertices)),
+    ("reverse_graph", lambda g : g.reverse_graph,
+     lambda g, r : _edges(r) == reference_reverse_graph(g)),
+]
+
+GRAPHS : dict[str, Callable[[int], Graph]] = {
+    "undirected" : undirected_graph,
+    "directed" : directed_graph,
+}
+
+def time_algorithm(graph : Graph, run : Callable[[Graph], object], repeat : int = 3, min_time : float = 0.2) -> tuple[float, object]:
+    """
+    Best time of at least 'repeat' runs, and as many as fit in 'min_time' so
+    fast ones aren't noise. Each run is on a copy so cached results aren't reused.
+    """
+    best, total, runs, result = math.inf, 0.0, 0, None
+    while runs < repeat or total < min_time:
+        fresh = graph.copy()
+        start = time.perf_counter()
+        result = run(fresh)
+        elapsed = time.perf_counter() - start
+        best, total, runs = min(best, elapsed), total + elapsed, runs + 1
+    return best, result
+
+def fit_exponent(sizes : list[int], times : list[float]) -> float:
+    """Slope of log(time) over log(size), the k of t = c * n^k"""
+    return float(np.polyfit(np.log(sizes), np.log(times), 1)[0])
+
+def run(sizes : list[int], check_up_to : int = 200) -> dict:
+    """Timings and fitted exponents of every algorithm on every kind of graph. Results are checked on sizes up to 'check_up_to'."""
+    results = {}
+    for kind, make_graph in GRAPHS.items():
+        graphs = {n : make_graph(n) for n in sizes}
+        for name, algorithm, check in ALGORITHMS:
+            times, correct = [], True
+            for n, graph in graphs.items():
+                elapsed, result = time_algorithm(graph, algorithm)
+                times.append(elapsed)
+                if n <= check_up_to:
+                    correct = correct and check(graph, result)
+            results[f"{kind}/{name}"] = {"sizes" : sizes, "seconds" : times, "exponent" : fit_exponent(sizes, times), "correct" : correct}
+    return results
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit(__doc__)
+    output_file = sys.argv[1]
+    baseline_file = sys.argv[2] if len(sys.argv) > 2 and not sys.argv[2].isdigit() else None
+    sizes = [int(n) for n in sys.argv[2 if baseline_file is None else 3:]] or [100, 200, 400, 800]
+
+    results = run(sizes)
+    with open(output_file, "w") as file:
+        json.dump(results, file, indent=2)
+
+    baseline = {}
+    if baseline_file is not None:
+        with open(baseline_file) as file:
+            baseline = json.load(file)
+
+    failed = False
+    print(f"{'':<34}" + "".join(f"{n:>10}" for n in sizes) + "   exponent")
+    for key, result in results.items():
+        line = f"{key:<34}" + "".join(f"{t * 1000:8.1f}ms" for t in result["seconds"]) + f"   {result['exponent']:5.2f}"
+        if result["exponent"] > SUPERLINEAR:
+            line += "  super-linear"
+        if not result["correct"]:
+            line += "  WRONG RESULT"
+            failed = True
+        # Exponents fitted over other sizes aren't comparable
+        if key in baseline and baseline[key]["sizes"] == sizes and result["exponent"] > baseline[key]["exponent"] + EXPONENT_TOLERANCE:
+            line += f"  REGRESSION (was {baseline[key]['exponent']:.2f})"
+            failed = True
+        print(line)
+    sys.exit(1 if failed else 0)
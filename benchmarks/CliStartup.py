@@ -0,0 +1,49 @@
+from graph.Graph import Graph
+from visualizer.GraphFile import save_graph
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+def cold_start(command : list[str], runs : int = 20) -> float:
+    """Median wall time of running 'command' in a new interpreter"""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+def imported_modules(command : list[str]) -> set[str]:
+    """Every module the command imports, from the '-X importtime' report"""
+    report = subprocess.run([command[0], "-X", "importtime"] + command[1:], check=True, capture_output=True, text=True).stderr
+    return {line.rsplit("|", 1)[-1].strip() for line in report.splitlines() if line.startswith("import time:")}
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    graph = Graph({v : {(v + 1) % 50 : 1, (v * 7) % 50 : 2} for v in range(50)})
+
+    with tempfile.TemporaryDirectory() as directory:
+        files = {
+            "json" : os.path.join(directory, "graph.json"),
+            "edge list" : os.path.join(directory, "graph.txt"),
+            "binary" : os.path.join(directory, "graph.graph"),
+        }
+        with open(files["json"], "w") as file:
+            json.dump({str(v) : {str(u) : w for u, w in neighbors.items()} for v, neighbors in
+                       ((v, {u : graph.get_connection_weight(v, u) for u in graph.adjacent_vertices(v)}) for v in graph.vertices)}, file)
+        with open(files["edge list"], "w") as file:
+            file.writelines(f"{v} {u} {graph.get_connection_weight(v, u)}\n" for v in graph.vertices for u in graph.adjacent_vertices(v))
+        save_graph(files["binary"], graph)
+
+        python = [sys.executable, "-c", "pass"]
+        print(f"{'bare interpreter':<28} {cold_start(python, runs) * 1000:6.1f} ms")
+        for name, filename in files.items():
+            command = [sys.executable, "-m", "graph", filename, "info"]
+            modules = imported_modules(command)
+            heavy = ", ".join(m for m in ("numpy", "pygame", "multiprocessing") if m in modules) or "nothing heavy"
+            print(f"{'python -m graph, ' + name:<28} {cold_start(command, runs) * 1000:6.1f} ms  imports {heavy}")
+            assert "pygame" not in modules, "The command line tool imported pygame"
@@ -0,0 +1,37 @@
+from example.DataLoader import DataLoader
+from graph.Graph import Graph
+from visualizer.Node import Node
+from visualizer.FrameExporter import FrameEncoder, PngWriter, RawWriter, export_frames
+import os
+import random
+import tempfile
+
+def reference_graph(n_vertices : int = 80, seed : int = 0) -> Graph[Node]:
+    """The 'n_vertices' characters with the most relations, placed at random with a fixed seed."""
+    random.seed(seed)
+    graph = DataLoader.load_relationships()
+
+    by_degree = sorted(graph.vertices, key=lambda v : len(graph.adjacent_vertices(v)), reverse=True)
+    for v in by_degree[n_vertices:]:
+        graph.remove(v)
+    return graph
+
+if __name__ == "__main__":
+    n_frames = 60
+    print(f"{len(reference_graph().vertices)} vertices, {n_frames} frames of 800x600")
+
+    with tempfile.TemporaryDirectory() as directory:
+        runs = [
+            ("no output", lambda : None),
+            ("raw stream, same thread", lambda : FrameEncoder(RawWriter(os.path.join(directory, "frames.rgb")), threaded=False)),
+            ("raw stream, worker", lambda : FrameEncoder(RawWriter(os.path.join(directory, "frames.rgb")))),
+            ("png, same thread", lambda : FrameEncoder(PngWriter(os.path.join(directory, "png")), threaded=False)),
+            ("png, worker", lambda : FrameEncoder(PngWriter(os.path.join(directory, "png")))),
+        ]
+        # Without physics steps only drawing and writing are measured
+        for steps_per_frame in (1, 0):
+            print(f"{steps_per_frame} physics steps per frame:")
+            for name, make_encoder in runs:
+                # Every run starts from the same layout
+                fps = export_frames(reference_graph(), make_encoder(), n_frames, steps_per_frame=steps_per_frame)
+                print(f"  {name}: {fps:.1f} fps")
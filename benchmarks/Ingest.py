@@ -0,0 +1,94 @@
+from graph.Importers import import_edge_list, import_graphml, import_matrix_market
+import numpy as np
+import io
+import os
+import resource
+import sys
+import tempfile
+import time
+
+def random_edges(n_vertices : int, n_edges : int, seed : int = 0) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Sources, targets and weights of 'n_edges' random edges between 1-based vertices"""
+    rng = np.random.default_rng(seed)
+    sources = rng.integers(1, n_vertices + 1, n_edges)
+    targets = rng.integers(1, n_vertices + 1, n_edges)
+    weights = rng.integers(1, 10, n_edges)
+    return sources, targets, weights
+
+def write_lines(filename : str, header : str, lines : np.ndarray, chunk_size : int = 1_000_000) -> None:
+    """Writes 'header' and then the rows of 'lines', joined by spaces"""
+    with open(filename, "w") as file:
+        file.write(header)
+        for start in range(0, len(lines), chunk_size):
+            rows = lines[start:start + chunk_size].astype(str)
+            file.write("\n".join(" ".join(row) for row in rows.tolist()) + "\n")
+
+def write_edge_list(filename : str, sources, targets, weights) -> None:
+    write_lines(filename, "# source target weight\n", np.column_stack((sources, targets, weights)))
+
+def write_matrix_market(filename : str, n_vertices : int, sources, targets, weights) -> None:
+    header = f"%%MatrixMarket matrix coordinate integer general\n{n_vertices} {n_vertices} {len(sources)}\n"
+    write_lines(filename, header, np.column_stack((sources, targets, weights)))
+
+def write_graphml(filename : str, n_vertices : int, sources, targets, weights) -> None:
+    with open(filename, "w") as file:
+        file.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                   '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n'
+                   '<key id="w" for="edge" attr.name="weight" attr.type="int"/>\n'
+                   '<graph id="G" edgedefault="directed">\n')
+        file.write("".join(f'<node id="n{v}"/>\n' for v in range(1, n_vertices + 1)))
+        for start in range(0, len(sources), 1_000_000):
+            rows = zip(sources[start:start + 1_000_000].tolist(), targets[start:start + 1_000_000].tolist(),
+                       weights[start:start + 1_000_000].tolist())
+            file.write("".join(f'<edge source="n{s}" target="n{t}"><data key="w">{w}</data></edge>\n' for s, t, w in rows))
+        file.write("</graph>\n</graphml>\n")
+
+# Files the importers must refuse instead of reading something else
+MALFORMED = [
+    # A short and a long line, whose columns would shift into each other
+    (import_edge_list, b"1 2\n3 4 5\n6\n", {}),
+    (import_edge_list, b"1 2\n3 4 5\n6\n", {"value_type" : str}),
+    (import_edge_list, b"1.7 2\n", {}),
+    (import_matrix_market, b"%%MatrixMarket matrix coordinate pattern general\n3 3 2\n1 2\n3 9\n", {}),
+    (import_matrix_market, b"%%MatrixMarket matrix coordinate integer general\n3 3 1\n1 2 2.5\n", {}),
+]
+
+def check_malformed() -> None:
+    for importer, data, options in MALFORMED:
+        try:
+            importer(io.BytesIO(data), **options)
+        except ValueError:
+            continue
+        raise AssertionError(f"{importer.__name__} read the malformed file {data!r}")
+
+def peak_rss_mb() -> float:
+    # Kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+if __name__ == "__main__":
+    # Edges in millions can be given, 2 by default
+    n_edges = int(float(sys.argv[1]) * 1_000_000) if len(sys.argv) > 1 else 2_000_000
+    n_vertices = n_edges // 10
+    check_malformed()
+    sources, targets, weights = random_edges(n_vertices, n_edges)
+
+    with tempfile.TemporaryDirectory() as directory:
+        formats = [
+            ("edge list", "graph.txt", lambda f : write_edge_list(f, sources, targets, weights), import_edge_list),
+            ("Matrix Market", "graph.mtx", lambda f : write_matrix_market(f, n_vertices, sources, targets, weights), import_matrix_market),
+            ("GraphML", "graph.graphml", lambda f : write_graphml(f, n_vertices, sources, targets, weights), import_graphml),
+        ]
+        print(f"{n_edges} edges between {n_vertices} vertices")
+        for name, filename, write, importer in formats:
+            filename = os.path.join(directory, filename)
+            write(filename)
+            size_mb = os.path.getsize(filename) / 2**20
+
+            reports = []
+            start = time.perf_counter()
+            graph = importer(filename, progress=lambda read, total, edges : reports.append(edges))
+            elapsed = time.perf_counter() - start
+
+            print(f"  {name}: {size_mb:.0f} MB in {elapsed:.2f}s, {n_edges / elapsed / 1e6:.2f}M edges/s, "
+                  f"{size_mb / elapsed:.1f} MB/s, {len(reports)} progress reports, peak RSS {peak_rss_mb():.0f} MB")
+            del graph
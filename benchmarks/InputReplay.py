@@ -0,0 +1,77 @@
+import os
+# Replays don't need a window
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from benchmarks.FrameExport import reference_graph
+from visualizer.FrameProfiler import FrameProfiler
+from visualizer.InputRecording import InputRecorder
+import visualizer.GraphDrawer
+import pygame
+import sys
+import tempfile
+import time
+
+def scripted_session(filename : str, delta_time : float = 1 / 60, motions_per_frame : int = 4) -> None:
+    """
+    Writes a recording that pans, zooms out and in, adds a few nodes and cuts
+    across the window, with several motion events per frame like a fast mouse.
+    """
+    frames : list[list[pygame.event.Event]] = [[] for _ in range(30)]
+    mouse = [400.0, 300.0]
+
+    def move(dx : float, dy : float, n_frames : int, buttons : tuple[int, int, int]) -> None:
+        for _ in range(n_frames):
+            events = []
+            for _ in range(motions_per_frame):
+                mouse[0] += dx / motions_per_frame
+                mouse[1] += dy / motions_per_frame
+                events.append(pygame.event.Event(pygame.MOUSEMOTION, pos=(int(mouse[0]), int(mouse[1])), rel=(0, 0), buttons=buttons))
+            frames.append(events)
+
+    def button(kind : int, button : int) -> None:
+        frames.append([pygame.event.Event(kind, pos=(int(mouse[0]), int(mouse[1])), button=button)])
+
+    # Pan with the middle button
+    button(pygame.MOUSEBUTTONDOWN, 2)
+    move(-4, -2, 40, (0, 1, 0))
+    button(pygame.MOUSEBUTTONUP, 2)
+    # Zoom out and back in
+    for y in [-1] * 10 + [1] * 10:
+        frames.append([pygame.event.Event(pygame.MOUSEWHEEL, x=0, y=y)])
+    # Add nodes on the left of the window
+    for i in range(3):
+        mouse[:] = [60.0, 100.0 + 150 * i]
+        button(pygame.MOUSEBUTTONDOWN, 1)
+        button(pygame.MOUSEBUTTONUP, 1)
+    # Cut across the window with the right button, held long enough to be a drag
+    mouse[:] = [20.0, 20.0]
+    button(pygame.MOUSEBUTTONDOWN, 3)
+    move(12, 9, 60, (0, 0, 1))
+    button(pygame.MOUSEBUTTONUP, 3)
+    # Let the layout settle
+    frames.extend([] for _ in range(120))
+    frames.append([pygame.event.Event(pygame.QUIT)])
+
+    with InputRecorder(filename) as recorder:
+        for events in frames:
+            recorder.record(delta_time, events)
+
+if __name__ == "__main__":
+    # An optional recording made with GraphDrawer.main(graph, record_file=...) replaces the scripted one
+    with tempfile.TemporaryDirectory() as directory:
+        if len(sys.argv) > 1:
+            recording = sys.argv[1]
+        else:
+            recording = os.path.join(directory, "session.jsonl")
+            scripted_session(recording)
+
+        graph = reference_graph()
+        profiler = FrameProfiler(capacity=10_000)
+        start = time.perf_counter()
+        visualizer.GraphDrawer.main(graph, profiler=profiler, replay_file=recording)
+        elapsed = time.perf_counter() - start
+
+        n_edges = sum(len(graph.adjacent_vertices(v)) for v in graph.vertices)
+        print(f"{profiler.frames} frames in {elapsed:.2f}s, {len(graph.vertices)} vertices and {n_edges} edges at the end")
+        for stage, (p50, p95, p99) in profiler.percentiles().items():
+            print(f"  {stage:<13} p50 {p50 * 1000:7.2f} ms  p95 {p95 * 1000:7.2f} ms  p99 {p99 * 1000:7.2f} ms")
@@ -0,0 +1,81 @@
+from graph.Graph import Graph
+from visualizer.Node import Node
+from visualizer.NodeStore import NodeStore
+import physics.GraphPhysics
+import physics.Placement
+import json
+import os
+import random
+import sys
+import tracemalloc
+
+# Allowed growth of any peak over the baseline before it counts as a regression
+TOLERANCE = 0.1
+
+def random_edges(n_vertices : int, degree : int = 4, seed : int = 0) -> list[tuple[int, int, float]]:
+    rng = random.Random(seed)
+    return [(v, rng.randrange(n_vertices), 1.0) for v in range(n_vertices) for _ in range(degree)]
+
+def load(n_vertices : int) -> Graph[Node]:
+    """Nodes in a store of their own and a random graph of them, built with one bulk insert"""
+    store = NodeStore()
+    nodes = store.create_nodes([f"v{i}" for i in range(n_vertices)], [0.0] * n_vertices, [0.0] * n_vertices)
+    graph = Graph()
+    graph.add_many(nodes)
+    graph.connect_many((nodes[s], nodes[t], w) for s, t, w in random_edges(n_vertices))
+    return graph
+
+def analyze(graph : Graph[Node]) -> None:
+    graph.reverse_graph
+    graph.connected_components
+    graph.is_directed
+
+def layout(graph : Graph[Node]) -> None:
+    physics.Placement.place(graph, "spectral", seed=0, center=(0, 0))
+    physics.GraphPhysics.step(graph, 1 / 60)
+
+def measure(n_vertices : int) -> dict[str, int]:
+    """Peak bytes allocated during each phase, and what the graph holds after it"""
+    results = {}
+    tracemalloc.start()
+    graph = None
+    for phase, run in [("load", lambda : load(n_vertices)), ("analysis", lambda : analyze(graph)), ("layout", lambda : layout(graph))]:
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        graph = run() or graph
+        results[f"{phase}_peak"] = tracemalloc.get_traced_memory()[1] - before
+        results[f"{phase}_held"] = graph.memory_report()["total"]
+    tracemalloc.stop()
+    return results
+
+if __name__ == "__main__":
+    # With a baseline file, peaks are compared to it and a regression fails the run. Without one, it is written.
+    # Connected components are quadratic, so bigger sizes take minutes
+    baseline_file = sys.argv[1] if len(sys.argv) > 1 else None
+    sizes = [int(n) for n in sys.argv[2:]] or [250, 500, 1000]
+
+    results = {}
+    for n_vertices in sizes:
+        results[str(n_vertices)] = measure(n_vertices)
+        r = results[str(n_vertices)]
+        print(f"{n_vertices} vertices:")
+        for phase in ("load", "analysis", "layout"):
+            print(f"  {phase:<9} peak {r[f'{phase}_peak'] / 1024:9.0f} KiB   graph holds {r[f'{phase}_held'] / 1024:8.0f} KiB"
+                  f" ({r[f'{phase}_held'] / n_vertices:5.0f} B/vertex)")
+
+    if baseline_file is None:
+        sys.exit()
+    if not os.path.exists(baseline_file):
+        with open(baseline_file, "w") as file:
+            json.dump(results, file, indent=2)
+        print(f"Baseline written to {baseline_file}")
+        sys.exit()
+
+    with open(baseline_file) as file:
+        baseline = json.load(file)
+    regressions = [(size, key, baseline[size][key], value)
+                   for size, measured in results.items() if size in baseline
+                   for key, value in measured.items() if value > baseline[size].get(key, value) * (1 + TOLERANCE)]
+    for size, key, old, new in regressions:
+        print(f"Regression: {key} at {size} vertices went from {old / 1024:.0f} KiB to {new / 1024:.0f} KiB")
+    sys.exit(1 if regressions else 0)
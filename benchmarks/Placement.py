@@ -0,0 +1,72 @@
+from benchmarks.FrameExport import reference_graph
+from graph.Graph import Graph
+from visualizer.Node import Node
+import physics.GraphPhysics
+import physics.Placement
+import visualizer.NodeStore
+import numpy as np
+import sys
+import time
+
+DELTA_TIME = 1 / 60
+
+def energy(graph : Graph[Node]) -> float:
+    """Potential energy of the layout under the forces of 'GraphPhysics.step', with the same constants"""
+    vertices = graph.vertices
+    positions = visualizer.NodeStore.positions_of(vertices)
+    index = {v : i for i, v in enumerate(vertices)}
+
+    # Springs pull edges longer than 100 with 0.7 / 2 per unit
+    sources = [index[v] for v in vertices for _ in graph.adjacent_vertices(v)]
+    targets = [index[u] for v in vertices for u in graph.adjacent_vertices(v)]
+    lengths = np.hypot(*(positions[sources] - positions[targets]).T)
+    stretch = np.maximum(lengths - 100, 0)
+    springs = (0.35 / 2 * stretch * stretch).sum()
+
+    # Every pair closer than 200 repels with 25000 / d^2
+    dx = positions[:, 0, None] - positions[None, :, 0]
+    dy = positions[:, 1, None] - positions[None, :, 1]
+    d = np.hypot(dx, dy)[np.triu_indices(len(vertices), 1)]
+    d = np.maximum(d[d < 200], 5)
+    repulsion = (25000 * (1 / d - 1 / 200)).sum()
+    return float(springs + repulsion)
+
+def run(strategy : str, n_vertices : int, max_steps : int, seed : int = 0) -> tuple[float, list[float], list[float], int]:
+    """Placement time, the energy and elapsed time after every step, and the step the layout settled at"""
+    graph = reference_graph(n_vertices, seed)
+    start = time.perf_counter()
+    physics.Placement.place(graph, strategy, seed=seed, center=(0, 0))
+    placement_time = time.perf_counter() - start
+
+    energies, times = [energy(graph)], [placement_time]
+    settled_at = None
+    elapsed = placement_time
+    for step in range(1, max_steps + 1):
+        start = time.perf_counter()
+        displacement = physics.GraphPhysics.step(graph, DELTA_TIME)
+        elapsed += time.perf_counter() - start
+        energies.append(energy(graph))
+        times.append(elapsed)
+        # Same rule as Simulation, with its default settled_speed
+        if settled_at is None and displacement < 5 * DELTA_TIME:
+            settled_at = step
+    return placement_time, energies, times, settled_at
+
+if __name__ == "__main__":
+    # The target is within 10% of the lowest energy any strategy reaches
+    n_vertices = int(sys.argv[1]) if len(sys.argv) > 1 else 80
+    max_steps = int(sys.argv[2]) if len(sys.argv) > 2 else 1500
+
+    results = {strategy : run(strategy, n_vertices, max_steps) for strategy in physics.Placement.PLACEMENTS}
+    target = 1.1 * min(min(energies) for _, energies, _, _ in results.values())
+    print(f"{n_vertices} vertices, up to {max_steps} steps, target energy {target:.0f}")
+
+    for strategy, (placement_time, energies, times, settled_at) in results.items():
+        reached = next((step for step, e in enumerate(energies) if e <= target), None)
+        line = f"  {strategy:<10} placement {placement_time * 1000:6.1f} ms  energy {energies[0]:>10.0f} -> {energies[-1]:>8.0f}"
+        if reached is None:
+            line += "  target not reached"
+        else:
+            line += f"  target at step {reached:>4} ({times[reached]:.2f}s)"
+        line += f"  settled at step {settled_at}" if settled_at is not None else "  not settled"
+        print(line)
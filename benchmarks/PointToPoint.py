@@ -0,0 +1,86 @@
+"""
+Point to point shortest paths on a large graph with node positions, like a
+road network: how many vertices 'Graph.path' expands, and how long it takes,
+with the full Dijkstra, A* on the node positions and bidirectional Dijkstra.
+A* is timed with its heuristic built for every query, and with it built
+beforehand, as when many paths go to the same target. Every method must find
+paths of the same length.
+
+    python -m benchmarks.PointToPoint [grid size] [queries]
+"""
+from graph.Graph import Graph
+from graph.Metrics import Metrics
+from visualizer.Node import Node
+import visualizer.NodeStore
+import math
+import random
+import sys
+import time
+
+# name, method, and whether A* gets a heuristic built before the timing
+RUNS = [
+    ("dijkstra", "dijkstra", False),
+    ("astar", "astar", False),
+    ("astar, reused heuristic", "astar", True),
+    ("bidirectional", "bidirectional", False),
+]
+
+def grid_graph(size : int, seed : int = 0) -> Graph[Node]:
+    """
+    A 'size' x 'size' grid of jittered nodes, 100 apart, joined to their right
+    and lower neighbours in both directions. Weights are the edge length times
+    1 to 1.5, as if some roads were slower.
+    """
+    rng = random.Random(seed)
+    store = visualizer.NodeStore.NodeStore(size * size)
+    nodes = [[Node(row * size + column, column * 100 + rng.uniform(-30, 30), row * 100 + rng.uniform(-30, 30), store)
+              for column in range(size)] for row in range(size)]
+    edges = []
+    for row in range(size):
+        for column in range(size):
+            for other_row, other_column in ((row, column + 1), (row + 1, column)):
+                if other_row < size and other_column < size:
+                    a, b = nodes[row][column], nodes[other_row][other_column]
+                    weight = (a.pos - b.pos).magnitude * rng.uniform(1, 1.5)
+                    edges += [(a, b, weight), (b, a, weight)]
+    graph : Graph[Node] = Graph(metrics=Metrics())
+    graph.add_many(node for row in nodes for node in row)
+    graph.connect_many(edges)
+    return graph
+
+def expanded(graph : Graph) -> dict[str, float]:
+    """Vertices expanded so far, by method"""
+    counters = graph.metrics.snapshot()["counters"].get("graph_path_vertices_expanded_total", [])
+    return {counter["labels"]["method"] : counter["value"] for counter in counters}
+
+def length(graph : Graph, path : list) -> float:
+    return sum(graph.get_connection_weight(a, b) for a, b in zip(path, path[1:]))
+
+if __name__ == "__main__":
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    n_queries = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    graph = grid_graph(size)
+    rng = random.Random(1)
+    vertices = graph.vertices
+    queries = [(rng.choice(vertices), rng.choice(vertices)) for _ in range(n_queries)]
+    # Built once up front, like any cached result, so it isn't timed with the first query
+    graph.reverse_graph
+
+    print(f"{len(vertices)} vertices, {n_queries} queries")
+    lengths = {}
+    for name, method, reuse_heuristic in RUNS:
+        heuristics = {target : graph.position_heuristic(target) for _, target in queries} if reuse_heuristic else {}
+        before = expanded(graph).get(method, 0)
+        elapsed = 0.0
+        for source, target in queries:
+            start = time.perf_counter()
+            path = graph.path(source, target, method, heuristics.get(target))
+            elapsed += time.perf_counter() - start
+            lengths.setdefault((source, target), []).append(length(graph, path))
+        vertices_expanded = (expanded(graph)[method] - before) / n_queries
+        print(f"  {name:<24} {vertices_expanded:>8.0f} vertices expanded ({vertices_expanded / len(vertices):6.1%})"
+              f"  {elapsed / n_queries * 1000:9.1f} ms per query")
+
+    for (source, target), found in lengths.items():
+        assert all(math.isclose(l, found[0]) for l in found), f"Paths from {source} to {target} have different lengths: {found}"
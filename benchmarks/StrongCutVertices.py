@@ -0,0 +1,53 @@
+from graph.Graph import Graph
+import random
+import time
+
+def many_sccs_graph(n_components : int, component_size : int, chords : int = 2, seed : int = 0) -> Graph[int]:
+    """
+    Directed graph made of 'n_components' strongly connected components of
+    'component_size' vertices each. Every component is a cycle with a few
+    random chords, and components are linked forwards so they stay separate.
+    """
+    rng = random.Random(seed)
+    graph : Graph[int] = Graph()
+    
+    for c in range(n_components):
+        first = c * component_size
+        for v in range(first, first + component_size):
+            graph.add(v)
+        
+        for i in range(component_size):
+            v = first + i
+            graph.connect(v, first + (i + 1) % component_size, 1)
+            for _ in range(chords):
+                if rng.random() < 0.3:
+                    graph.connect(v, first + rng.randrange(component_size), 1)
+        
+        if c > 0:
+            graph.connect(first - 1, first, 1)
+    
+    return graph
+
+def time_cut_vertices(graph : Graph[int], parallel_threshold : int | None) -> tuple[set[int], float]:
+    # Work on a copy so both runs start without cached results
+    graph = graph.copy()
+    graph.parallel_threshold = parallel_threshold
+    
+    start = time.perf_counter()
+    cut_vertices = graph.cut_vertices
+    end = time.perf_counter()
+    
+    return cut_vertices, end - start
+
+if __name__ == "__main__":
+    for n_components, component_size in [(10, 100), (20, 100), (20, 150)]:
+        graph = many_sccs_graph(n_components, component_size)
+        
+        serial, serial_time = time_cut_vertices(graph, None)
+        parallel, parallel_time = time_cut_vertices(graph, 50)
+        
+        assert serial == parallel, "Parallel and serial strong cut vertices differ"
+        
+        print(f"{n_components} SCCs x {component_size} vertices: "
+              f"serial {serial_time:.3f}s, parallel {parallel_time:.3f}s, "
+              f"speedup x{serial_time / parallel_time:.2f} ({len(serial)} strong cut vertices)")
@@ -0,0 +1,90 @@
+from visualizer.Vector2 import Vector2
+from math import sqrt
+import numbers
+import timeit
+import tracemalloc
+
+class PropertyVector2:
+    """The Vector2 before it had slots: coordinates behind properties, only operators that allocate."""
+    def __init__(self, x : float = 0, y : float = 0) -> None:
+        self.__x = x
+        self.__y = y
+
+    @property
+    def x(self):
+        return self.__x
+    @x.setter
+    def x(self, x):
+        self.__x = x
+
+    @property
+    def y(self):
+        return self.__y
+    @y.setter
+    def y(self, y):
+        self.__y = y
+
+    @property
+    def magnitude(self):
+        return sqrt(self.x*self.x + self.y*self.y)
+
+    def __add__(self, other):
+        if isinstance(other, PropertyVector2):
+            return PropertyVector2(self.x + other.x, self.y + other.y)
+        raise TypeError("unsupported operand type(s)")
+    def __iadd__(self, other):
+        return self.__add__(other)
+
+    def __mul__(self, other):
+        if isinstance(other, numbers.Number):
+            return PropertyVector2(self.x * other, self.y * other)
+        raise TypeError("unsupported operand type(s)")
+    def __rmul__(self, other):
+        return self.__mul__(other)
+
+    def __truediv__(self, other):
+        if isinstance(other, numbers.Number):
+            return PropertyVector2(self.x / other, self.y / other)
+        raise TypeError("unsupported operand type(s)")
+
+# (name, statement that sets 'r', whether the old class has it). 'a' and 'b' are vectors, 'f' a float
+OPERATIONS = [
+    ("a + b", "r = a + b", True),
+    ("a += b", "a += b; r = a", True),
+    ("a * f", "r = a * f", True),
+    ("magnitude", "r = a.magnitude", True),
+    ("spring force", "r = (a.magnitude - 100) * f / 2 * b / b.magnitude * f", True),
+    ("a.add(b, f)", "r = a.add(b, f)", False),
+    ("a.scale(f)", "r = a.scale(f)", False),
+]
+
+def operands(vector_type : type) -> dict:
+    return {"a" : vector_type(3.0, 4.0), "b" : vector_type(1.0, 2.0), "f" : 1.0}
+
+def time_operation(vector_type : type, statement : str, number : int) -> float:
+    """Seconds per run of 'statement'"""
+    # Copied to locals, like in the physics loops
+    setup = "a, b, f = globals()['a'], globals()['b'], globals()['f']"
+    return min(timeit.repeat(statement, setup, globals=operands(vector_type), number=number, repeat=5)) / number
+
+def allocated_bytes(vector_type : type, statement : str, number : int) -> float:
+    """Bytes allocated per run of 'statement', keeping every result alive so none are freed"""
+    names = operands(vector_type)
+    names["results"] = [None] * number
+    code = compile(f"for i in range({number}):\n    {statement}\n    results[i] = r", "<benchmark>", "exec")
+    
+    tracemalloc.start()
+    exec(code, names)
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return allocated / number
+
+if __name__ == "__main__":
+    number = 200_000
+    print(f"{'operation':<14}{'property ns':>12}{'slotted ns':>12}{'property B':>12}{'slotted B':>11}")
+    for name, statement, in_old_class in OPERATIONS:
+        old_time = time_operation(PropertyVector2, statement, number) * 1e9 if in_old_class else float("nan")
+        new_time = time_operation(Vector2, statement, number) * 1e9
+        old_bytes = allocated_bytes(PropertyVector2, statement, 10_000) if in_old_class else float("nan")
+        new_bytes = allocated_bytes(Vector2, statement, 10_000)
+        print(f"{name:<14}{old_time:>12.1f}{new_time:>12.1f}{old_bytes:>12.1f}{new_bytes:>11.1f}")
@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+from array import array
+from random import random
+from typing import Callable, Iterable, Iterator, TextIO
+import json
+
+import numpy as np
+
+from graph.Graph import Graph
+from visualizer.Node import Node
+
+# Every relation list a character can have. The order is the one the graphs are built in,
+# so when two relations join the same pair of characters the later one sets the weight
+RELATION_KINDS = ("siblings", "parents", "guardedBy", "guardianOf", "marriedEngaged", "allies",
+                  "servedBy", "serves", "abducted", "abductedBy", "killed", "killedBy", "parentOf")
+
+RELATIONSHIP_WEIGHTS = {
+    "siblings" : 1, "parents" : 1, "guardedBy" : 1, "guardianOf" : 1, "marriedEngaged" : 1,
+    "allies" : 3,
+    "servedBy" : 5, "serves" : 5,
+    "abducted" : 15, "abductedBy" : 15,
+    "killed" : 40, "killedBy" : 40,
+}
+
+FAMILY_KINDS = ("siblings", "parents", "guardedBy")
+
+def _relationship_position() -> tuple[float, float]:
+    return random() * 300 + 200, random() * 200 + 140
+
+def _house_position() -> tuple[float, float]:
+    return (random() - 0.5) * 300, (random() - 0.5) * 300
+
+def iter_json_array(file : TextIO, chunk_size : int = 1 << 16) -> Iterator[object]:
+    """Yields the elements of a top level JSON array one by one, reading the file in chunks."""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    eof = False
+
+    def next_token() -> str | None:
+        # Skips whitespace, reading more of the file if needed
+        nonlocal buffer, position, eof
+        while True:
+            while position < len(buffer) and buffer[position].isspace():
+                position += 1
+            if position < len(buffer):
+                return buffer[position]
+            if eof:
+                return None
+            buffer = file.read(chunk_size)
+            position = 0
+            eof = len(buffer) == 0
+
+    if next_token() != "[":
+        raise ValueError("Expected a JSON array")
+    position += 1
+
+    if next_token() == "]":
+        return
+
+    while True:
+        try:
+            element, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            # The element is split between chunks
+            chunk = file.read(chunk_size)
+            eof = len(chunk) == 0
+            buffer = buffer[position:] + chunk
+            position = 0
+            continue
+
+        yield element
+        position = end
+
+        token = next_token()
+        if token == "]":
+            return
+        if token != ",":
+            raise ValueError(f"Expected ',' or ']' in JSON array, found {token!r}")
+        position += 1
+        next_token()
+
+class CharacterIndex:
+    """
+    Every character of a data file parsed once into a name to id index, the
+    houses of each character and one edge array per relation kind.
+
+    Any house or relationship graph can then be built from the index without
+    reading the file again.
+
+    Some names (like 'Stark Guard') have more than one record in the file. They
+    are a single character, with the relations of all of its records.
+    """
+    def __init__(self) -> None:
+        self.__ids : dict[str, int] = {}
+        self.__names : list[str] = []
+        # Whether every id is a character, or a name only referenced by others
+        self.__is_character = array("b")
+        self.__characters : list[int] = []
+        # Character id of every record, and records of every character
+        self.__record_ids = array("q")
+        self.__records : dict[int, list[int]] = {}
+        # Records of the members of each house
+        self.__houses : dict[str, list[int]] = {}
+
+        # Edges store the record they come from and the target id
+        self.__sources = {kind : array("q") for kind in RELATION_KINDS}
+        self.__targets = {kind : array("q") for kind in RELATION_KINDS}
+
+        # Built by 'finalize', the edges of every record sorted as they appear in the file
+        self.__edge_start : np.ndarray = None
+        self.__edge_targets : np.ndarray = None
+        self.__edge_kinds : np.ndarray = None
+
+    @staticmethod
+    def load(filename : str = "example/data.json", streaming : bool = False, chunk_size : int = 1 << 16) -> CharacterIndex:
+        """
+        With 'streaming' the file is read in chunks and each character is indexed
+        as soon as it is parsed, so the file never has to fit in memory.
+        """
+        index = CharacterIndex()
+        with open(filename, "r") as file:
+            if streaming:
+                index.add_records(iter_json_array(file, chunk_size))
+            else:
+                index.add_records(json.load(file))
+        index.finalize()
+        return index
+
+    def __intern(self, name : str) -> int:
+        id = self.__ids.get(name)
+        if id is None:
+            id = len(self.__names)
+            self.__ids[name] = id
+            self.__names.append(name)
+            self.__is_character.append(False)
+        return id
+
+    def add_records(self, records : Iterable[dict]) -> None:
+        for record in records:
+            id = self.__intern(record["name"])
+            record_index = len(self.__record_ids)
+            self.__record_ids.append(id)
+            if not self.__is_character[id]:
+                self.__is_character[id] = True
+                self.__characters.append(id)
+                self.__records[id] = []
+            self.__records[id].append(record_index)
+
+            houses = record.get("house", ())
+            if isinstance(houses, str):
+                houses = (houses,)
+            for house in houses:
+                self.__houses.setdefault(house, []).append(record_index)
+
+            for kind in RELATION_KINDS:
+                for target in record.get(kind, ()):
+                    self.__sources[kind].append(record_index)
+                    self.__targets[kind].append(self.__intern(target))
+
+    def finalize(self) -> None:
+        """Sorts the edge arrays by record and kind. Needed after adding records."""
+        sources = np.concatenate([np.array(self.__sources[kind], dtype=np.int64) for kind in RELATION_KINDS])
+        targets = np.concatenate([np.array(self.__targets[kind], dtype=np.int64) for kind in RELATION_KINDS])
+        kinds = np.concatenate([np.full(len(self.__sources[kind]), i, dtype=np.int8) for i, kind in enumerate(RELATION_KINDS)])
+
+        # Stable, so edges of the same record and kind keep the order of their list
+        order = np.argsort(sources * len(RELATION_KINDS) + kinds, kind="stable")
+        self.__edge_targets = targets[order]
+        self.__edge_kinds = kinds[order]
+        self.__edge_start = np.searchsorted(sources[order], np.arange(len(self.__record_ids) + 1))
+
+    @property
+    def characters(self) -> list[str]:
+        return [self.__names[id] for id in self.__characters]
+
+    @property
+    def houses(self) -> list[str]:
+        return list(self.__houses.keys())
+
+    def id(self, name : str) -> int:
+        return self.__ids[name]
+
+    def name(self, id : int) -> str:
+        return self.__names[id]
+
+    def is_character(self, name : str) -> bool:
+        id = self.__ids.get(name)
+        return id is not None and bool(self.__is_character[id])
+
+    def edges(self, kind : str) -> tuple[np.ndarray, np.ndarray]:
+        """Source and target ids of every relation of the given kind."""
+        record_ids = np.array(self.__record_ids, dtype=np.int64)
+        return (record_ids[np.array(self.__sources[kind], dtype=np.int64)],
+                np.array(self.__targets[kind], dtype=np.int64))
+
+    def __character_edges(self, id : int, kinds : list[bool]) -> Iterator[tuple[int, int]]:
+        for record in self.__records[id]:
+            start, end = self.__edge_start[record], self.__edge_start[record + 1]
+            for target, kind in zip(self.__edge_targets[start:end].tolist(), self.__edge_kinds[start:end].tolist()):
+                if kinds[kind]:
+                    yield target, kind
+
+    def __record_positions(self, place : Callable[[], tuple[float, float]]) -> list[tuple[float, float]]:
+        # One random position per record, drawn in file order
+        return [place() for _ in range(len(self.__record_ids))]
+
+    def relationship_graph(self, weights : dict[str, float] = RELATIONSHIP_WEIGHTS) -> Graph[Node]:
+        """Graph of every character, joined by the relation kinds in 'weights'."""
+        kinds = [kind in weights for kind in RELATION_KINDS]
+        kind_weights = [weights.get(kind) for kind in RELATION_KINDS]
+
+        # A repeated character is placed where its last record is
+        positions = self.__record_positions(_relationship_position)
+        nodes : dict[int, Node] = {}
+        for id in self.__characters:
+            nodes[id] = Node(self.__names[id], *positions[self.__records[id][-1]])
+
+        adjacency : dict[Node, dict[Node, float]] = {node : {} for node in nodes.values()}
+        for id, node in nodes.items():
+            neighbors = adjacency[node]
+            for target, kind in self.__character_edges(id, kinds):
+                if target in nodes:
+                    neighbors[nodes[target]] = kind_weights[kind]
+
+        return Graph(adjacency, debug_log=False)
+
+    def house_graphs(self) -> dict[str, Graph[Node]]:
+        """One graph per house, joined in both directions by family relations."""
+        positions = self.__record_positions(_house_position)
+        return {house : self.__house_graph(house, positions) for house in self.__houses}
+
+    def house_graph(self, house : str) -> Graph[Node]:
+        return self.__house_graph(house, self.__record_positions(_house_position))
+
+    def __house_graph(self, house : str, positions : list[tuple[float, float]]) -> Graph[Node]:
+        kinds = [kind in FAMILY_KINDS for kind in RELATION_KINDS]
+
+        # A repeated character is placed where its first record in the house is
+        nodes : dict[int, Node] = {}
+        for record in self.__houses[house]:
+            id = self.__record_ids[record]
+            if id not in nodes:
+                nodes[id] = Node(self.__names[id], *positions[record])
+
+        adjacency : dict[Node, dict[Node, float]] = {node : {} for node in nodes.values()}
+        for id, node in nodes.items():
+            for target, _ in self.__character_edges(id, kinds):
+                if target in nodes:
+                    adjacency[node][nodes[target]] = 0
+                    adjacency[nodes[target]][node] = 0
+
+        return Graph(adjacency)
@@ -1,23 +1,36 @@
 import visualizer.GraphDrawer
+from visualizer.GraphFile import load_graph, save_graph
 from example.DataLoader import DataLoader
+import physics.Placement
 import cProfile, pstats
 import random
+import os
+import sys
 
 if __name__ == "__main__":
     N = 80
-    graph = DataLoader.load_relationships()
+    # An optional layout file keeps the graph and its node positions between runs
+    layout_file = sys.argv[1] if len(sys.argv) > 1 else None
     
-    # Let's filter any person who doesn't have enough connections. The minimum will be random between 0 and 2
-    for v in graph.vertices:
-        if len(graph.adjacent_vertices(v)) <= random.choice([0, 1, 1, 1, 1, 2]):
-            graph.remove(v)
-    
-    n = len(graph.vertices)
-    
-    print(n)
-    if n > N:
-        for _ in range(n - N):
-            graph.remove(graph.vertices[0])
+    if layout_file is not None and os.path.exists(layout_file):
+        graph = load_graph(layout_file)
+    else:
+        graph = DataLoader.load_relationships()
+        
+        # Let's filter any person who doesn't have enough connections. The minimum will be random between 0 and 2
+        for v in graph.vertices:
+            if len(graph.adjacent_vertices(v)) <= random.choice([0, 1, 1, 1, 1, 2]):
+                graph.remove(v)
+        
+        n = len(graph.vertices)
+        
+        print(n)
+        if n > N:
+            for _ in range(n - N):
+                graph.remove(graph.vertices[0])
+        
+        # Placed once the graph is filtered, so the removed nodes don't shape the layout
+        physics.Placement.place(graph, "pivot_mds")
     
     print(graph)
     
@@ -28,4 +41,6 @@ if __name__ == "__main__":
     # stats = pstats.Stats(profiler).sort_stats("cumtime")
     # stats.print_stats(30)       # top 20 slow functions
     # stats.dump_stats("out.prof")
-
+    
+    if layout_file is not None:
+        save_graph(layout_file, graph)
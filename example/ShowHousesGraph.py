@@ -1,12 +1,9 @@
-import visualizer.GraphDrawer
+import visualizer.MultiGraphViewer
 from example.DataLoader import DataLoader
 
 if __name__ == "__main__":
-    N = 80
     graphs = DataLoader.load_houses()
     
-    for house, graph in graphs.items():
-        print(house)
-        visualizer.GraphDrawer.main(graph)
-
-
+    # Every house side by side, in one window
+    print(", ".join(graphs))
+    visualizer.MultiGraphViewer.main(graphs)
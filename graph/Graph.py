@@ -3,15 +3,124 @@ import typing
 from collections import deque
 from functools import wraps
 from enum import Enum
+import heapq
+import itertools
 import math
+import sys
 import time
+import types
+
+from graph.Metrics import Metrics
+
+if typing.TYPE_CHECKING:
+    from concurrent.futures import Executor
 
 class Order(Enum):
     DEPTH = 1,
     WIDTH = 2
 
+def _compact_component_dominators(predecessors : list[tuple[int, ...]]) -> list[int]:
+    """
+    Same as 'Graph.get_component_dominators', but over a component relabelled
+    as 0..n-1 (0 being the start vertex) and described only by the predecessor
+    indices of each vertex. It is a module level function so it can be sent to
+    a process pool without pickling the vertices themselves.
+    """
+    n = len(predecessors)
+    dom = [set(range(n)) for _ in range(n)]
+    dom[0] = {0}
+    
+    changed = True
+    while changed:
+        changed = False
+        
+        for v in range(1, n):
+            new_dom = set(dom[v])
+            for u in predecessors[v]:
+                new_dom.intersection_update(dom[u])
+            new_dom.add(v)
+            
+            if new_dom != dom[v]:
+                dom[v] = new_dom
+                changed = True
+    
+    dominators = set()
+    for v in range(1, n):
+        dom[v].discard(0)
+        dom[v].discard(v)
+        dominators.update(dom[v])
+    
+    # For the start vertex, we check if the rest of the component stays strongly connected without it
+    successors : list[list[int]] = [[] for _ in range(n)]
+    for v in range(n):
+        for u in predecessors[v]:
+            successors[u].append(v)
+    
+    for neighbors in (successors, predecessors):
+        visited = {1}
+        vertices_to_visit = [1]
+        while vertices_to_visit:
+            v = vertices_to_visit.pop()
+            for u in neighbors[v]:
+                if u != 0 and u not in visited:
+                    visited.add(u)
+                    vertices_to_visit.append(u)
+        
+        if len(visited) < n - 1:
+            dominators.add(0)
+            break
+    
+    return list(dominators)
+
+
+_CONTAINERS = (dict, list, tuple, set, frozenset, deque)
+_NOT_FOLLOWED = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType)
+
+def _deep_sizeof(obj : object, seen : set[int]) -> int:
+    """
+    Bytes of 'obj' and everything it references, skipping the objects in 'seen'
+    (by id) and adding the ones it counts. Containers and the attributes of
+    plain objects are followed. Objects that define '__sizeof__' are trusted to
+    report their full size, and classes, modules and functions are not counted.
+    """
+    size = 0
+    pending = [obj]
+    while pending:
+        obj = pending.pop()
+        if id(obj) in seen or isinstance(obj, _NOT_FOLLOWED):
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        
+        if isinstance(obj, dict):
+            pending.extend(obj.keys())
+            pending.extend(obj.values())
+        elif isinstance(obj, _CONTAINERS):
+            pending.extend(obj)
+        elif type(obj).__sizeof__ is object.__sizeof__:
+            if hasattr(obj, "__dict__"):
+                pending.append(obj.__dict__)
+            for cls in type(obj).__mro__:
+                for name in cls.__dict__.get("__slots__", ()):
+                    if name.startswith("__") and not name.endswith("__"):
+                        name = f"_{cls.__name__.lstrip('_')}{name}"
+                    if hasattr(obj, name):
+                        pending.append(getattr(obj, name))
+    return size
+
+
+def _path_to[T](parents : dict[T, T], vertex : T) -> list[T]:
+    """Path from the root of 'parents' to 'vertex'"""
+    path = []
+    while vertex is not None:
+        path.append(vertex)
+        vertex = parents[vertex]
+    return path[::-1]
+
+
 class Graph[T]:
-    def __init__(self: typing.Self, adjacency_dict : dict[T, dict[T, float | bool]] = None, debug_log=False):
+    def __init__(self: typing.Self, adjacency_dict : dict[T, dict[T, float | bool]] = None, debug_log=False, parallel_threshold : int | None = None,
+                 metrics : Metrics | None = None):
         if adjacency_dict == None:
             adjacency_dict = {}
         
@@ -23,6 +132,10 @@ class Graph[T]:
         self.__cache : dict[str, tuple[str, int]] = {}
         
         self.debug_log=debug_log
+        self.metrics = metrics
+        
+        # Strongly connected components bigger than this are sent to a process pool when looking for strong cut vertices
+        self.parallel_threshold = parallel_threshold
     
     def versioned_cache(key):
         def decorator(func):
@@ -35,17 +148,66 @@ class Graph[T]:
                     end = time.perf_counter()
                     if self.debug_log:
                         print(f"Func: '{func.__name__}' took {end-start} seconds")
+                    if self.metrics is not None:
+                        self.metrics.increment("graph_cache_misses_total", key=key)
+                        self.metrics.observe("graph_algorithm_seconds", end-start, algorithm=key)
                     self.__cache[key] = (val, self.__version)
+                elif self.metrics is not None:
+                    self.metrics.increment("graph_cache_hits_total", key=key)
                 return val
             return wrapper
         return decorator
     
-    def _change(self):
+    def timed(name):
+        """Records the duration of uncached algorithms when metrics are enabled"""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(self:typing.Self, *args, **kwargs):
+                if self.metrics is None:
+                    return func(self, *args, **kwargs)
+                with self.metrics.timer("graph_algorithm_seconds", algorithm=name):
+                    return func(self, *args, **kwargs)
+            return wrapper
+        return decorator
+    
+    def _change(self, kind : str = "change"):
         if self.debug_log:
             print(f"Change: version = {self.__version} -------------")
+        if self.metrics is not None:
+            self.metrics.increment("graph_mutations_total", kind=kind)
         self.__version += 1
     
     
+    @property
+    def version(self) -> int:
+        """Increases with every change, so results computed from the graph can be cached"""
+        return self.__version
+    
+    
+    def memory_report(self) -> dict[str, int]:
+        """
+        Bytes held by the graph: 'vertices' (the vertex objects and their
+        payloads), 'adjacency' (the dicts and weights) and 'caches' (every
+        cached result, stale or not, also given per key as 'cache.<key>'),
+        plus their 'total'. Objects shared between them are counted once, in
+        that order, so a cached reverse graph only adds its own dicts.
+        """
+        seen : set[int] = set()
+        report = {
+            "vertices" : sum(_deep_sizeof(v, seen) for v in self.__adj),
+            "adjacency" : _deep_sizeof(self.__adj, seen),
+        }
+        
+        caches = 0
+        for key, entry in list(self.__cache.items()):
+            size = _deep_sizeof(entry, seen)
+            report[f"cache.{key}"] = size
+            caches += size
+        report["caches"] = caches
+        report["total"] = report["vertices"] + report["adjacency"] + caches
+        return report
+    
+    
     ### Full graph methods ##########################################
     def copy(self):
         return Graph(self.__adj)
@@ -84,10 +246,21 @@ class Graph[T]:
         if not self.contains(vertex):
             self.__adj[vertex] = {}
 
-            self._change()
+            self._change("add")
         
         return self
 
+    def add_many(self: typing.Self, vertices: typing.Iterable[T]) -> Graph[T]: 
+        """Adds every missing vertex, as a single change"""
+        n_vertices = len(self.__adj)
+        for vertex in vertices:
+            if vertex not in self.__adj:
+                self.__adj[vertex] = {}
+        
+        if len(self.__adj) != n_vertices:
+            self._change("add_many")
+        return self
+
     def remove(self: typing.Self, vertex: T) -> Graph[T]: 
         if self.contains(vertex):
             self.__adj.pop(vertex)
@@ -95,7 +268,7 @@ class Graph[T]:
             for v in self.__adj:
                 self.__adj[v].pop(vertex, None)
         
-            self._change()
+            self._change("remove")
         
         return self
         
@@ -117,14 +290,33 @@ class Graph[T]:
     def connect(self: typing.Self, source: T, target: T, weight: float|bool) -> Graph[T]: 
         if self.contains(source) and self.contains(target):
             self.__adj[source][target] = weight
-            self._change()
+            self._change("connect")
+
+        return self
 
+    def connect_many(self: typing.Self, edges: typing.Iterable[tuple[T, T, float | bool]]) -> Graph[T]: 
+        """
+        Connects every (source, target, weight), adding the vertices that are
+        missing. It is a single change, so bulk inserts only invalidate the caches once.
+        """
+        adj = self.__adj
+        n_edges = 0
+        for n_edges, (source, target, weight) in enumerate(edges, 1):
+            if target not in adj:
+                adj[target] = {}
+            try:
+                adj[source][target] = weight
+            except KeyError:
+                adj[source] = {target : weight}
+        
+        if n_edges > 0:
+            self._change("connect_many")
         return self
 
     def disconnect(self: typing.Self, source: T, target: T) -> Graph[T]: 
         if self.contains(source) and self.contains(target):
             self.__adj[source].pop(target)
-            self._change()
+            self._change("disconnect")
         return self
 
     @property
@@ -192,6 +384,7 @@ class Graph[T]:
             vertices_to_visit.extend([v for v in predecessors if (v not in visited and v not in vertices_to_visit)])
         return visited
     
+    @timed("travel_full_graph")
     def travel_full_graph(self, start: T, order: Order) -> list[T]:
         if not self.contains(start):
             raise(f"There is no vertex {start} in the graph")
@@ -314,25 +507,65 @@ class Graph[T]:
         2012
 
         """
-        dom : set[T] = self.calculate_graph_dominators()
-        dom_r : set[T] = self.reverse_graph.calculate_graph_dominators()
+        threshold = self.parallel_threshold
+        if threshold is None or all(len(c) <= threshold for c in self.connected_components):
+            dom : set[T] = self.calculate_graph_dominators()
+            dom_r : set[T] = self.reverse_graph.calculate_graph_dominators()
+        else:
+            # The reverse graph must be cached before both passes start using it.
+            # Its strongly connected components are the same, so they aren't searched again
+            # Imported here, multiprocessing takes longer to import than the rest of the module
+            from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+            reverse_graph = self.reverse_graph
+            components = self.connected_components
+            with ProcessPoolExecutor() as process_pool, ThreadPoolExecutor(max_workers=2) as passes:
+                forward = passes.submit(self.calculate_graph_dominators, threshold, process_pool)
+                backward = passes.submit(reverse_graph.calculate_graph_dominators, threshold, process_pool, components)
+                dom = forward.result()
+                dom_r = backward.result()
         
         cut_vertices = dom.union(dom_r)
         
         return cut_vertices
     
     
-    def calculate_graph_dominators(self) -> dict[T, set[T]]:
+    def calculate_graph_dominators(self, parallel_threshold : int | None = None, executor : Executor | None = None,
+                                   strongly_connected_components : list[list[T]] | None = None) -> dict[T, set[T]]:
+        """
+        If an executor is given, components with more than 'parallel_threshold'
+        vertices are computed on it from their compact form.
+        
+        The strongly connected components can be given if they are already known
+        (for example, the ones of the reverse graph).
+        """
         # We get the strongly connected components following a depth search
-        strongly_connected_components = self.connected_components
+        if strongly_connected_components is None:
+            strongly_connected_components = self.connected_components
         dom : set[T] = set()
         
+        pending = []
         for component in strongly_connected_components:
             if len(component) > 2:
+                if executor is not None and parallel_threshold is not None and len(component) > parallel_threshold:
+                    future = executor.submit(_compact_component_dominators, self.compact_component(component))
+                    pending.append((component, future))
+                    continue
+                
                 new_dominators = self.get_component_dominators(component)
                 dom.update(new_dominators)
+        
+        for component, future in pending:
+            dom.update(component[i] for i in future.result())
 
         return dom
+    
+    def compact_component(self, component_by_depth : list[T]) -> list[tuple[int, ...]]:
+        """
+        Relabels the component's vertices by their position in 'component_by_depth'
+        and returns, for each one, the indices of its predecessors inside the component.
+        """
+        index = {v : i for i, v in enumerate(component_by_depth)}
+        return [tuple(index[u] for u in self.predecessors(v) if u in index) for v in component_by_depth]
 
     def get_component_dominators(self, component_by_depth : list[T]) -> set[T]:
         """
@@ -388,6 +621,7 @@ class Graph[T]:
         return dom
 
     
+    @timed("dijkstra")
     def dijkstra(self, source : T):
         pending = list(self.vertices)
 
@@ -411,9 +645,150 @@ class Graph[T]:
         
         return distances, paths
     
-    def path(self, source: T, target: T) -> list[T]:
-        _, paths  = self.dijkstra(source)
-        return paths[target]
+    @timed("path")
+    def path(self, source : T, target : T, method : str = "auto", heuristic : typing.Callable[[T], float] | None = None) -> list[T]:
+        """
+        Shortest path from 'source' to 'target', or [] if there is none.
+        
+        'astar' is A* search guided by 'heuristic', an estimate of the distance
+        from a vertex to 'target' that must never be too high. It defaults to
+        'position_heuristic', which takes a pass over the edges to build, so it
+        is worth passing in when many paths go to the same target.
+        'bidirectional' runs Dijkstra from both ends at once, backwards over
+        the predecessors, until the searches meet. 'dijkstra' is the full
+        single source search. 'auto' is A* if a heuristic is given and
+        bidirectional otherwise.
+        """
+        if method not in ("auto", "astar", "bidirectional", "dijkstra"):
+            raise ValueError(f"Unknown shortest path method '{method}'")
+        
+        if method == "auto":
+            method = "astar" if heuristic is not None else "bidirectional"
+        if method == "astar" and heuristic is None:
+            heuristic = self.position_heuristic(target)
+            if heuristic is None:
+                raise ValueError("A* needs a heuristic, and the vertices have no positions to make one")
+        
+        if method == "astar":
+            path, expanded = self.__astar(source, target, heuristic)
+        elif method == "bidirectional":
+            path, expanded = self.__bidirectional_dijkstra(source, target)
+        else:
+            _, paths = self.dijkstra(source)
+            path, expanded = paths[target], len(self.__adj)
+        
+        if self.metrics is not None:
+            self.metrics.increment("graph_path_vertices_expanded_total", expanded, method=method)
+        return path
+    
+    def position_heuristic(self, target : T) -> typing.Callable[[T], float] | None:
+        """
+        Straight line distance to 'target', from the 'pos' of the vertices,
+        scaled by the smallest weight per unit of length of any edge. No path
+        can be shorter than that, so A* with it finds the shortest path.
+        
+        None if a vertex has no position, a weight isn't a non-negative number,
+        or no edge has a length. Vertices move without changing the version, so
+        the scale is worked out on every call, in one pass over the edges.
+        """
+        positions : dict[T, tuple[float, float]] = {}
+        for v in self.__adj:
+            pos = getattr(v, "pos", None)
+            if pos is None:
+                return None
+            positions[v] = (pos.x, pos.y)
+        
+        scale = math.inf
+        for v, neighbors in self.__adj.items():
+            x1, y1 = positions[v]
+            for u, w in neighbors.items():
+                if not isinstance(w, (int, float)) or w < 0:
+                    return None
+                x2, y2 = positions[u]
+                length = math.hypot(x2 - x1, y2 - y1)
+                if length > 0 and w < scale * length:
+                    scale = w / length
+        
+        if math.isinf(scale) or scale == 0 or target not in positions:
+            return None
+        
+        target_x, target_y = positions[target]
+        def heuristic(v : T) -> float:
+            x, y = positions[v]
+            return scale * math.hypot(target_x - x, target_y - y)
+        return heuristic
+    
+    def __astar(self, source : T, target : T, heuristic : typing.Callable[[T], float]) -> tuple[list[T], int]:
+        """The path and how many vertices were expanded"""
+        distances : dict[T, float] = {source : 0}
+        parents : dict[T, T] = {source : None}
+        closed : set[T] = set()
+        # The counter breaks ties, vertices may not be comparable
+        counter = itertools.count()
+        heap = [(heuristic(source), next(counter), source)]
+        
+        while heap:
+            _, _, v = heapq.heappop(heap)
+            if v in closed:
+                continue
+            closed.add(v)
+            if v == target:
+                return _path_to(parents, target), len(closed)
+            
+            distance = distances[v]
+            for u, w in self.__adj[v].items():
+                new_distance = distance + w
+                if new_distance < distances.get(u, math.inf):
+                    distances[u] = new_distance
+                    parents[u] = v
+                    heapq.heappush(heap, (new_distance + heuristic(u), next(counter), u))
+        
+        return [], len(closed)
+    
+    def __bidirectional_dijkstra(self, source : T, target : T) -> tuple[list[T], int]:
+        """The path and how many vertices were expanded, by both searches"""
+        if source == target:
+            return [source], 1
+        
+        counter = itertools.count()
+        # adjacency, distances, parents, heap and closed vertices of the forward and the backward search
+        searches = [
+            (self.__adj, {source : 0}, {source : None}, [(0, next(counter), source)], set()),
+            (self.reverse_graph.__adj, {target : 0}, {target : None}, [(0, next(counter), target)], set()),
+        ]
+        forward_heap, backward_heap = searches[0][3], searches[1][3]
+        
+        best = math.inf
+        meeting : T = None
+        while forward_heap and backward_heap:
+            # Any path joining the searches from now on is at least this long
+            if forward_heap[0][0] + backward_heap[0][0] >= best:
+                break
+            
+            side = 0 if forward_heap[0][0] <= backward_heap[0][0] else 1
+            adjacency, distances, parents, heap, closed = searches[side]
+            other_distances = searches[1 - side][1]
+            
+            distance, _, v = heapq.heappop(heap)
+            if v in closed:
+                continue
+            closed.add(v)
+            
+            for u, w in adjacency[v].items():
+                new_distance = distance + w
+                if new_distance < distances.get(u, math.inf):
+                    distances[u] = new_distance
+                    parents[u] = v
+                    heapq.heappush(heap, (new_distance, next(counter), u))
+                if u in other_distances and distances[u] + other_distances[u] < best:
+                    best = distances[u] + other_distances[u]
+                    meeting = u
+        
+        expanded = len(searches[0][4]) + len(searches[1][4])
+        if meeting is None:
+            return [], expanded
+        # The backward parents lead from the meeting vertex to the target
+        return _path_to(searches[0][2], meeting) + _path_to(searches[1][2], meeting)[-2::-1], expanded
     
     
     def __str__(self: typing.Self) -> str:
@@ -0,0 +1,386 @@
+"""
+Streaming importers for common graph file formats: whitespace separated edge
+lists, Matrix Market coordinate files and GraphML.
+
+Files are read in chunks of 'chunk_size' edges, which are parsed and handed to
+the graph with 'Graph.connect_many', so memory beyond the graph itself stays
+bounded however big the file is. A 'progress' callback is called after every
+chunk with the bytes read, the size of the file (0 if unknown) and the edges
+imported so far.
+"""
+from __future__ import annotations
+from typing import BinaryIO, Callable, Iterator
+import itertools
+import os
+import warnings
+from xml.parsers import expat
+
+import numpy as np
+
+from graph.Graph import Graph
+
+type Progress = Callable[[int, int, int], None]
+
+DEFAULT_CHUNK_SIZE = 100_000
+
+def _file_size(file : BinaryIO) -> int:
+    try:
+        return os.fstat(file.fileno()).st_size
+    except (AttributeError, OSError):
+        return 0
+
+def _line_chunks(file : BinaryIO, chunk_size : int, comments : tuple[bytes, ...]) -> Iterator[list[bytes]]:
+    """Lists of up to 'chunk_size' lines, without comments. Blank lines are left to the parsers."""
+    while True:
+        lines = list(itertools.islice(file, chunk_size))
+        if not lines:
+            return
+        # Most chunks have no comments, and looking for them in the whole chunk at once is much faster
+        block = b"".join(lines)
+        if any(comment in block for comment in comments):
+            lines = [line for line in lines if not line.lstrip().startswith(comments)]
+        yield lines
+
+def _without_blank_lines(lines : list[bytes]) -> list[bytes]:
+    return [line for line in lines if line.strip()]
+
+def _line_error(message : str, line : bytes) -> ValueError:
+    return ValueError(f"{message}, got line {line.decode(errors='replace').strip()!r}")
+
+def _column_error(lines : list[bytes], n_columns : int, numeric : bool = False) -> ValueError:
+    """Error about the first line without 'n_columns' columns, or with a column that isn't a number"""
+    for line in _without_blank_lines(lines):
+        tokens = line.split()
+        if len(tokens) != n_columns:
+            return _line_error(f"Expected {n_columns} columns", line)
+        if numeric:
+            try:
+                [float(token) for token in tokens]
+            except ValueError:
+                return _line_error("Expected numbers", line)
+    return ValueError(f"Expected {n_columns} columns")
+
+# The bytes that bytes.split() splits on
+_WHITESPACE = np.zeros(256, dtype=bool)
+_WHITESPACE[list(b" \t\n\r\v\f")] = True
+
+def _tokens_per_line(block : bytes) -> np.ndarray:
+    """How many tokens every line of 'block' has, counted with NumPy for the whole block at once"""
+    chars = np.frombuffer(block, dtype=np.uint8)
+    space = _WHITESPACE[chars]
+    # A token starts at every non space after a space or at the start
+    starts = ~space
+    starts[1:] &= space[:-1]
+    line = np.cumsum(chars == ord("\n"))
+    return np.bincount(line[starts], minlength=int(line[-1]) + 1 if len(line) else 0)
+
+def _check_columns(block : bytes, lines : list[bytes], n_columns : int, numeric : bool = False) -> int:
+    """
+    Number of rows in 'block', the lines joined. Every line must have 'n_columns'
+    tokens or be blank, as a short and a long line would otherwise shift the columns.
+    """
+    counts = _tokens_per_line(block)
+    if np.any((counts != 0) & (counts != n_columns)):
+        raise _column_error(lines, n_columns, numeric)
+    return int(np.count_nonzero(counts))
+
+def _parse_columns(lines : list[bytes], n_columns : int) -> np.ndarray:
+    """The lines as an (n, columns) array of byte strings. Every line must have the same number of columns."""
+    block = b"".join(lines)
+    n_rows = _check_columns(block, lines, n_columns)
+    if n_rows == 0:
+        return np.empty((0, n_columns), dtype=bytes)
+    return np.array(block.split(), dtype=bytes).reshape(n_rows, n_columns)
+
+def _parse_numbers(lines : list[bytes], n_columns : int) -> np.ndarray:
+    """The lines as an (n, columns) float64 array, parsed by NumPy without splitting them in Python"""
+    block = b"".join(lines)
+    n_rows = _check_columns(block, lines, n_columns, numeric=True)
+    if n_rows == 0:
+        return np.empty((0, n_columns))
+    with warnings.catch_warnings():
+        # Text that isn't a number only warns, and the rest of the chunk would be lost
+        warnings.simplefilter("error", DeprecationWarning)
+        try:
+            numbers = np.fromstring(block, dtype=np.float64, sep=" ")
+        except (DeprecationWarning, ValueError):
+            numbers = None
+    if numbers is None or len(numbers) != n_rows * n_columns:
+        raise _column_error(lines, n_columns, numeric=True)
+    return numbers.reshape(n_rows, n_columns)
+
+def _whole(values : np.ndarray) -> np.ndarray:
+    return np.isfinite(values) & (values == np.trunc(values))
+
+def _ids(columns : np.ndarray, lines : list[bytes], n_ids : int = 2) -> list[np.ndarray]:
+    """The first 'n_ids' columns as int64. They must be whole numbers, which casting would truncate."""
+    ids = columns[:, :n_ids]
+    bad = np.flatnonzero(~_whole(ids).all(axis=1))
+    if len(bad):
+        raise _line_error("Expected whole numbers as vertices", _without_blank_lines(lines)[bad[0]])
+    return [ids[:, i].astype(np.int64) for i in range(n_ids)]
+
+def _weights(column : np.ndarray) -> list[float | int]:
+    """Weights that are whole numbers as ints, like the integer weights of the other formats, and the rest as floats"""
+    whole = _whole(column)
+    if whole.all():
+        return column.astype(np.int64).tolist()
+    return [int(w) if is_whole else w for w, is_whole in zip(column.tolist(), whole.tolist())]
+
+def _values(column : np.ndarray, value_type : type) -> list:
+    if value_type is int:
+        return column.astype(np.int64).tolist()
+    if value_type is str:
+        return [token.decode() for token in column.tolist()]
+    return [value_type(token.decode()) for token in column.tolist()]
+
+def _open(source : str | BinaryIO) -> tuple[BinaryIO, bool]:
+    if isinstance(source, str):
+        return open(source, "rb"), True
+    return source, False
+
+def import_edge_list(
+    source : str | BinaryIO,
+    graph : Graph = None,
+    directed : bool = True,
+    value_type : type = int,
+    chunk_size : int = DEFAULT_CHUNK_SIZE,
+    progress : Progress = None
+) -> Graph:
+    """
+    Reads 'source target [weight]' lines into 'graph', or a new Graph. Lines
+    starting with '#' or '%' are comments. Edges without a weight get 1, weights
+    that are whole numbers are ints, and undirected edges are added in both directions.
+    """
+    if graph is None:
+        graph = Graph()
+    file, owned = _open(source)
+    try:
+        total = _file_size(file)
+        n_columns = None
+        n_edges = 0
+        for lines in _line_chunks(file, chunk_size, (b"#", b"%")):
+            if n_columns is None:
+                lines = _without_blank_lines(lines)
+                if not lines:
+                    continue
+                n_columns = len(lines[0].split())
+                if n_columns not in (2, 3):
+                    raise ValueError(f"Edge lists have 2 or 3 columns, not {n_columns}")
+
+            if value_type is int:
+                # Exact for ids up to 2**53
+                columns = _parse_numbers(lines, n_columns)
+                sources, targets = (ids.tolist() for ids in _ids(columns, lines))
+                weights = _weights(columns[:, 2]) if n_columns == 3 else [1] * len(sources)
+            else:
+                columns = _parse_columns(lines, n_columns)
+                sources, targets = _values(columns[:, 0], value_type), _values(columns[:, 1], value_type)
+                if n_columns == 3:
+                    try:
+                        weights = _weights(columns[:, 2].astype(np.float64))
+                    except ValueError:
+                        raise _column_error(lines, n_columns, numeric=True) from None
+                else:
+                    weights = [1] * len(sources)
+            graph.connect_many(zip(sources, targets, weights))
+            if not directed:
+                graph.connect_many(zip(targets, sources, weights))
+
+            n_edges += len(sources)
+            if progress is not None:
+                progress(file.tell(), total, n_edges)
+    finally:
+        if owned:
+            file.close()
+    return graph
+
+def import_matrix_market(
+    source : str | BinaryIO,
+    graph : Graph = None,
+    chunk_size : int = DEFAULT_CHUNK_SIZE,
+    progress : Progress = None
+) -> Graph:
+    """
+    Reads a Matrix Market coordinate file into 'graph', or a new Graph, as the
+    adjacency matrix: entry (i, j) is an edge from vertex i to vertex j, with
+    1-based int vertices and every vertex of the matrix added. Pattern matrices
+    give edges of weight 1, and symmetric ones are added in both directions.
+    """
+    if graph is None:
+        graph = Graph()
+    file, owned = _open(source)
+    try:
+        total = _file_size(file)
+        header = file.readline().split()
+        if len(header) != 5 or header[0].lower() != b"%%matrixmarket" or header[1].lower() != b"matrix":
+            raise ValueError("Not a Matrix Market matrix file")
+        layout, field, symmetry = (h.decode().lower() for h in header[2:])
+        if layout != "coordinate":
+            raise ValueError(f"Only coordinate Matrix Market files can be read as graphs, not '{layout}'")
+        if field not in ("real", "integer", "pattern"):
+            raise ValueError(f"Unsupported Matrix Market field '{field}'")
+        if symmetry not in ("general", "symmetric", "skew-symmetric"):
+            raise ValueError(f"Unsupported Matrix Market symmetry '{symmetry}'")
+
+        size = file.readline()
+        while size.startswith(b"%") or not size.strip():
+            size = file.readline()
+            if not size:
+                raise ValueError("Missing Matrix Market size line")
+        n_rows, n_columns, n_entries = (int(token) for token in size.split())
+        graph.add_many(range(1, max(n_rows, n_columns) + 1))
+
+        n_edges = 0
+        for lines in _line_chunks(file, chunk_size, (b"%",)):
+            if not lines:
+                continue
+            columns = _parse_numbers(lines, 2 if field == "pattern" else 3)
+            rows, cols = _ids(columns, lines)
+            outside = np.flatnonzero((rows < 1) | (rows > n_rows) | (cols < 1) | (cols > n_columns))
+            if len(outside):
+                raise _line_error(f"Expected entries of a {n_rows} x {n_columns} matrix", _without_blank_lines(lines)[outside[0]])
+            rows, cols = rows.tolist(), cols.tolist()
+            if field == "pattern":
+                weights = [1] * len(rows)
+            elif field == "integer":
+                bad = np.flatnonzero(~_whole(columns[:, 2]))
+                if len(bad):
+                    raise _line_error("Expected integer values", _without_blank_lines(lines)[bad[0]])
+                weights = columns[:, 2].astype(np.int64).tolist()
+            else:
+                weights = columns[:, 2].tolist()
+
+            graph.connect_many(zip(rows, cols, weights))
+            if symmetry != "general":
+                if symmetry == "skew-symmetric":
+                    weights = [-w for w in weights]
+                graph.connect_many((j, i, w) for i, j, w in zip(rows, cols, weights) if i != j)
+
+            n_edges += len(rows)
+            if progress is not None:
+                progress(file.tell(), total, n_edges)
+
+        if n_edges != n_entries:
+            raise ValueError(f"Matrix Market file has {n_edges} entries, its size line says {n_entries}")
+    finally:
+        if owned:
+            file.close()
+    return graph
+
+# Bytes handed to the XML parser at once
+_GRAPHML_BLOCK_SIZE = 1 << 20
+
+def _local_name(tag : str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+def import_graphml(
+    source : str | BinaryIO,
+    graph : Graph = None,
+    weight_attribute : str = "weight",
+    chunk_size : int = DEFAULT_CHUNK_SIZE,
+    progress : Progress = None
+) -> Graph:
+    """
+    Reads the nodes and edges of a GraphML file into 'graph', or a new Graph,
+    with the node ids (strings) as vertices. Edge weights are read from the data
+    key whose 'attr.name' is 'weight_attribute'. Edges without that data get
+    the key's <default>, or 1 without one.
+    Undirected edges are added in both directions.
+
+    The file is parsed with expat a block at a time, without building a tree,
+    so only the current chunk of nodes and edges is in memory.
+    """
+    if graph is None:
+        graph = Graph()
+    file, owned = _open(source)
+    try:
+        total = _file_size(file)
+        weight_key : str = None
+        weight_type : type = float
+        weight_default : float = 1
+        edge_default_directed = True
+        vertices : list[str] = []
+        edges : list[tuple[str, str, float]] = []
+        undirected : list[tuple[str, str, float]] = []
+        n_edges = 0
+
+        # Edge being read, and the text of its weight or of the weight key's default
+        edge : list = None
+        edge_directed = True
+        weight_text : list[str] = None
+        in_weight_key = False
+
+        def start_element(tag : str, attributes : dict[str, str]):
+            nonlocal weight_key, weight_type, edge_default_directed, edge, edge_directed, weight_text, in_weight_key
+            name = _local_name(tag)
+            if name == "node":
+                vertices.append(attributes["id"])
+            elif name == "edge":
+                edge = [attributes["source"], attributes["target"], weight_default]
+                directed = attributes.get("directed")
+                edge_directed = edge_default_directed if directed is None else directed == "true"
+            elif name == "data":
+                if edge is not None and weight_key is not None and attributes.get("key") == weight_key:
+                    weight_text = []
+            elif name == "key":
+                if attributes.get("attr.name") == weight_attribute and attributes.get("for", "all") in ("edge", "all"):
+                    weight_key = attributes.get("id")
+                    weight_type = int if attributes.get("attr.type") in ("int", "long") else float
+                    in_weight_key = True
+            elif name == "default":
+                if in_weight_key:
+                    weight_text = []
+            elif name == "graph":
+                edge_default_directed = attributes.get("edgedefault", "directed") == "directed"
+
+        def end_element(tag : str):
+            nonlocal edge, weight_text, weight_default, in_weight_key
+            name = _local_name(tag)
+            if name == "edge":
+                edge = tuple(edge)
+                edges.append(edge)
+                if not edge_directed:
+                    undirected.append(edge)
+                edge = None
+            elif name == "data" and weight_text is not None:
+                text = "".join(weight_text).strip()
+                if text:
+                    edge[2] = weight_type(text)
+                weight_text = None
+            elif name == "default" and weight_text is not None:
+                text = "".join(weight_text).strip()
+                if text:
+                    weight_default = weight_type(text)
+                weight_text = None
+            elif name == "key":
+                in_weight_key = False
+
+        def character_data(text : str):
+            if weight_text is not None:
+                weight_text.append(text)
+
+        parser = expat.ParserCreate(namespace_separator="}")
+        parser.StartElementHandler = start_element
+        parser.EndElementHandler = end_element
+        parser.CharacterDataHandler = character_data
+
+        while True:
+            block = file.read(_GRAPHML_BLOCK_SIZE)
+            parser.Parse(block, not block)
+            if len(vertices) + len(edges) >= chunk_size or not block:
+                graph.add_many(vertices)
+                graph.connect_many(edges)
+                graph.connect_many((t, s, w) for s, t, w in undirected)
+                n_edges += len(edges)
+                vertices.clear()
+                edges.clear()
+                undirected.clear()
+                if progress is not None:
+                    progress(file.tell(), total, n_edges)
+            if not block:
+                break
+    finally:
+        if owned:
+            file.close()
+    return graph
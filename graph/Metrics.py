@@ -0,0 +1,123 @@
+from __future__ import annotations
+from bisect import bisect_left
+from contextlib import contextmanager
+import json
+import threading
+import time
+
+type Labels = tuple[tuple[str, str], ...]
+
+class Metrics:
+    """
+    Registry of counters and timing histograms.
+
+    Anything instrumented takes an optional 'Metrics' and does nothing when it
+    is None, so metrics cost a single check when they are disabled.
+    """
+    DEFAULT_BUCKETS = (0.00001, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+    def __init__(self, buckets : tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.__buckets = tuple(sorted(buckets))
+        self.__counters : dict[str, dict[Labels, float]] = {}
+        # Every histogram stores its bucket counts followed by the sum and the count of observations
+        self.__histograms : dict[str, dict[Labels, list[float]]] = {}
+        self.__lock = threading.Lock()
+
+    @property
+    def buckets(self) -> tuple[float, ...]:
+        return self.__buckets
+
+    def increment(self, name : str, amount : float = 1, **labels : str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self.__lock:
+            series = self.__counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name : str, value : float, **labels : str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self.__lock:
+            series = self.__histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = [0] * (len(self.__buckets) + 2)
+                series[key] = histogram
+
+            # Buckets are stored non cumulative, the last bucket is +Inf
+            histogram[bisect_left(self.__buckets, value)] += 1
+            histogram[-2] += value
+            histogram[-1] += 1
+
+    @contextmanager
+    def timer(self, name : str, **labels : str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def reset(self) -> None:
+        with self.__lock:
+            self.__counters.clear()
+            self.__histograms.clear()
+
+    def snapshot(self) -> dict:
+        """Returns a JSON serializable copy of every counter and histogram."""
+        with self.__lock:
+            counters = {name : [{"labels" : dict(key), "value" : value} for key, value in series.items()]
+                        for name, series in self.__counters.items()}
+
+            histograms = {}
+            for name, series in self.__histograms.items():
+                histograms[name] = []
+                for key, histogram in series.items():
+                    cumulative = 0
+                    buckets = []
+                    for bound, count in zip(self.__buckets + (float("inf"),), histogram[:-2]):
+                        cumulative += count
+                        buckets.append({"le" : bound, "count" : cumulative})
+                    histograms[name].append({"labels" : dict(key), "buckets" : buckets,
+                                             "sum" : histogram[-2], "count" : histogram[-1]})
+
+        return {"counters" : counters, "histograms" : histograms}
+
+    def to_json(self) -> str:
+        # json writes +Inf as 'Infinity'
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition format."""
+        def format_labels(labels : dict[str, str], **extra : str) -> str:
+            labels = labels | extra
+            if not labels:
+                return ""
+            return "{" + ",".join(f'{k}="{v}"' for k, v in labels.items()) + "}"
+
+        snapshot = self.snapshot()
+        lines = []
+        for name, series in snapshot["counters"].items():
+            lines.append(f"# TYPE {name} counter")
+            for sample in series:
+                lines.append(f"{name}{format_labels(sample['labels'])} {sample['value']}")
+
+        for name, series in snapshot["histograms"].items():
+            lines.append(f"# TYPE {name} histogram")
+            for sample in series:
+                for bucket in sample["buckets"]:
+                    le = "+Inf" if bucket["le"] == float("inf") else repr(bucket["le"])
+                    lines.append(f"{name}_bucket{format_labels(sample['labels'], le=le)} {bucket['count']}")
+                lines.append(f"{name}_sum{format_labels(sample['labels'])} {sample['sum']}")
+                lines.append(f"{name}_count{format_labels(sample['labels'])} {sample['count']}")
+
+        return "\n".join(lines) + "\n"
+
+    def export(self, filename : str, format : str = "json") -> None:
+        """Writes the current snapshot to a file, either as 'json' or 'prometheus' text."""
+        if format == "json":
+            text = self.to_json()
+        elif format == "prometheus":
+            text = self.to_prometheus()
+        else:
+            raise ValueError(f"Unknown metrics format '{format}'")
+
+        with open(filename, "w") as file:
+            file.write(text)
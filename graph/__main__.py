@@ -0,0 +1,166 @@
+"""
+Headless analysis of graph files, with the results printed as JSON.
+
+    python -m graph FILE [options] info
+    python -m graph FILE [options] components
+    python -m graph FILE [options] cut-vertices
+    python -m graph FILE [options] path SOURCE TARGET [--method METHOD]
+    python -m graph FILE [options] distances SOURCE
+    python -m graph FILE [options] degrees
+
+The format comes from the extension: '.graph' (visualizer.GraphFile), '.mtx'
+(Matrix Market), '.graphml', '.json' (an object of source -> {target : weight})
+and anything else as an edge list. FILE can be '-' to read an edge list from
+standard input.
+
+Only the graph core is imported up front. The readers are imported when their
+format is used, and pygame never is, so the tool starts fast enough to run
+once per line of a shell pipeline. See 'benchmarks/CliStartup.py'.
+"""
+import argparse
+import json
+import sys
+import time
+
+from graph.Graph import Graph
+
+FORMATS = ("auto", "edgelist", "mtx", "graphml", "graph", "json")
+PATH_METHODS = ("auto", "astar", "bidirectional", "dijkstra")
+
+def _format(filename : str) -> str:
+    extension = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+    return {"graph" : "graph", "mtx" : "mtx", "graphml" : "graphml", "json" : "json"}.get(extension, "edgelist")
+
+def load(filename : str, format : str = "auto", undirected : bool = False, string_ids : bool = False) -> Graph:
+    """Reads 'filename', '-' being an edge list on standard input. 'undirected' and 'string_ids' only apply to edge lists."""
+    if format == "auto":
+        format = "edgelist" if filename == "-" else _format(filename)
+
+    if format == "json":
+        with sys.stdin if filename == "-" else open(filename) as file:
+            data = json.load(file)
+        if not isinstance(data, dict) or not all(isinstance(neighbors, dict) for neighbors in data.values()):
+            raise ValueError("JSON graphs are an object of source -> {target : weight}")
+        # Targets that are never a source are vertices too
+        graph = Graph()
+        graph.add_many(data)
+        graph.connect_many((source, target, weight) for source, neighbors in data.items() for target, weight in neighbors.items())
+        return graph
+    if format == "graph":
+        from visualizer.GraphFile import load_graph
+        return load_graph(filename, nodes=False)
+
+    import graph.Importers
+    if format == "mtx":
+        return graph.Importers.import_matrix_market(filename)
+    if format == "graphml":
+        return graph.Importers.import_graphml(filename)
+    source = sys.stdin.buffer if filename == "-" else filename
+    return graph.Importers.import_edge_list(source, directed=not undirected, value_type=str if string_ids else int)
+
+def _vertex(graph : Graph, text : str):
+    """The vertex written as 'text', which is an int in graphs with int vertices"""
+    try:
+        if graph.contains(int(text)):
+            return int(text)
+    except ValueError:
+        pass
+    if graph.contains(text):
+        return text
+    raise SystemExit(f"There is no vertex {text} in the graph")
+
+def _n_edges(graph : Graph) -> int:
+    return sum(len(graph.adjacent_vertices(v)) for v in graph.vertices)
+
+def _summary(values : list[int]) -> dict[str, float]:
+    if not values:
+        return {"min" : 0, "max" : 0, "mean" : 0, "median" : 0}
+    values = sorted(values)
+    middle = len(values) // 2
+    median = values[middle] if len(values) % 2 else (values[middle - 1] + values[middle]) / 2
+    return {"min" : values[0], "max" : values[-1], "mean" : sum(values) / len(values), "median" : median}
+
+def info(graph : Graph, args : argparse.Namespace) -> dict:
+    return {"vertices" : len(graph.vertices), "edges" : _n_edges(graph), "directed" : graph.is_directed}
+
+def components(graph : Graph, args : argparse.Namespace) -> dict:
+    """Strongly connected components if the graph is directed, biggest first"""
+    found = sorted(graph.connected_components, key=len, reverse=True)
+    return {"directed" : graph.is_directed, "components" : found}
+
+def cut_vertices(graph : Graph, args : argparse.Namespace) -> dict:
+    """Strong articulation points if the graph is directed"""
+    return {"directed" : graph.is_directed, "cut_vertices" : sorted(graph.cut_vertices, key=str)}
+
+def path(graph : Graph, args : argparse.Namespace) -> dict:
+    source, target = _vertex(graph, args.source), _vertex(graph, args.target)
+    try:
+        found = graph.path(source, target, args.method)
+    except ValueError as error:
+        raise SystemExit(str(error))
+    distance = sum(graph.get_connection_weight(a, b) for a, b in zip(found, found[1:]))
+    return {"path" : found, "distance" : distance if found else None}
+
+def distances(graph : Graph, args : argparse.Namespace) -> dict:
+    """Distance to every vertex reachable from the source"""
+    found, _ = graph.dijkstra(_vertex(graph, args.source))
+    return {"distances" : [[v, d] for v, d in found.items() if d != float("inf")]}
+
+def degrees(graph : Graph, args : argparse.Namespace) -> dict:
+    vertices = graph.vertices
+    out_degrees = [len(graph.adjacent_vertices(v)) for v in vertices]
+    in_degrees = dict.fromkeys(vertices, 0)
+    for v in vertices:
+        for u in graph.adjacent_vertices(v):
+            in_degrees[u] += 1
+
+    histogram : dict[int, int] = {}
+    for d in out_degrees:
+        histogram[d] = histogram.get(d, 0) + 1
+    return {"out" : _summary(out_degrees), "in" : _summary(list(in_degrees.values())),
+            "out_histogram" : sorted(histogram.items())}
+
+def parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m graph", description="Analyses a graph file and prints the result as JSON.")
+    parser.add_argument("file", help="graph file, or '-' for an edge list on standard input")
+    parser.add_argument("--format", choices=FORMATS, default="auto", help="file format, from the extension by default")
+    parser.add_argument("--undirected", action="store_true", help="add the edges of edge lists in both directions")
+    parser.add_argument("--string-ids", action="store_true", help="read the vertices of edge lists as strings instead of ints")
+    parser.add_argument("--indent", type=int, default=None, help="indent the JSON output")
+    parser.add_argument("--timing", action="store_true", help="print the load and analysis times to standard error")
+
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("info", help="vertex and edge counts").set_defaults(run=info)
+    commands.add_parser("components", help="(strongly) connected components").set_defaults(run=components)
+    commands.add_parser("cut-vertices", help="cut vertices, or strong articulation points if directed").set_defaults(run=cut_vertices)
+    path_parser = commands.add_parser("path", help="shortest path between two vertices")
+    path_parser.add_argument("source")
+    path_parser.add_argument("target")
+    path_parser.add_argument("--method", choices=PATH_METHODS, default="auto",
+                             help="search, bidirectional Dijkstra by default (see Graph.path)")
+    path_parser.set_defaults(run=path)
+    distances_parser = commands.add_parser("distances", help="shortest distances from a vertex")
+    distances_parser.add_argument("source")
+    distances_parser.set_defaults(run=distances)
+    commands.add_parser("degrees", help="in and out degree statistics").set_defaults(run=degrees)
+    return parser
+
+def main(argv : list[str] = None) -> None:
+    args = parser().parse_args(argv)
+
+    start = time.perf_counter()
+    try:
+        graph = load(args.file, args.format, args.undirected, args.string_ids)
+    except (OSError, ValueError) as error:
+        raise SystemExit(f"Can't read {args.file}: {error}")
+    loaded = time.perf_counter()
+    result = args.run(graph, args)
+    analyzed = time.perf_counter()
+
+    json.dump(result, sys.stdout, indent=args.indent)
+    sys.stdout.write("\n")
+    if args.timing:
+        print(f"load {loaded - start:.3f}s, {args.command} {analyzed - loaded:.3f}s", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
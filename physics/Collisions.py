@@ -1,3 +1,5 @@
+import numpy as np
+
 from visualizer.Vector2 import Vector2
 
 def orientation(a : Vector2, b : Vector2, c : Vector2):
@@ -24,7 +26,22 @@ def lines_intersect(p1 : Vector2, q1 : Vector2, p2 : Vector2, q2 : Vector2):
     else:
         return False
 
+def segments_intersect_many(p : tuple[float, float], q : tuple[float, float], starts : np.ndarray, ends : np.ndarray) -> np.ndarray:
+    """
+    lines_intersect of the segment pq with many segments at once, given as (n, 2)
+    arrays of their start and end points. Returns a boolean array.
+    """
+    (px, py), (qx, qy) = p, q
+    sx, sy = starts[:, 0], starts[:, 1]
+    ex, ey = ends[:, 0], ends[:, 1]
+    
+    o1 = (qx - px) * (sy - py) - (qy - py) * (sx - px) > 0
+    o2 = (qx - px) * (ey - py) - (qy - py) * (ex - px) > 0
+    o3 = (ex - sx) * (py - sy) - (ey - sy) * (px - sx) > 0
+    o4 = (ex - sx) * (qy - sy) - (ey - sy) * (qx - sx) > 0
+    return (o1 != o2) & (o3 != o4)
+
 def distance_btwn_points_sq(p1 : Vector2, p2 : Vector2):
     dx = p1.x - p2.x
     dy = p1.y - p2.y
-    return dx**2 + dy**2
\ No newline at end of file
+    return dx*dx + dy*dy
\ No newline at end of file
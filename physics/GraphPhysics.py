@@ -1,22 +1,48 @@
+import math
+
+import numpy as np
+
 from graph.Graph import Graph
 from visualizer.Node import Node
 from visualizer.Input import Input
 from visualizer.Camera import Camera
+from visualizer.Vector2 import Vector2
+import visualizer.NodeStore
+
+def apply_node_forces(graph : Graph[Node], input : Input, camera : Camera, selected_node : Node, delta_time : float) -> float:
+    """Moves every node one step, the selected one towards the mouse while it is dragged. See 'step'."""
+    selected_target = None
+    if input.is_long_pressed(1) and selected_node is not None:
+        selected_target = camera.screen_to_world(input.mouse_pos)
+    
+    return step(graph, delta_time, selected_node, selected_target)
 
-def apply_node_forces(graph : Graph[Node], input : Input, camera : Camera, selected_node : Node, delta_time : float):
+def step(graph : Graph[Node], delta_time : float, selected_node : Node = None, selected_target : Vector2 = None) -> float:
+    """
+    Moves every node one step, and 'selected_node' towards 'selected_target' if there is one.
+    Returns the largest distance a node moved, to tell when the layout settles.
+    """
     spring_length = 100
     spring_force = 0.7
     repulsion_strength = 25
     follow_mouse_strenght = 3
     follow_mouse_max_distance = 50
     
-    for n1 in graph.vertices:
-        # The node we select will move towards the mouse
-        if input.is_long_pressed(1) and selected_node == n1:            
-            world_mouse_pos = camera.screen_to_world(input.mouse_pos)
-            
-            diff = world_mouse_pos - n1.pos
-            dist = diff.magnitude
+    vertices = graph.vertices
+    index = {v : i for i, v in enumerate(vertices)}
+    start_positions = visualizer.NodeStore.positions_of(vertices)
+    
+    # Plain floats in lists instead of vectors or the store: this runs for every
+    # pair of nodes. The positions are written back to the store at the end.
+    xs, ys = start_positions[:, 0].tolist(), start_positions[:, 1].tolist()
+    n_vertices = len(vertices)
+    for i, n1 in enumerate(vertices):
+        x1, y1 = xs[i], ys[i]
+        
+        # The node we select will move towards its target (the mouse)
+        if selected_target is not None and selected_node == n1:
+            dx, dy = selected_target.x - x1, selected_target.y - y1
+            dist = math.sqrt(dx*dx + dy*dy)
             
             force = dist * follow_mouse_strenght
             
@@ -26,33 +52,57 @@ def apply_node_forces(graph : Graph[Node], input : Input, camera : Camera, selec
             
             force = min(force, 1000)
             if dist > 0:
-                force_vector = force * diff / dist
-                n1.pos += force_vector * delta_time
+                x1 += force * dx / dist * delta_time
+                y1 += force * dy / dist * delta_time
         
         # Connected nodes attract each other
         for n2 in graph.adjacent_vertices(n1):
-            diff = n2.pos - n1.pos
-            dist = diff.magnitude
+            j = index[n2]
+            if j == i:
+                continue
+            dx, dy = xs[j] - x1, ys[j] - y1
+            dist = math.sqrt(dx*dx + dy*dy)
             
-            force = (diff.magnitude - spring_length) * spring_force / 2 # Spring force
-            force = min(force, 1000)
-            
-            if diff.magnitude > spring_length:
-                force_vector = force * diff / diff.magnitude
+            if dist > spring_length:
+                force = (dist - spring_length) * spring_force / 2 # Spring force
+                force = min(force, 1000)
+                fx = force * dx / dist * delta_time
+                fy = force * dy / dist * delta_time
                 
-                n1.pos += force_vector * delta_time
-                n2.pos -= force_vector * delta_time
+                x1 += fx
+                y1 += fy
+                xs[j] -= fx
+                ys[j] -= fy
                 
-        for n2 in graph.vertices:
-            diff = n2.pos - n1.pos
-            dist = diff.magnitude
+        for j in range(n_vertices):
+            if j == i:
+                continue
+            dx, dy = xs[j] - x1, ys[j] - y1
+            dist = math.sqrt(dx*dx + dy*dy)
 
             # Repulsion between all nodes            
             if dist > 0 and dist < 200:  # Only apply repulsion within a certain range
                 force = 1000 * repulsion_strength / (dist * dist) # Repulsion force
                 force = min(force, 1000)
                 
-                force_vector = - force * diff / dist
+                fx = -force * dx / dist * delta_time
+                fy = -force * dy / dist * delta_time
                 
-                n1.pos += force_vector * delta_time
-                n2.pos -= force_vector * delta_time
\ No newline at end of file
+                x1 += fx
+                y1 += fy
+                xs[j] -= fx
+                ys[j] -= fy
+        
+        xs[i], ys[i] = x1, y1
+    
+    positions = np.column_stack((xs, ys)).reshape(-1, 2)
+    # Pinned nodes push and pull the others but stay in place, unless dragged
+    pinned = visualizer.NodeStore.pinned_of(vertices)
+    if selected_target is not None and selected_node in index:
+        pinned[index[selected_node]] = False
+    positions[pinned] = start_positions[pinned]
+    visualizer.NodeStore.set_positions(vertices, positions)
+    
+    if n_vertices == 0:
+        return 0.0
+    return float(np.hypot(*(positions - start_positions).T).max())
@@ -0,0 +1,238 @@
+"""
+Initial placement of the nodes before the force simulation starts.
+
+A random scatter leaves the simulation to untangle every crossing, which takes
+most of its steps. These strategies compute a layout that is already close to
+the final one, from the graph alone:
+
+    random      uniform in a square box, what the loaders do
+    spectral    the Laplacian's two lowest nontrivial eigenvectors
+    pivot_mds   classical scaling of the BFS distances to a few pivot nodes
+
+Edges are taken as undirected and unweighted. Each connected component is laid
+out on its own, scaled so its edges are about 'spring_length' long, and the
+components are then packed in rows.
+"""
+from typing import Callable
+
+import numpy as np
+
+from graph.Graph import Graph
+from visualizer.Node import Node
+import visualizer.NodeStore
+
+# Components up to this size get a dense eigendecomposition, bigger ones an iterative solver
+DENSE_SPECTRAL_LIMIT = 1000
+
+def _csr(graph : Graph) -> tuple[np.ndarray, np.ndarray]:
+    """Symmetric adjacency of the graph, without self loops or repeated edges, in CSR form"""
+    vertices = graph.vertices
+    index = {v : i for i, v in enumerate(vertices)}
+    n = len(vertices)
+
+    sources : list[int] = []
+    targets : list[int] = []
+    for i, v in enumerate(vertices):
+        neighbors = [index[u] for u in graph.adjacent_vertices(v)]
+        sources.extend([i] * len(neighbors))
+        targets.extend(neighbors)
+
+    sources = np.array(sources, dtype=np.int64)
+    targets = np.array(targets, dtype=np.int64)
+    keys = np.concatenate((sources * n + targets, targets * n + sources))
+    keys = np.unique(keys[keys // n != keys % n])
+
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys // n, minlength=n), out=indptr[1:])
+    return indptr, keys % n
+
+def _neighbors(indptr : np.ndarray, indices : np.ndarray, frontier : np.ndarray) -> np.ndarray:
+    """Neighbors of every vertex in 'frontier', concatenated"""
+    starts, ends = indptr[frontier], indptr[frontier + 1]
+    counts = ends - starts
+    offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+    return indices[offsets + np.arange(counts.sum())]
+
+def _bfs(indptr : np.ndarray, indices : np.ndarray, source : int) -> np.ndarray:
+    """Hops from 'source' to every vertex, -1 for the unreachable ones"""
+    distances = np.full(len(indptr) - 1, -1, dtype=np.int64)
+    distances[source] = 0
+    frontier = np.array([source])
+    depth = 0
+    while len(frontier):
+        depth += 1
+        frontier = _neighbors(indptr, indices, frontier)
+        frontier = np.unique(frontier[distances[frontier] < 0])
+        distances[frontier] = depth
+    return distances
+
+def _components(indptr : np.ndarray, indices : np.ndarray) -> list[np.ndarray]:
+    degrees = np.diff(indptr)
+    components = [np.array([i]) for i in np.flatnonzero(degrees == 0)]
+    labeled = degrees == 0
+    for seed in np.flatnonzero(degrees):
+        if not labeled[seed]:
+            component = np.flatnonzero(_bfs(indptr, indices, seed) >= 0)
+            labeled[component] = True
+            components.append(component)
+    return components
+
+def _subgraph(indptr : np.ndarray, indices : np.ndarray, component : np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """CSR adjacency of a connected component, with its vertices renumbered in order"""
+    local = np.empty(len(indptr) - 1, dtype=np.int64)
+    local[component] = np.arange(len(component))
+    sub_indptr = np.zeros(len(component) + 1, dtype=np.int64)
+    np.cumsum(indptr[component + 1] - indptr[component], out=sub_indptr[1:])
+    return sub_indptr, local[_neighbors(indptr, indices, component)]
+
+def _pivot_mds(indptr : np.ndarray, indices : np.ndarray, rng : np.random.Generator, n_pivots : int = 50) -> np.ndarray:
+    """
+    Pivot MDS (Brandes & Pich) of a connected graph: the BFS distances to
+    'n_pivots' pivots, picked farthest first, double centered and projected
+    on their two main axes.
+    """
+    n = len(indptr) - 1
+    k = min(n_pivots, n)
+    distances = np.empty((n, k))
+    nearest_pivot = np.full(n, np.inf)
+    pivot = int(rng.integers(n))
+    for p in range(k):
+        distances[:, p] = _bfs(indptr, indices, pivot)
+        np.minimum(nearest_pivot, distances[:, p], out=nearest_pivot)
+        pivot = int(nearest_pivot.argmax())
+
+    squared = distances * distances
+    centered = -0.5 * (squared - squared.mean(axis=0) - squared.mean(axis=1)[:, None] + squared.mean())
+    # The main axes of the n x k matrix come from the small k x k one
+    _, vectors = np.linalg.eigh(centered.T @ centered)
+    return centered @ vectors[:, ::-1][:, :2]
+
+def _d_orthonormalize(x : np.ndarray, degrees : np.ndarray) -> np.ndarray:
+    """Makes the columns of 'x' orthonormal, and orthogonal to the constant vector, in the degree weighted inner product"""
+    total = degrees.sum()
+    for c in range(x.shape[1]):
+        column = x[:, c] - (degrees @ x[:, c]) / total
+        for previous in range(c):
+            column -= (degrees * column) @ x[:, previous] * x[:, previous]
+        norm = np.sqrt((degrees * column) @ column)
+        x[:, c] = column / norm if norm > 0 else column
+    return x
+
+def _spectral(indptr : np.ndarray, indices : np.ndarray, rng : np.random.Generator,
+              max_iterations : int = 2000, tolerance : float = 1e-7) -> np.ndarray:
+    """
+    Degree normalized spectral layout (Koren) of a connected graph: the
+    generalized eigenvectors L x = l D x of the two smallest nonzero
+    eigenvalues.
+
+    Small graphs solve the dense problem. Big ones run power iteration on
+    (I + D^-1 A) / 2 with the adjacency kept sparse, starting from the pivot
+    MDS layout, which is already close to the solution.
+    """
+    n = len(indptr) - 1
+    degrees = np.diff(indptr).astype(np.float64)
+    rows = np.repeat(np.arange(n), np.diff(indptr))
+
+    if n <= DENSE_SPECTRAL_LIMIT:
+        adjacency = np.zeros((n, n))
+        adjacency[rows, indices] = 1
+        scale = 1 / np.sqrt(degrees)
+        normalized = np.eye(n) - scale[:, None] * adjacency * scale[None, :]
+        _, vectors = np.linalg.eigh(normalized)
+        return scale[:, None] * vectors[:, 1:3]
+
+    x = _d_orthonormalize(_pivot_mds(indptr, indices, rng), degrees)
+    for _ in range(max_iterations):
+        previous = x
+        walked = np.column_stack([np.bincount(rows, weights=x[indices, c], minlength=n) for c in range(2)])
+        x = _d_orthonormalize(0.5 * (x + walked / degrees[:, None]), degrees)
+        # Converged once the vectors stop turning
+        if np.all(np.abs(((degrees[:, None] * x) * previous).sum(axis=0)) > 1 - tolerance):
+            break
+    return x
+
+def _normalized(positions : np.ndarray, indptr : np.ndarray, indices : np.ndarray, spring_length : float,
+                rng : np.random.Generator) -> np.ndarray:
+    """Centers the layout and scales it so the mean edge length is 'spring_length'"""
+    positions = positions - positions.mean(axis=0)
+    rows = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+    lengths = np.hypot(*(positions[rows] - positions[indices]).T)
+    mean_length = lengths.mean() if len(lengths) else 0
+    if mean_length > 0:
+        positions *= spring_length / mean_length
+    # Nodes with the same neighbors get the same coordinates, and the physics can't push apart nodes at the same spot
+    return positions + rng.normal(scale=spring_length * 0.01, size=positions.shape)
+
+def _packed(layouts : list[np.ndarray], spacing : float) -> list[np.ndarray]:
+    """Moves the component layouts into rows, biggest first, so they don't overlap"""
+    sizes = [np.ptp(layout, axis=0) if len(layout) else np.zeros(2) for layout in layouts]
+    row_width = max(np.sqrt(sum((w + spacing) * (h + spacing) for w, h in sizes)), max(w for w, _ in sizes))
+
+    packed : list[np.ndarray] = [None] * len(layouts)
+    x = y = row_height = 0.0
+    for i in sorted(range(len(layouts)), key=lambda i : -len(layouts[i])):
+        width, height = sizes[i]
+        if x > 0 and x + width > row_width:
+            x, y, row_height = 0.0, y + row_height + spacing, 0.0
+        packed[i] = layouts[i] - layouts[i].min(axis=0) + (x, y)
+        x += width + spacing
+        row_height = max(row_height, height)
+    return packed
+
+def _component_placement(graph : Graph, layout : Callable[[np.ndarray, np.ndarray, np.random.Generator], np.ndarray],
+                         spring_length : float, seed : int | None) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    indptr, indices = _csr(graph)
+    components = _components(indptr, indices)
+
+    layouts = []
+    for component in components:
+        if len(component) <= 2:
+            layouts.append(np.array([[0.0, 0.0], [spring_length, 0.0]])[:len(component)])
+            continue
+        sub_indptr, sub_indices = _subgraph(indptr, indices, component)
+        layouts.append(_normalized(layout(sub_indptr, sub_indices, rng), sub_indptr, sub_indices, spring_length, rng))
+
+    positions = np.zeros((len(graph.vertices), 2))
+    for component, packed in zip(components, _packed(layouts, spring_length)):
+        positions[component] = packed
+    return positions - positions.mean(axis=0) if len(positions) else positions
+
+def random_placement(graph : Graph, spring_length : float = 100, seed : int = None, size : float = 300) -> np.ndarray:
+    """Uniform in a 'size' square centered at the origin"""
+    rng = np.random.default_rng(seed)
+    return (rng.random((len(graph.vertices), 2)) - 0.5) * size
+
+def spectral_placement(graph : Graph, spring_length : float = 100, seed : int = None) -> np.ndarray:
+    """Spectral layout, see '_spectral'. Rows are in the order of 'graph.vertices'."""
+    return _component_placement(graph, _spectral, spring_length, seed)
+
+def pivot_mds_placement(graph : Graph, spring_length : float = 100, seed : int = None) -> np.ndarray:
+    """Pivot MDS layout of the BFS distances, see '_pivot_mds'. Rows are in the order of 'graph.vertices'."""
+    return _component_placement(graph, _pivot_mds, spring_length, seed)
+
+type Placement = Callable[..., np.ndarray]
+
+PLACEMENTS : dict[str, Placement] = {
+    "random" : random_placement,
+    "spectral" : spectral_placement,
+    "pivot_mds" : pivot_mds_placement,
+}
+
+def place(graph : Graph[Node], strategy : str = "spectral", spring_length : float = 100, seed : int = None,
+          center : tuple[float, float] = None) -> Graph[Node]:
+    """
+    Moves the nodes of 'graph' to the layout of one of the PLACEMENTS, centered
+    at 'center' or where the nodes are now.
+    """
+    if strategy not in PLACEMENTS:
+        raise ValueError(f"Unknown placement '{strategy}', expected one of {', '.join(PLACEMENTS)}")
+    vertices = graph.vertices
+    if not vertices:
+        return graph
+
+    if center is None:
+        center = visualizer.NodeStore.positions_of(vertices).mean(axis=0)
+    positions = PLACEMENTS[strategy](graph, spring_length=spring_length, seed=seed)
+    visualizer.NodeStore.set_positions(vertices, positions + center)
+    return graph
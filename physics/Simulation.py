@@ -0,0 +1,177 @@
+from queue import Empty, SimpleQueue
+from typing import Callable
+import threading
+import time
+
+import numpy as np
+
+from graph.Graph import Graph
+from graph.Metrics import Metrics
+from visualizer.Node import Node
+from visualizer.Vector2 import Vector2
+import visualizer.NodeStore
+import physics.GraphPhysics
+
+type Command = Callable[[Graph[Node]], None]
+
+class Snapshot:
+    """Node positions after a simulation tick, as an (n, 2) array in the order of 'vertices'."""
+    def __init__(self, tick : int, time : float, version : int, vertices : tuple[Node, ...], positions : np.ndarray, settled : bool) -> None:
+        self.tick = tick
+        self.time = time
+        self.version = version
+        self.vertices = vertices
+        self.positions = positions
+        self.settled = settled
+
+class Simulation:
+    """
+    Runs the physics of a graph on its own thread, at a fixed tick rate and with
+    a fixed timestep, so slow frames don't slow the simulation and a slow tick
+    doesn't drop frames.
+
+    Only the simulation thread changes the graph: changes from other threads are
+    queued as commands and run at the start of the next tick, with 'lock' held.
+    Other threads must hold 'lock' to read the graph, but never while a tick
+    moves the nodes, and read positions from the snapshots instead. The last two
+    snapshots are kept, so a renderer can interpolate between them.
+
+    The layout is settled once no node moves faster than 'settled_speed' (world
+    units per second). Ticks then do nothing until a command runs or a node is dragged.
+    """
+    # Ticks this far behind are dropped instead of run as fast as possible
+    MAX_LAG_TICKS = 5
+
+    def __init__(self, graph : Graph[Node], tick_rate : float = 60, settled_speed : float = 5, metrics : Metrics = None) -> None:
+        self.graph = graph
+        self.tick_rate = tick_rate
+        self.settled_speed = settled_speed
+        self.metrics = metrics
+        self.lock = threading.Lock()
+
+        self.__commands : SimpleQueue[Command] = SimpleQueue()
+        # Node dragged and where to, replaced as a whole so it can be read without a lock
+        self.__drag : tuple[Node, Vector2] = (None, None)
+
+        snapshot = self.__snapshot(0, False)
+        self.__snapshots = (snapshot, snapshot)
+
+        self.__stop = threading.Event()
+        self.__thread : threading.Thread = None
+
+    @property
+    def snapshots(self) -> tuple[Snapshot, Snapshot]:
+        """The previous and the last snapshot. The same one twice while settled."""
+        return self.__snapshots
+
+    @property
+    def settled(self) -> bool:
+        previous, current = self.__snapshots
+        return previous is current and current.settled
+
+    def submit(self, command : Command) -> None:
+        self.__commands.put(command)
+
+    def add(self, vertex : Node) -> None:
+        self.submit(lambda graph : graph.add(vertex))
+
+    def remove(self, vertex : Node) -> None:
+        self.submit(lambda graph : graph.remove(vertex))
+
+    def connect(self, source : Node, target : Node, weight : float | bool) -> None:
+        self.submit(lambda graph : graph.connect(source, target, weight))
+
+    def disconnect(self, source : Node, target : Node) -> None:
+        # The edge may be gone by the time the command runs
+        def command(graph : Graph[Node]):
+            if graph.contains(source) and graph.connected(source, target):
+                graph.disconnect(source, target)
+        self.submit(command)
+
+    def drag(self, node : Node, target : Vector2) -> None:
+        """Pulls 'node' towards 'target' every tick until called with None"""
+        self.__drag = (node, target) if node is not None and target is not None else (None, None)
+
+    def __snapshot(self, tick : int, settled : bool) -> Snapshot:
+        vertices = self.graph.vertices
+        positions = visualizer.NodeStore.positions_of(vertices)
+        return Snapshot(tick, time.perf_counter(), self.graph.version, vertices, positions, settled)
+
+    def tick(self) -> Snapshot:
+        """Runs the queued commands and one physics step. Called by the simulation thread, or directly if it isn't started."""
+        start = time.perf_counter()
+        ran_commands = False
+        with self.lock:
+            while True:
+                try:
+                    command = self.__commands.get_nowait()
+                except Empty:
+                    break
+                command(self.graph)
+                ran_commands = True
+
+        previous, current = self.__snapshots
+        selected_node, selected_target = self.__drag
+        if current.settled and not ran_commands and selected_target is None and self.graph.version == current.version:
+            if previous is not current:
+                self.__snapshots = (current, current)
+            return current
+
+        delta_time = 1 / self.tick_rate
+        max_displacement = physics.GraphPhysics.step(self.graph, delta_time, selected_node, selected_target)
+        snapshot = self.__snapshot(current.tick + 1, max_displacement < self.settled_speed * delta_time)
+        # Positions of different vertices can't be interpolated
+        self.__snapshots = (current if current.version == snapshot.version else snapshot, snapshot)
+
+        if self.metrics is not None:
+            self.metrics.increment("simulation_ticks_total")
+            self.metrics.observe("simulation_tick_seconds", time.perf_counter() - start)
+        return snapshot
+
+    def interpolated(self, now : float = None) -> tuple[Snapshot, np.ndarray]:
+        """
+        The last snapshot, and the node positions one tick before 'now': between
+        the previous snapshot when the last one is published and the last one a tick later.
+        """
+        previous, current = self.__snapshots
+        if previous is current:
+            return current, current.positions
+
+        if now is None:
+            now = time.perf_counter()
+        alpha = min(max((now - current.time) * self.tick_rate, 0.0), 1.0)
+        return current, previous.positions + (current.positions - previous.positions) * alpha
+
+    def __run(self) -> None:
+        interval = 1 / self.tick_rate
+        next_tick = time.perf_counter()
+        while not self.__stop.is_set():
+            self.tick()
+            next_tick += interval
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                self.__stop.wait(delay)
+            elif delay < -self.MAX_LAG_TICKS * interval:
+                next_tick = time.perf_counter()
+
+    def start(self) -> None:
+        if self.__thread is not None:
+            return
+        self.__stop.clear()
+        self.__thread = threading.Thread(target=self.__run, name="Simulation", daemon=True)
+        self.__thread.start()
+
+    def stop(self) -> None:
+        """Stops the thread after its current tick. Queued commands stay queued."""
+        if self.__thread is None:
+            return
+        self.__stop.set()
+        self.__thread.join()
+        self.__thread = None
+
+    def __enter__(self) -> "Simulation":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
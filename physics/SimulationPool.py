@@ -0,0 +1,88 @@
+import threading
+import time
+
+from physics.Simulation import Simulation
+
+class SimulationPool:
+    """
+    Runs the ticks of many simulations on a single thread, so views of several
+    graphs don't need a thread each and the ones that aren't looked at can be
+    slowed down or paused.
+
+    Every simulation has a divisor: it ticks on every n-th tick of the pool, or
+    never with 0. Simulations keep their fixed timestep, so a slowed down one
+    moves slower instead of taking bigger steps. They must not be started on
+    their own thread, and their tick rate should be the pool's, so snapshots
+    are interpolated right.
+    """
+    MAX_LAG_TICKS = Simulation.MAX_LAG_TICKS
+
+    def __init__(self, tick_rate : float = 60) -> None:
+        self.tick_rate = tick_rate
+        self.ticks = 0
+        # Replaced as a whole, so the pool thread can read it without a lock
+        self.__divisors : dict[Simulation, int] = {}
+
+        self.__stop = threading.Event()
+        self.__thread : threading.Thread = None
+
+    @property
+    def simulations(self) -> list[Simulation]:
+        return list(self.__divisors)
+
+    def add(self, simulation : Simulation, divisor : int = 1) -> None:
+        self.__divisors = {**self.__divisors, simulation : divisor}
+
+    def remove(self, simulation : Simulation) -> None:
+        divisors = dict(self.__divisors)
+        divisors.pop(simulation, None)
+        self.__divisors = divisors
+
+    def set_divisor(self, simulation : Simulation, divisor : int) -> None:
+        """Ticks 'simulation' every 'divisor' ticks of the pool, or pauses it with 0"""
+        if self.__divisors.get(simulation) != divisor:
+            self.add(simulation, divisor)
+
+    def divisor(self, simulation : Simulation) -> int:
+        return self.__divisors[simulation]
+
+    def tick(self) -> None:
+        """Ticks the simulations that are due. Called by the pool thread, or directly if it isn't started."""
+        self.ticks += 1
+        for simulation, divisor in self.__divisors.items():
+            if divisor > 0 and self.ticks % divisor == 0:
+                simulation.tick()
+
+    def __run(self) -> None:
+        interval = 1 / self.tick_rate
+        next_tick = time.perf_counter()
+        while not self.__stop.is_set():
+            self.tick()
+            next_tick += interval
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                self.__stop.wait(delay)
+            elif delay < -self.MAX_LAG_TICKS * interval:
+                next_tick = time.perf_counter()
+
+    def start(self) -> None:
+        if self.__thread is not None:
+            return
+        self.__stop.clear()
+        self.__thread = threading.Thread(target=self.__run, name="SimulationPool", daemon=True)
+        self.__thread.start()
+
+    def stop(self) -> None:
+        """Stops the thread after its current tick"""
+        if self.__thread is None:
+            return
+        self.__stop.set()
+        self.__thread.join()
+        self.__thread = None
+
+    def __enter__(self) -> "SimulationPool":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
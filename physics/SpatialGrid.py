@@ -0,0 +1,123 @@
+import numpy as np
+
+# Cells must be within +-2**30 so the packed keys fit in 63 bits
+_KEY_OFFSET = 1 << 30
+
+def cell_keys(cell_x : np.ndarray, cell_y : np.ndarray) -> np.ndarray:
+    """Grid cells packed in one int64 each, which sort by x and then y"""
+    return ((cell_x + _KEY_OFFSET) << 32) | (cell_y + _KEY_OFFSET)
+
+def key_cells(keys : np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """The cells of packed 'cell_keys'"""
+    return (keys >> 32) - _KEY_OFFSET, (keys & 0xFFFFFFFF) - _KEY_OFFSET
+
+class SpatialGrid:
+    """
+    Uniform grid over points or axis aligned boxes, identified by their index.
+
+    It is rebuilt in bulk from NumPy arrays every time the items move, which is
+    cheap enough to do after every physics step. Box queries return candidates:
+    every item in a cell the query touches, so callers do the exact test if they
+    need it. Grids of points also answer exact radius and nearest point queries.
+
+    Boxes touching up to 'max_cells_per_query' cells find them by binary search,
+    in O(log n). Bigger ones scan every occupied cell instead.
+    """
+    def __init__(self, cell_size : float, max_cells_per_item : int = 64, max_cells_per_query : int = 64) -> None:
+        self.cell_size = cell_size
+        # Bigger items are kept apart and returned by every query
+        self.max_cells_per_item = max_cells_per_item
+        self.max_cells_per_query = max_cells_per_query
+
+        self.__n_items = 0
+        self.__keys = np.empty(0, dtype=np.int64)
+        self.__cell_x = np.empty(0, dtype=np.int64)
+        self.__cell_y = np.empty(0, dtype=np.int64)
+        self.__starts = np.zeros(1, dtype=np.int64)
+        self.__items = np.empty(0, dtype=np.int64)
+        self.__oversized = np.empty(0, dtype=np.int64)
+        # Only kept for grids of points
+        self.__x : np.ndarray = None
+        self.__y : np.ndarray = None
+
+    def __len__(self) -> int:
+        return self.__n_items
+
+    def __cells(self, values : np.ndarray) -> np.ndarray:
+        return np.floor(np.asarray(values, dtype=np.float64) / self.cell_size).astype(np.int64)
+
+    def build_points(self, x : np.ndarray, y : np.ndarray) -> None:
+        self.build_boxes(x, y, x, y)
+        self.__x = np.asarray(x, dtype=np.float64)
+        self.__y = np.asarray(y, dtype=np.float64)
+
+    def build_boxes(self, min_x : np.ndarray, min_y : np.ndarray, max_x : np.ndarray, max_y : np.ndarray) -> None:
+        min_cx, min_cy = self.__cells(min_x), self.__cells(min_y)
+        width = self.__cells(max_x) - min_cx + 1
+        height = self.__cells(max_y) - min_cy + 1
+        counts = width * height
+
+        self.__n_items = len(counts)
+        self.__x = self.__y = None
+        items = np.arange(self.__n_items)
+        fits = counts <= self.max_cells_per_item
+        self.__oversized = items[~fits]
+
+        # One entry per (item, cell) pair
+        items, counts = items[fits], counts[fits]
+        entries = np.repeat(items, counts)
+        first_entry = np.cumsum(counts) - counts
+        local = np.arange(len(entries)) - np.repeat(first_entry, counts)
+        cell_x = min_cx[entries] + local % width[entries]
+        cell_y = min_cy[entries] + local // width[entries]
+
+        keys = cell_keys(cell_x, cell_y)
+        order = np.argsort(keys, kind="stable")
+        keys = keys[order]
+        self.__items = entries[order]
+
+        unique_keys, starts = np.unique(keys, return_index=True)
+        self.__keys = unique_keys
+        self.__starts = np.append(starts, len(keys))
+        self.__cell_x, self.__cell_y = key_cells(unique_keys)
+
+    def query_box(self, min_x : float, min_y : float, max_x : float, max_y : float) -> np.ndarray:
+        """Sorted indices of the items in the cells the box touches."""
+        min_cx, min_cy = np.floor(min_x / self.cell_size), np.floor(min_y / self.cell_size)
+        max_cx, max_cy = np.floor(max_x / self.cell_size), np.floor(max_y / self.cell_size)
+
+        if (max_cx - min_cx + 1) * (max_cy - min_cy + 1) <= self.max_cells_per_query:
+            cell_x, cell_y = np.meshgrid(np.arange(min_cx, max_cx + 1, dtype=np.int64),
+                                         np.arange(min_cy, max_cy + 1, dtype=np.int64))
+            keys = cell_keys(cell_x.ravel(), cell_y.ravel())
+            cells = np.searchsorted(self.__keys, keys)
+            found = cells < len(self.__keys)
+            cells = cells[found]
+            cells = cells[self.__keys[cells] == keys[found]]
+        else:
+            cells = np.flatnonzero((self.__cell_x >= min_cx) & (self.__cell_x <= max_cx) &
+                                   (self.__cell_y >= min_cy) & (self.__cell_y <= max_cy))
+
+        starts = self.__starts[cells]
+        counts = self.__starts[cells + 1] - starts
+        first_entry = np.cumsum(counts) - counts
+        entries = np.repeat(starts - first_entry, counts) + np.arange(counts.sum())
+
+        return np.unique(np.concatenate((self.__items[entries], self.__oversized)))
+
+    def within(self, x : float, y : float, radius : float) -> np.ndarray:
+        """Sorted indices of the points closer than 'radius' to (x, y). Only for grids of points."""
+        if self.__x is None:
+            raise ValueError("Radius queries need a grid built with 'build_points'")
+
+        candidates = self.query_box(x - radius, y - radius, x + radius, y + radius)
+        dx, dy = self.__x[candidates] - x, self.__y[candidates] - y
+        return candidates[dx * dx + dy * dy < radius * radius]
+
+    def nearest(self, x : float, y : float, radius : float) -> int | None:
+        """Index of the point closest to (x, y), if any is closer than 'radius'. Only for grids of points."""
+        points = self.within(x, y, radius)
+        if len(points) == 0:
+            return None
+        dx, dy = self.__x[points] - x, self.__y[points] - y
+        return int(points[np.argmin(dx * dx + dy * dy)])
@@ -1,11 +1,20 @@
+import numpy as np
 import pygame
 from visualizer.Vector2 import Vector2
 
 class Camera:
-    def __init__(self):
+    def __init__(self, window_size : tuple[int, int] = None):
         self.__offset : Vector2 = Vector2.ZERO  # Camera position offset
+        # Where panning is taking the camera, see 'follow'
+        self.__target : Vector2 = Vector2.ZERO
         self._zoom_level = 1.0  # Default zoom level
 
+        # Size of the surface the camera draws to. If not given, the size of the window the first time it is needed
+        self.__window_size = window_size
+
+        # Cached transform: offset x, offset y, zoom, half window width, half window height
+        self.__transform : tuple[float, float, float, float, float] = None
+
     # Getter and setter for position
     @property
     def position(self) -> Vector2:
@@ -13,6 +22,27 @@ class Camera:
     @position.setter
     def position(self, new_position : Vector2):
         self.__offset = new_position
+        self.__transform = None
+
+    # Getter and setter for the position the camera moves towards
+    @property
+    def target(self) -> Vector2:
+        return Vector2(*self.__target)
+    @target.setter
+    def target(self, new_target : Vector2):
+        self.__target = Vector2(*new_target)
+
+    def follow(self, delta_time : float, lerp_speed : float = 20) -> bool:
+        """Moves smoothly towards the target (linear interpolation). Returns whether the camera is still moving."""
+        t = lerp_speed * delta_time
+        delta = self.__target - self.__offset
+        # Once it is less than a tenth of a pixel away it stops
+        moving = delta.magnitude * self._zoom_level >= 0.1
+        if moving:
+            self.position = self.__offset + delta * min(t, 1)
+        elif delta.magnitude > 0:
+            self.position = self.target
+        return moving
 
     # Getter and setter for zoom level
     @property
@@ -22,19 +52,42 @@ class Camera:
     @zoom_level.setter
     def zoom_level(self, new_zoom_level):
         self._zoom_level = max(new_zoom_level, 0.1)  # Prevent zoom from going below 0.1
+        self.__transform = None
+
+    # Getter and setter for the window size. It must be set when the window is resized
+    @property
+    def window_size(self) -> tuple[int, int]:
+        if self.__window_size is None:
+            self.__window_size = pygame.display.get_window_size()
+        return self.__window_size
+
+    @window_size.setter
+    def window_size(self, new_window_size : tuple[int, int]):
+        self.__window_size = tuple(new_window_size)
+        self.__transform = None
+
+    def __get_transform(self) -> tuple[float, float, float, float, float]:
+        if self.__transform is None:
+            window_width, window_height = self.window_size
+            self.__transform = (self.__offset.x, self.__offset.y, self._zoom_level, window_width / 2, window_height / 2)
+        return self.__transform
 
     def world_to_screen(self, pos:Vector2) -> Vector2:
         """Transform a world position to a screen position based on camera offset and zoom."""
-        window_size = Vector2(*pygame.display.get_window_size())
-        
-        screen_pos : Vector2 = (pos - self.__offset) * self.zoom_level + window_size / 2
-        return screen_pos
-    
+        offset_x, offset_y, zoom, half_width, half_height = self.__get_transform()
+        return Vector2((pos.x - offset_x) * zoom + half_width, (pos.y - offset_y) * zoom + half_height)
+
     def screen_to_world(self, screen_pos : Vector2) -> Vector2:
         """Convert a screen position to a world position based on the camera."""
-        window_size = Vector2(*pygame.display.get_window_size())
-        
-        world_pos : Vector2 = (screen_pos - window_size / 2) / self.zoom_level + self.__offset
-        return world_pos
-    
-    
\ No newline at end of file
+        offset_x, offset_y, zoom, half_width, half_height = self.__get_transform()
+        return Vector2((screen_pos.x - half_width) / zoom + offset_x, (screen_pos.y - half_height) / zoom + offset_y)
+
+    def world_to_screen_many(self, points : np.ndarray) -> np.ndarray:
+        """Same as 'world_to_screen' for an array of points with shape (n, 2)."""
+        offset_x, offset_y, zoom, half_width, half_height = self.__get_transform()
+        return (points - (offset_x, offset_y)) * zoom + (half_width, half_height)
+
+    def screen_to_world_many(self, points : np.ndarray) -> np.ndarray:
+        """Same as 'screen_to_world' for an array of points with shape (n, 2)."""
+        offset_x, offset_y, zoom, half_width, half_height = self.__get_transform()
+        return (points - (half_width, half_height)) / zoom + (offset_x, offset_y)
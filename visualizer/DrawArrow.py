@@ -9,24 +9,25 @@ def draw_arrow(
     width : int = 2,
     head_length : float = 10,
     head_angle : float = 30  # degrees
-):
-    """Draw an arrow using three lines."""
+) -> pygame.Rect:
+    """Draw an arrow using three lines. Returns the area it drew on."""
 
     # Draw line
-    pygame.draw.line(surface, color, tuple(start), tuple(end), width)
+    line_rect = pygame.draw.line(surface, color, tuple(start), tuple(end), width)
 
     # Arrow head
     # Direction vector from start to end
     direction = start - end
     if direction.magnitude == 0:
-        return
+        return line_rect
     
     direction.normalize()
 
-    # Rotate direction to create head lines
-    left_head = direction.rotated(head_angle) * head_length
-    right_head = direction.rotated(-head_angle) * head_length
+    # Rotate direction to create head lines, ending at their tips
+    left_head = direction.rotated(head_angle).scale(head_length).add(end)
+    right_head = direction.rotate(-head_angle).scale(head_length).add(end)
 
     # Draw the two arrowhead lines
-    pygame.draw.line(surface, color, tuple(end), tuple(end + left_head), width)
-    pygame.draw.line(surface, color, tuple(end), tuple(end + right_head), width)
+    left_rect = pygame.draw.line(surface, color, tuple(end), tuple(left_head), width)
+    right_rect = pygame.draw.line(surface, color, tuple(end), tuple(right_head), width)
+    return line_rect.unionall((left_rect, right_rect))
@@ -0,0 +1,86 @@
+import math
+
+import numpy as np
+import pygame
+
+from visualizer.Camera import Camera
+from visualizer.SceneIndex import SceneIndex
+
+# Smaller arrow heads can't be told apart from the line, so they aren't drawn
+MIN_HEAD_LENGTH = 3
+
+def draw_edges(
+    surface : pygame.Surface,
+    scene_index : SceneIndex,
+    camera : Camera,
+    color : pygame.Color,
+    directed : bool,
+    visible_edges : np.ndarray = None,
+    width : int = 2,
+    node_radius : float = 0,
+    head_length : float = 10,
+    head_angle : float = 30  # degrees
+):
+    """
+    Draws every edge of the scene, or only 'visible_edges'.
+
+    All the positions and arrow heads are computed at once with NumPy, and every
+    trail of edges is drawn with a single pygame.draw.lines call. Only the visible
+    edges are transformed and drawn, each run of them along a trail as its own
+    polyline. Arrows end at the circumference of the target node; the polyline
+    then goes on to the node's center, which is hidden once the nodes are drawn on top.
+    """
+    order, backwards, starts, edge_trail = scene_index.trails
+    if visible_edges is not None:
+        visible = np.zeros(len(edge_trail), dtype=bool)
+        visible[visible_edges] = True
+        kept = np.flatnonzero(visible[order])
+        # A run ends where an edge is skipped or its trail ends
+        new_run = np.ones(len(kept), dtype=bool)
+        new_run[1:] = (np.diff(kept) != 1) | (np.diff(edge_trail[order[kept]]) != 0)
+        order, backwards = order[kept], backwards[kept]
+        starts = np.append(np.flatnonzero(new_run), len(kept))
+    if len(order) == 0:
+        return
+
+    sources, targets = scene_index.edges
+    positions = scene_index.positions
+    start = camera.world_to_screen_many(positions[sources[order]])
+    end = camera.world_to_screen_many(positions[targets[order]])
+
+    if directed and head_length >= MIN_HEAD_LENGTH:
+        diff = end - start
+        dist = np.hypot(diff[:, 0], diff[:, 1])
+        drawn = dist > 0.001
+        direction = np.divide(diff, dist[:, None], out=np.zeros_like(diff), where=drawn[:, None])
+
+        # We end the arrow at the circumference of each node
+        length = np.maximum(0.0, dist - node_radius)
+        tip = np.where(drawn[:, None], start + direction * length[:, None], start)
+
+        # Arrow heads point back along the edge, unless it is fully inside the node
+        head = -direction * ((length > 0) & drawn)[:, None] * head_length
+        angle = math.radians(head_angle)
+        cos, sin = math.cos(angle), math.sin(angle)
+        left = tip + np.stack((head[:, 0] * cos - head[:, 1] * sin, head[:, 0] * sin + head[:, 1] * cos), axis=1)
+        right = tip + np.stack((head[:, 0] * cos + head[:, 1] * sin, -head[:, 0] * sin + head[:, 1] * cos), axis=1)
+
+        # Every edge adds tip, left head, tip, right head, tip and the node it ends at
+        last = np.where(backwards[:, None], start, end)
+        sequence = np.stack((tip, left, tip, right, tip, last), axis=1)
+    else:
+        sequence = np.where(backwards[:, None], start, end)[:, None, :]
+
+    # Every trail is its first point followed by the points of its edges, all in one array
+    points_per_edge = sequence.shape[1]
+    n_trails = len(starts) - 1
+    trail_of_edge = np.repeat(np.arange(n_trails), np.diff(starts))
+    polylines = np.empty((len(order) * points_per_edge + n_trails, 2))
+    polylines[starts[:-1] * points_per_edge + np.arange(n_trails)] = np.where(backwards[:, None], end, start)[starts[:-1]]
+    edge_points = (np.arange(len(order)) * points_per_edge + trail_of_edge + 1)[:, None] + np.arange(points_per_edge)
+    polylines[edge_points.ravel()] = sequence.reshape(-1, 2)
+
+    bounds = (starts * points_per_edge + np.arange(n_trails + 1)).tolist()
+    for trail in range(n_trails):
+        # The last point of a trail is just before the first point of the next one
+        pygame.draw.lines(surface, color, False, polylines[bounds[trail]:bounds[trail + 1]], width)
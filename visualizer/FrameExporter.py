@@ -0,0 +1,201 @@
+"""
+Offscreen rendering of the simulation into image files or raw frame streams,
+for machines without a display.
+
+Frames are drawn on a plain pygame Surface, so no window (or video driver) is
+needed. A fixed timestep is used, so the same graph always gives the same frames.
+Writing can happen on a worker thread, overlapping with the simulation and drawing
+of the next frames.
+"""
+from queue import Queue
+from typing import BinaryIO
+import os
+import struct
+import threading
+import time
+import zlib
+
+import numpy as np
+import pygame
+from pygame.surface import Surface
+
+from graph.Graph import Graph
+from visualizer.Node import Node
+from visualizer.Input import Input
+from visualizer.Camera import Camera
+from visualizer.SceneIndex import SceneIndex
+from visualizer.LevelOfDetail import LevelOfDetail
+from visualizer.FrameProfiler import FrameProfiler
+import visualizer.GraphDrawer
+import physics.GraphPhysics
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+def _png_chunk(kind : bytes, body : bytes) -> bytes:
+    return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body))
+
+def encode_png(size : tuple[int, int], data : bytes, compression : int = 6) -> bytes:
+    """
+    PNG file of an RGB24 image. Unlike pygame.image.save, compressing doesn't
+    hold the GIL, so it overlaps with drawing when done on another thread.
+    """
+    width, height = size
+    # Every row starts with its filter type, 0 (none)
+    rows = np.zeros((height, width * 3 + 1), dtype=np.uint8)
+    rows[:, 1:] = np.frombuffer(data, dtype=np.uint8).reshape(height, width * 3)
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)  # 8 bit RGB
+    return (_PNG_SIGNATURE + _png_chunk(b"IHDR", header) +
+            _png_chunk(b"IDAT", zlib.compress(rows.tobytes(), compression)) + _png_chunk(b"IEND", b""))
+
+class PngWriter:
+    """Writes every frame to its own PNG file in 'directory'."""
+    def __init__(self, directory : str, pattern : str = "frame_{:05d}.png", compression : int = 6) -> None:
+        self.directory = directory
+        self.pattern = pattern
+        self.compression = compression
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, index : int, size : tuple[int, int], data : bytes) -> None:
+        with open(os.path.join(self.directory, self.pattern.format(index)), "wb") as file:
+            file.write(encode_png(size, data, self.compression))
+
+    def close(self) -> None:
+        pass
+
+class RawWriter:
+    """
+    Writes the frames one after the other as raw RGB24 to a file, which video
+    encoders read directly. With ffmpeg:
+    ffmpeg -f rawvideo -pix_fmt rgb24 -s 800x600 -r 60 -i frames.rgb out.mp4
+    """
+    def __init__(self, file : str | BinaryIO) -> None:
+        self.__owned = isinstance(file, str)
+        self.file = open(file, "wb") if self.__owned else file
+
+    def write(self, index : int, size : tuple[int, int], data : bytes) -> None:
+        self.file.write(data)
+
+    def close(self) -> None:
+        if self.__owned:
+            self.file.close()
+        else:
+            self.file.flush()
+
+type FrameWriter = PngWriter | RawWriter
+
+class FrameEncoder:
+    """
+    Hands frames to a writer. With 'threaded' the writer runs on a worker thread,
+    with up to 'max_pending' frames waiting for it, so rendering only waits when
+    the writer can't keep up.
+    """
+    def __init__(self, writer : FrameWriter, threaded : bool = True, max_pending : int = 8) -> None:
+        self.writer = writer
+        self.threaded = threaded
+        self.__frames = 0
+        self.__error : BaseException = None
+
+        if threaded:
+            self.__queue : Queue[tuple[int, tuple[int, int], bytes] | None] = Queue(max_pending)
+            self.__worker = threading.Thread(target=self.__work, name="FrameEncoder", daemon=True)
+            self.__worker.start()
+
+    @property
+    def frames(self) -> int:
+        return self.__frames
+
+    def __work(self) -> None:
+        while True:
+            frame = self.__queue.get()
+            if frame is None:
+                return
+            if self.__error is None:
+                try:
+                    self.writer.write(*frame)
+                except BaseException as e:
+                    self.__error = e
+
+    def submit(self, surface : Surface) -> None:
+        """Copies the surface, so it can be drawn on again right away"""
+        if self.__error is not None:
+            raise self.__error
+
+        frame = (self.__frames, surface.get_size(), pygame.image.tobytes(surface, "RGB"))
+        self.__frames += 1
+        if self.threaded:
+            self.__queue.put(frame)
+        else:
+            self.writer.write(*frame)
+
+    def close(self) -> None:
+        """Waits for every frame to be written"""
+        if self.threaded:
+            self.__queue.put(None)
+            self.__worker.join()
+        self.writer.close()
+        if self.__error is not None:
+            raise self.__error
+
+    def __enter__(self) -> "FrameEncoder":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+def export_frames(
+    graph : Graph[Node],
+    encoder : FrameEncoder | None,
+    n_frames : int,
+    delta_time : float = 1 / 60,
+    steps_per_frame : int = 1,
+    size : tuple[int, int] = (800, 600),
+    node_radius : int = 20,
+    camera : Camera = None,
+    profiler : FrameProfiler = None
+) -> float:
+    """
+    Runs the simulation for 'n_frames' frames of 'steps_per_frame' physics steps
+    of 'delta_time' seconds, and gives every frame to 'encoder' (or drops it if
+    None, to time rendering alone).
+
+    With a 'profiler' the physics, draw and encode stages of every frame are timed.
+    The encoder is closed at the end, also if a frame fails. Returns the frames
+    per second it ran at, including waiting for the encoder to finish.
+    """
+    if not pygame.font.get_init():
+        pygame.font.init()
+    if camera is None:
+        camera = Camera(size)
+    else:
+        camera.window_size = size
+
+    if profiler is None:
+        profiler = FrameProfiler(enabled=False)
+
+    surface = Surface(size)
+    input_manager = Input()
+    scene_index = SceneIndex()
+    level_of_detail = LevelOfDetail()
+
+    start = time.perf_counter()
+    # The writer's file and thread are released even if a frame fails
+    try:
+        for _ in range(n_frames):
+            profiler.begin_frame()
+            for _ in range(steps_per_frame):
+                physics.GraphPhysics.apply_node_forces(graph, input_manager, camera, None, delta_time)
+            scene_index.update(graph)
+            profiler.mark("physics")
+
+            visualizer.GraphDrawer.draw_graph(surface, graph, camera, input_manager, node_radius, None,
+                                              scene_index, level_of_detail, flip=False)
+            profiler.mark("draw")
+            if encoder is not None:
+                encoder.submit(surface)
+            profiler.mark("encode")
+            profiler.end_frame()
+    finally:
+        if encoder is not None:
+            encoder.close()
+    return n_frames / (time.perf_counter() - start)
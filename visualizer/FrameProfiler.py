@@ -0,0 +1,189 @@
+import json
+import time
+
+import numpy as np
+import pygame
+from pygame.surface import Surface
+
+from graph.Metrics import Metrics
+from visualizer.LabelCache import FontPool
+
+class FrameProfiler:
+    """
+    Times the stages of every frame into a ring buffer of the last 'capacity' frames.
+
+    A frame is 'begin_frame', then one 'mark' at the end of every stage, then
+    'end_frame'. Each mark times the stage since the previous mark. While not
+    enabled every call returns after a single check, so the hooks can stay in place.
+
+    With 'metrics', every frame also counts in 'visualizer_frames_total' and its
+    stages go to the 'visualizer_stage_seconds' histograms, by stage. Frames are
+    timed while there are metrics even if the profiler isn't enabled.
+    """
+    OVERLAY_REFRESH_SECONDS = 0.5
+
+    def __init__(self, capacity : int = 600, enabled : bool = True, output_file : str = None, metrics : Metrics = None) -> None:
+        self.capacity = capacity
+        self.enabled = enabled
+        self.metrics = metrics
+        self.show_overlay = False
+        # Written by 'dump', as a Chrome trace if it ends in '.json' and as CSV otherwise
+        self.output_file = output_file
+
+        self.__stages : dict[str, int] = {}
+        self.__frames = 0
+        self.__starts = np.zeros(capacity)
+        # Start (relative to the frame) and duration of every stage, NaN if the frame didn't have it
+        self.__offsets = np.full((capacity, 0), np.nan)
+        self.__durations = np.full((capacity, 0), np.nan)
+
+        # Set while a frame is being timed
+        self.__slot : int = None
+        self.__frame_start = 0.0
+        self.__last_mark = 0.0
+
+        self.__fonts = FontPool()
+        self.__overlay : Surface = None
+        self.__overlay_time = 0.0
+
+    @property
+    def stages(self) -> list[str]:
+        return list(self.__stages)
+
+    @property
+    def frames(self) -> int:
+        """Frames timed so far, including the ones no longer in the buffer"""
+        return self.__frames
+
+    def begin_frame(self) -> None:
+        if not self.enabled and self.metrics is None:
+            return
+        self.__slot = self.__frames % self.capacity
+        self.__frame_start = self.__last_mark = time.perf_counter()
+        self.__starts[self.__slot] = self.__frame_start
+        self.__offsets[self.__slot] = np.nan
+        self.__durations[self.__slot] = np.nan
+
+    def mark(self, stage : str) -> None:
+        """Ends 'stage'. A stage marked twice in a frame adds up."""
+        if self.__slot is None:
+            return
+        now = time.perf_counter()
+        column = self.__stages.get(stage)
+        if column is None:
+            column = self.__add_stage(stage)
+
+        duration = self.__durations[self.__slot, column]
+        if np.isnan(duration):
+            self.__offsets[self.__slot, column] = self.__last_mark - self.__frame_start
+            self.__durations[self.__slot, column] = now - self.__last_mark
+        else:
+            self.__durations[self.__slot, column] = duration + now - self.__last_mark
+        self.__last_mark = now
+
+    def end_frame(self) -> None:
+        if self.__slot is None:
+            return
+        if self.metrics is not None:
+            self.metrics.increment("visualizer_frames_total")
+            for stage, duration in zip(self.__stages, self.__durations[self.__slot].tolist()):
+                if not np.isnan(duration):
+                    self.metrics.observe("visualizer_stage_seconds", duration, stage=stage)
+        self.__frames += 1
+        self.__slot = None
+
+    def __add_stage(self, stage : str) -> int:
+        column = len(self.__stages)
+        self.__stages[stage] = column
+        new_column = np.full((self.capacity, 1), np.nan)
+        self.__offsets = np.hstack((self.__offsets, new_column))
+        self.__durations = np.hstack((self.__durations, new_column))
+        return column
+
+    def __recorded(self) -> np.ndarray:
+        """Slots of the frames in the buffer, oldest first"""
+        if self.__frames <= self.capacity:
+            return np.arange(self.__frames)
+        return (np.arange(self.capacity) + self.__frames) % self.capacity
+
+    def percentiles(self, q : tuple[float, ...] = (50, 95, 99)) -> dict[str, list[float]]:
+        """Percentiles of the time in seconds of every stage and of whole frames, over the buffer"""
+        durations = self.__durations[self.__recorded()]
+        result : dict[str, list[float]] = {}
+        for stage, column in self.__stages.items():
+            times = durations[:, column]
+            times = times[~np.isnan(times)]
+            if len(times) > 0:
+                result[stage] = np.percentile(times, q).tolist()
+
+        if len(durations) > 0:
+            result["frame"] = np.percentile(np.nansum(durations, axis=1), q).tolist()
+        return result
+
+    def reset(self) -> None:
+        self.__frames = 0
+        self.__slot = None
+
+    def to_chrome_trace(self) -> str:
+        """The buffer as a Chrome trace, to open in chrome://tracing or Perfetto"""
+        slots = self.__recorded()
+        origin = self.__starts[slots[0]] if len(slots) > 0 else 0
+        events = []
+        for frame, slot in enumerate(slots.tolist(), self.__frames - len(slots)):
+            start = (self.__starts[slot] - origin) * 1e6
+            for stage, column in self.__stages.items():
+                duration = self.__durations[slot, column]
+                if not np.isnan(duration):
+                    events.append({"name" : stage, "ph" : "X", "pid" : 0, "tid" : 0, "args" : {"frame" : frame},
+                                   "ts" : start + self.__offsets[slot, column] * 1e6, "dur" : duration * 1e6})
+        return json.dumps({"traceEvents" : events, "displayTimeUnit" : "ms"})
+
+    def to_csv(self) -> str:
+        """One row per frame with its start and the milliseconds of every stage"""
+        slots = self.__recorded()
+        origin = self.__starts[slots[0]] if len(slots) > 0 else 0
+        lines = [",".join(["frame", "start_ms"] + list(self.__stages))]
+        for frame, slot in enumerate(slots.tolist(), self.__frames - len(slots)):
+            values = [f"{d * 1000:.4f}" if not np.isnan(d) else "" for d in self.__durations[slot].tolist()]
+            lines.append(",".join([str(frame), f"{(self.__starts[slot] - origin) * 1000:.4f}"] + values))
+        return "\n".join(lines) + "\n"
+
+    def export(self, filename : str, format : str = "chrome") -> None:
+        """Writes the buffer to a file, either as a 'chrome' trace or 'csv'."""
+        if format == "chrome":
+            text = self.to_chrome_trace()
+        elif format == "csv":
+            text = self.to_csv()
+        else:
+            raise ValueError(f"Unknown profile format '{format}'")
+
+        with open(filename, "w") as file:
+            file.write(text)
+
+    def dump(self) -> None:
+        """Exports to 'output_file', if there is one and any frame was timed"""
+        if self.output_file is not None and self.__frames > 0:
+            self.export(self.output_file, "chrome" if self.output_file.endswith(".json") else "csv")
+
+    def draw_overlay(self, surface : Surface, position : tuple[int, int] = (10, 10)) -> list[pygame.Rect]:
+        """Draws the 50th, 95th and 99th percentiles of every stage. Returns the rects drawn on."""
+        if not self.show_overlay:
+            return []
+
+        # Rendering the text every frame would show up in the numbers
+        now = time.perf_counter()
+        if self.__overlay is None or now - self.__overlay_time > self.OVERLAY_REFRESH_SECONDS:
+            self.__overlay_time = now
+            font = self.__fonts.get(18)
+            lines = ["stage       p50    p95    p99 (ms)"]
+            for stage, (p50, p95, p99) in self.percentiles().items():
+                lines.append(f"{stage:<10}{p50 * 1000:>6.2f} {p95 * 1000:>6.2f} {p99 * 1000:>6.2f}")
+            rendered = [font.render(line, True, (255, 255, 255)) for line in lines]
+
+            line_height = font.get_linesize()
+            self.__overlay = Surface((max(r.get_width() for r in rendered) + 8, line_height * len(rendered) + 8))
+            self.__overlay.fill((30, 30, 30))
+            for i, line in enumerate(rendered):
+                self.__overlay.blit(line, (4, 4 + i * line_height))
+
+        return [surface.blit(self.__overlay, position)]
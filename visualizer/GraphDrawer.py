@@ -1,19 +1,29 @@
 import pygame
-from pygame.surface import Surface
 import colorsys
 
 import visualizer.DrawArrow
+import visualizer.EdgeRenderer
 
 from graph.Graph import *
+from graph.Metrics import Metrics
 from visualizer.Input import *
 from visualizer.Node import *
 from visualizer.Vector2 import Vector2
 from visualizer.Camera import Camera
-import physics.GraphPhysics
+from visualizer.SceneIndex import SceneIndex
+from visualizer.LevelOfDetail import LevelOfDetail
+from visualizer.LabelCache import LabelCache, SIZE_BUCKET_RATIO
+from visualizer.LayeredRenderer import LayeredRenderer
+from visualizer.FrameProfiler import FrameProfiler
 import physics.Collisions
+from physics.Simulation import Simulation
+from visualizer.InputRecording import InputRecorder, InputPlayer
 
-# Checks if (x, y) is inside any node of the graph
-def collides_with_any_node(x, y, graph : Graph, distance = 0):
+# Checks if (x, y) is inside any node of the graph. With a scene index of the graph only nearby nodes are checked, and the closest one is returned
+def collides_with_any_node(x, y, graph : Graph, distance = 0, scene_index : SceneIndex = None):
+    if scene_index is not None and scene_index.indexes(graph):
+        return scene_index.node_at(x, y, distance)
+    
     for node in graph.vertices:
         dist_sq_to_node = physics.Collisions.distance_btwn_points_sq(Vector2(x, y), node.pos)
         if dist_sq_to_node < distance * distance:
@@ -33,17 +43,18 @@ def generate_colors(n: int = 1):
         color = (int(r * 255), int(g * 255), int(b * 255))
         component_colors.append(color)
         
-text_surfaces : dict[Node, Surface] = {}
+# Node labels, shared by every frame
+label_cache = LabelCache()
 
 
 LEFT_MOUSE_BUTTON = 1
 MIDDLE_MOUSE_BUTTON = 2
 RIGHT_MOUSE_BUTTON = 3
 
-camera_desired_position : Vector2 = Vector2.ZERO
+# Once no node moves faster than this on screen (pixels per second) the layout is settled, and the simulation idles until something changes
+SETTLED_SPEED = 5
 
-def handle_mouse_motion(camera:Camera, graph:Graph, input_manager:Input):
-    global camera_desired_position
+def handle_mouse_motion(camera:Camera, graph:Graph, input_manager:Input, simulation:Simulation, scene_index:SceneIndex = None):
     # Camera movement
     if input_manager.is_pressed(MIDDLE_MOUSE_BUTTON):
         mouse_pos_delta : Vector2 = (input_manager.mouse_pos - input_manager.last_mouse_pos) / camera.zoom_level
@@ -53,67 +64,83 @@ def handle_mouse_motion(camera:Camera, graph:Graph, input_manager:Input):
         mouse_pos_delta.clamp_magnitude(max_speed)
 
         # Set the desired camera position
-        camera_desired_position -=  mouse_pos_delta
+        camera.target -= mouse_pos_delta
 
     # Checks if the right mouse button is pressed and the mouse is moving, to break any edge the mouse crosses
     if input_manager.is_pressed(RIGHT_MOUSE_BUTTON):
+        last_mouse_pos = camera.screen_to_world(input_manager.last_mouse_pos)
+        current_mouse_pos = camera.screen_to_world(input_manager.mouse_pos)
+        
+        # With a scene index of the graph only the edges near the mouse are checked
+        if scene_index is not None and scene_index.indexes(graph):
+            sources, targets = scene_index.edges
+            for e in scene_index.edges_crossing(tuple(last_mouse_pos), tuple(current_mouse_pos)).tolist():
+                simulation.disconnect(scene_index.vertices[sources[e]], scene_index.vertices[targets[e]])
+            return
+        
         for n1 in graph.vertices:
             for n2 in list(graph.adjacent_vertices(n1)):
-                last_mouse_pos = camera.screen_to_world(input_manager.last_mouse_pos)
-                current_mouse_pos = camera.screen_to_world(input_manager.mouse_pos)
-                
                 cut_edge = physics.Collisions.lines_intersect(last_mouse_pos,
                                             current_mouse_pos,
                                             n1.pos, n2.pos)
                 if cut_edge:
-                    graph.disconnect(n1, n2)
+                    simulation.disconnect(n1, n2)
 
-def handle_event(event, camera:Camera, graph:Graph, input_manager:Input, delta_time:float) -> bool:
+def handle_event(event, camera:Camera, graph:Graph, input_manager:Input, simulation:Simulation, delta_time:float) -> bool:
     if event.type == pygame.QUIT:  # User closes the window
         return False
     
-    if event.type == pygame.MOUSEMOTION:
-        handle_mouse_motion(camera, graph, input_manager)
-        
-    elif event.type == pygame.MOUSEWHEEL:
+    if event.type == pygame.MOUSEWHEEL:
         camera.zoom_level += event.y * 3 * delta_time
     
+    elif event.type == pygame.WINDOWSIZECHANGED:
+        camera.window_size = (event.x, event.y)
+    
     return True
 
-def main(graph:Graph[Node]):
-    # Input handling
+def main(graph:Graph[Node], metrics:Metrics = None, profiler:FrameProfiler = None, record_file:str = None, replay_file:str = None):
+    """
+    Opens the viewer on 'graph' until the window is closed.
+    
+    With 'record_file' the input of every frame is saved there, see InputRecording.
+    With 'replay_file' the input is read from such a recording instead: frames
+    take the recorded times but don't wait for them, the simulation is stepped
+    on this thread, and the viewer closes when the recording ends. It works with
+    SDL_VIDEODRIVER=dummy, so sessions can be replayed headless.
+    """
+    # Input handling. The graph is only read here, changes are sent to the simulation
     def on_left_press():
         nonlocal graph, input_manager, left_click_drag_node, node_radius
         
         x,y = camera.screen_to_world(input_manager.mouse_pos)
         
         left_click_drag_node = None
-        node = collides_with_any_node(x, y, graph, 1*node_radius)
+        node = collides_with_any_node(x, y, graph, 1*node_radius, scene_index)
         if node != None:
             left_click_drag_node = node
 
     def on_left_click():
         nonlocal graph, input_manager, camera, node_radius
         x, y = camera.screen_to_world(input_manager.mouse_pos)
-        node = collides_with_any_node(x, y, graph, 2*node_radius)
+        node = collides_with_any_node(x, y, graph, 2*node_radius, scene_index)
         if node == None:
-            graph.add(Node(len(graph.vertices), x, y))
+            simulation.submit(lambda graph : graph.add(Node(len(graph.vertices), x, y)))
             
     def on_right_click():
         nonlocal graph, input_manager, camera, node_radius
         x, y = camera.screen_to_world(input_manager.mouse_pos)
-        node = collides_with_any_node(x, y, graph, node_radius)
+        node = collides_with_any_node(x, y, graph, node_radius, scene_index)
         if node != None:
-            graph.remove(node)
+            simulation.remove(node)
     
     def on_left_drag_stop(start_pos, end_pos):
         nonlocal graph, camera, node_radius, left_click_drag_node
         
         end_pos = camera.screen_to_world(end_pos)
         if left_click_drag_node != None:
-            end_node = collides_with_any_node(*end_pos, graph, node_radius)
+            end_node = collides_with_any_node(*end_pos, graph, node_radius, scene_index)
             if end_node != None and left_click_drag_node != end_node:
-                graph.connect(left_click_drag_node, end_node, 1)
+                simulation.connect(left_click_drag_node, end_node, 1)
     
     def add_input_callbacks():
         nonlocal input_manager
@@ -128,7 +155,16 @@ def main(graph:Graph[Node]):
 
         input_manager.add_short_release_function(RIGHT_MOUSE_BUTTON, on_right_click)
     
-    global camera_desired_position
+    # Frame metrics go to the same registry as the graph's unless another one is given
+    if metrics is None:
+        metrics = graph.metrics
+    
+    # Frame stages are only timed once the profiler overlay is shown (F3), unless a profiler is given
+    if profiler is None:
+        profiler = FrameProfiler(enabled=False)
+    # The profiler's stage timings are the ones that go to the metrics
+    if profiler.metrics is None:
+        profiler.metrics = metrics
     
     # Initialize Pygame
     pygame.init()
@@ -138,8 +174,7 @@ def main(graph:Graph[Node]):
     pygame.display.set_caption("Graph")
 
     # Camera
-    camera = Camera()
-    camera_desired_position = camera.position
+    camera = Camera(screen.get_size())
 
     # Main loop control variable
     running = True
@@ -157,124 +192,225 @@ def main(graph:Graph[Node]):
     # Input management
     input_manager = Input()
     add_input_callbacks()
+    
+    # Spatial index of the scene, so only what is inside the window gets drawn and clicks only check nearby nodes
+    scene_index = SceneIndex()
+    # Zoomed out, nodes are drawn in clusters
+    level_of_detail = LevelOfDetail()
+    # While nothing moves, the last drawn scene is reused
+    renderer = LayeredRenderer()
+    
+    # The physics run on their own thread, at the frame rate the window had before.
+    # Replays step it every 1 / FPS seconds of recorded time instead, so they always do the same
+    simulation = Simulation(graph, FPS, metrics=metrics)
+    recorder = InputRecorder(record_file) if record_file is not None else None
+    replay = iter(InputPlayer(replay_file)) if replay_file is not None else None
+    replay_time = 0.0
+    if replay is None:
+        simulation.start()
+    # Last snapshot the scene index has the positions of, and whether they were interpolated
+    scene_tick = -1
+    scene_interpolated = False
 
     # Main game loop
     while running:
-        events = pygame.event.get()
-
-        # Updates the input_manager class
-        input_manager.update(delta_time, events)
+        profiler.begin_frame()
+        if replay is not None:
+            delta_time, events = next(replay, (0, [pygame.event.Event(pygame.QUIT)]))
+        else:
+            events = pygame.event.get()
+        if recorder is not None:
+            recorder.record(delta_time, events)
+
+        # Input reads the graph, so the simulation can't change it meanwhile
+        with simulation.lock:
+            # Updates the input_manager class
+            input_manager.update(delta_time, events)
+            
+            # Event handling
+            for event in events:
+                running = handle_event(event, camera, graph, input_manager, simulation, delta_time) and running
+                # The window lost what was drawn on it
+                if event.type == pygame.WINDOWEXPOSED:
+                    renderer.invalidate()
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                    profiler.show_overlay = not profiler.show_overlay
+                    profiler.enabled = profiler.enabled or profiler.show_overlay
+            
+            # However many motion events there were, the mouse moved once this frame
+            if input_manager.moved:
+                handle_mouse_motion(camera, graph, input_manager, simulation, scene_index)
         
-        # Event handling
-        for event in events:
-            running = handle_event(event, camera, graph, input_manager, delta_time)
+        # Smoothly move the camera towards the desired position
+        camera_moving = camera.follow(delta_time)
         
-        # Smoothly move the camera towards the desired position using linear interpolation (lerp)
-        lerp_speed = 20
-        t = lerp_speed * delta_time
-        camera.position += (camera_desired_position - camera.position) * min(t, 1)
+        # The dragged node follows the mouse
+        if input_manager.is_long_pressed(LEFT_MOUSE_BUTTON) and left_click_drag_node is not None:
+            simulation.drag(left_click_drag_node, camera.screen_to_world(input_manager.mouse_pos))
+        else:
+            simulation.drag(None, None)
+        # The layout is settled once nodes move slower than SETTLED_SPEED pixels per second on screen
+        simulation.settled_speed = SETTLED_SPEED / camera.zoom_level
         
-        physics.GraphPhysics.apply_node_forces(graph, input_manager, camera, left_click_drag_node, delta_time)
-
-        draw_graph(screen, graph, camera, input_manager, node_radius, left_click_drag_node)
+        profiler.mark("input")
+        
+        if replay is not None:
+            replay_time += delta_time
+            while replay_time >= 1 / FPS:
+                simulation.tick()
+                replay_time -= 1 / FPS
+            profiler.mark("physics")
+        
+        with simulation.lock:
+            # Positions are interpolated between the last two ticks. Skipped while the simulation
+            # has changed the graph but not published its positions yet. Replays show the last
+            # tick, since interpolating depends on the real time
+            if replay is not None:
+                snapshot = simulation.snapshots[1]
+                positions = snapshot.positions
+            else:
+                snapshot, positions = simulation.interpolated()
+            settled = simulation.settled
+            if snapshot.version == graph.version and (snapshot.tick != scene_tick or scene_interpolated or not settled):
+                scene_index.update(graph, positions)
+                scene_tick = snapshot.tick
+                scene_interpolated = not settled
+            profiler.mark("scene")
+            
+            # Cached until the graph changes, so this only takes time on the frame after a change
+            if len(graph.vertices) > 0:
+                graph.cut_vertices
+            profiler.mark("cut_vertices")
+
+            scene_key = (graph.version, scene_tick, tuple(camera.position), camera.zoom_level, camera.window_size)
+            renderer.draw(screen, scene_key, settled and not scene_interpolated and not camera_moving,
+                lambda surface : draw_scene(surface, graph, camera, node_radius, scene_index, level_of_detail),
+                lambda surface : draw_overlay(surface, camera, input_manager, left_click_drag_node) + profiler.draw_overlay(surface))
+        profiler.mark("draw")
+        
+        # Labels for the next zoom levels are rendered while waiting for the next frame
+        label_cache.process_pending()
+        profiler.mark("labels")
         
         # Cap the frame rate and get the time in seconds between frames
-        delta_time = clock.tick(FPS) / 1000
-
-    # Clean up Pygame resources
+        if replay is None:
+            delta_time = clock.tick(FPS) / 1000
+        profiler.mark("wait")
+        profiler.end_frame()
+
+    simulation.stop()
+    profiler.dump()
+    if recorder is not None:
+        recorder.close()
+    
+    # Clean up Pygame resources. Labels and fonts belong to this pygame session
+    label_cache.clear()
+    label_cache.fonts.clear()
     pygame.quit()
 
 
-def draw_graph(screen, graph:Graph[Node], camera:Camera, input_manager:Input, node_radius:int, left_drag_start_node:Node):
-    # Define colors (RGB)
-    WHITE = (255, 255, 255)
-    RED = (255, 40, 40)
-    BLUE = (40, 40, 255)
+# Colors (RGB)
+WHITE = (255, 255, 255)
+RED = (255, 40, 40)
+BLUE = (40, 40, 255)
 
-    # Initialize font (using default font with size 24)
-    font_size = 24
+# Default font size, scaled by the zoom
+FONT_SIZE = 24
 
-    # Fill the screen with white color (clears previous frame)
-    screen.fill(WHITE)    
+def draw_scene(surface, graph:Graph[Node], camera:Camera, node_radius:int, scene_index:SceneIndex = None, level_of_detail:LevelOfDetail = None):
+    """Draws the edges, nodes and labels of the graph, everything that doesn't follow the mouse."""
+    # Fill the surface with white color (clears previous frame)
+    surface.fill(WHITE)
     
     node_radius_pixels = node_radius * camera.zoom_level
     arrow_head_length_pixels = 15 * camera.zoom_level
     
-    # Update the start of the dragging line point if it's dragging a node and draw said line
-    if input_manager.is_long_pressed(1):
-        if left_drag_start_node != None:
-            start_pos = camera.world_to_screen(left_drag_start_node.pos)
-        else:
-            start_pos = input_manager.get_button(1).start_mouse_pos
-        
-        visualizer.DrawArrow.draw_arrow(screen, start_pos, input_manager.mouse_pos, BLUE, width=2, head_length=arrow_head_length_pixels)
-        
+    components = graph.connected_components
+    
+    # Only the nodes and edges inside the window are drawn
+    if scene_index is None:
+        scene_index = SceneIndex()
+        scene_index.update(graph)
+    
+    # Draw every component. This will let you draw each component in a different color
+    n_components = len(components)
+    if n_components > len(component_colors):
+        generate_colors(n_components - len(component_colors))
+    
+    if level_of_detail is not None and level_of_detail.active(camera):
+        level_of_detail.draw(surface, scene_index, camera, component_colors, BLUE, node_radius_pixels)
+        return
     
     # Find cut vertices to draw them on a different color
     if len(graph.vertices) > 0:
         cut_vertices = graph.cut_vertices
     
+    # Labels are wider than the nodes, so they get a wide margin
+    margin = max(1.1 * node_radius_pixels, 6 * FONT_SIZE * camera.zoom_level)
+    visible_nodes, visible_edges = scene_index.visible(camera, margin)
+    
+    vertices = scene_index.vertices
+    screen_positions = camera.world_to_screen_many(scene_index.positions[visible_nodes]).tolist()
+    nodes = [(scene_index.component(i), vertices[i], tuple(pos)) for i, pos in zip(visible_nodes.tolist(), screen_positions)]
     
     # Draw edges
-    is_directed = graph.is_directed
-    for n1 in graph.vertices:
-        for n2 in graph.adjacent_vertices(n1):
-            start = camera.world_to_screen(n1.pos)
-            end = camera.world_to_screen(n2.pos)
-            
-            if is_directed:
-                diff = end-start
-                dist = diff.magnitude
-                
-                if dist <= 0.001:
-                    continue
-                dir_vec = diff / dist
-
-                # We end the arrow at the circunference of each node
-                length = max(0.0, dist - node_radius_pixels)
-                
-                end = start + dir_vec * length
-                
-                visualizer.DrawArrow.draw_arrow(screen, start, end,
-                    BLUE, width=2, head_length=arrow_head_length_pixels)
-            else:
-                pygame.draw.line(screen, BLUE, tuple(start), tuple(end), width=2)
+    visualizer.EdgeRenderer.draw_edges(surface, scene_index, camera, BLUE, graph.is_directed, visible_edges,
+        width=2, node_radius=node_radius_pixels, head_length=arrow_head_length_pixels)
     
-    # Draw every component. This will let you draw each component in a different color
-    components = graph.connected_components
-    n_components = len(components)
-    if n_components > len(component_colors):
-        generate_colors(n_components - len(component_colors))
+    label_size = FONT_SIZE * camera.zoom_level
+    labels : list[str] = []
+    for i, n1, screen_pos in nodes:
+        color = n1.color or component_colors[i]
+        if n1 in cut_vertices:
+            pygame.draw.circle(surface, RED, screen_pos, 1.1 * node_radius_pixels)
+            pygame.draw.circle(surface, color, screen_pos, 0.85 * node_radius_pixels)
+        else:
+            pygame.draw.circle(surface, color, screen_pos, node_radius_pixels)
+        
+        # If zoomed out skip text
+        if camera.zoom_level < 0.5:
+            continue
+        
+        # Render the text for each node, or reuse it
+        label = str(n1.value)
+        labels.append(label)
+        text_surface = label_cache.get(label, label_size)
+        
+        # Calculate the position to center the text on the node
+        text_rect = text_surface.get_rect(center=screen_pos)
+        
+        # Blit (draw) the text surface on the surface
+        surface.blit(text_surface, text_rect)
     
-    for i in range(len(components)):
-        for n1 in components[i]:       
-            if n1 in cut_vertices:
-                pygame.draw.circle(screen, RED, tuple(camera.world_to_screen(n1.pos)), 1.1 * node_radius_pixels)
-                pygame.draw.circle(screen, component_colors[i], tuple(camera.world_to_screen(n1.pos)), 0.85 * node_radius_pixels)
-            else:
-                pygame.draw.circle(screen, component_colors[i], tuple(camera.world_to_screen(n1.pos)), node_radius_pixels)
-            
-            # If zoomed out skip text
-            if camera.zoom_level < 0.5:
-                continue
-            
-            if n1 not in text_surfaces:
-                 # Render the text for each node
-                font = pygame.font.Font(None, int(font_size * camera.zoom_level))
-                text_surface = font.render(str(n1.value), True, (0, 0, 0))
-                text_surfaces[n1] = text_surface
-            else:
-                text_surface = text_surfaces[n1]
-                
-            # Calculate the position to center the text on the node
-            text_rect = text_surface.get_rect(center=tuple(camera.world_to_screen(n1.pos)))
-            
-            # Blit (draw) the text surface on the screen
-            screen.blit(text_surface, text_rect)
+    # The labels one zoom step in and out are rendered ahead of time
+    if labels:
+        label_cache.prewarm(labels, label_size * SIZE_BUCKET_RATIO)
+        label_cache.prewarm(labels, label_size / SIZE_BUCKET_RATIO)
+
+def draw_overlay(surface, camera:Camera, input_manager:Input, left_drag_start_node:Node) -> list[pygame.Rect]:
+    """Draws what follows the mouse on top of the scene. Returns the rects it drew on."""
+    rects : list[pygame.Rect] = []
+    
+    # Update the start of the dragging line point if it's dragging a node and draw said line
+    if input_manager.is_long_pressed(1):
+        if left_drag_start_node != None:
+            start_pos = camera.world_to_screen(left_drag_start_node.pos)
+        else:
+            start_pos = input_manager.get_button(1).start_mouse_pos
+        
+        arrow_head_length_pixels = 15 * camera.zoom_level
+        rects.append(visualizer.DrawArrow.draw_arrow(surface, start_pos, input_manager.mouse_pos, BLUE, width=2, head_length=arrow_head_length_pixels))
+    
+    return rects
 
+def draw_graph(screen, graph:Graph[Node], camera:Camera, input_manager:Input, node_radius:int, left_drag_start_node:Node, scene_index:SceneIndex = None, level_of_detail:LevelOfDetail = None, flip:bool = True):
+    """Draws a whole frame. Without 'flip' the display isn't updated, so 'screen' can be any surface."""
+    draw_scene(screen, graph, camera, node_radius, scene_index, level_of_detail)
+    draw_overlay(screen, camera, input_manager, left_drag_start_node)
     
     # Update the display
-    pygame.display.flip()
+    if flip:
+        pygame.display.flip()
 
 if __name__ == "__main__":
     main(Graph())
\ No newline at end of file
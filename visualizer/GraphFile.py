@@ -0,0 +1,235 @@
+"""
+Binary graph format.
+
+    magic (8 bytes) | format version (u32) | header length (u32) | JSON header | arrays
+
+Every array starts at a 64 byte aligned offset given in the header, so they can
+be opened with numpy.memmap and read lazily. The adjacency is stored in CSR form:
+the neighbors of the i-th vertex are indices[indptr[i]:indptr[i+1]].
+"""
+
+from __future__ import annotations
+import json
+import struct
+
+import numpy as np
+
+from graph.Graph import Graph
+from visualizer.Node import Node
+import visualizer.NodeStore
+
+MAGIC = b"GRAPHBIN"
+FORMAT_VERSION = 1
+_ALIGNMENT = 64
+_PREFIX = struct.Struct("<8sII")
+
+def _value_kind(values : list) -> str:
+    if all(type(v) is int for v in values):
+        return "int"
+    if all(type(v) is str for v in values):
+        return "str"
+    raise TypeError("Only graphs with int or str vertex values can be saved")
+
+# Weights of several of these types are saved as floats, with the index of the type of every weight
+_WEIGHT_KINDS = {bool : "bool", int : "int", float : "float"}
+_WEIGHT_DTYPES = {"bool" : np.bool_, "int" : np.int64, "float" : np.float64, "mixed" : np.float64}
+
+def _weight_kinds(weights : list) -> tuple[str, np.ndarray | None]:
+    """The kind of the weights, and the kind of every weight if they are mixed"""
+    kinds = [_WEIGHT_KINDS.get(type(w)) for w in weights]
+    if None in kinds:
+        raise TypeError("Only graphs with bool, int or float weights can be saved")
+    if len(set(kinds)) <= 1:
+        return kinds[0] if kinds else "bool", None
+    if any(type(w) is int and float(w) != w for w in weights):
+        raise TypeError("Int weights mixed with other types are saved as floats, and must be exact as floats")
+    names = list(_WEIGHT_KINDS.values())
+    return "mixed", np.array([names.index(kind) for kind in kinds], dtype=np.uint8)
+
+def save_graph(filename : str, graph : Graph) -> None:
+    """
+    Saves the graph to 'filename'. If the vertices are Nodes their positions are
+    saved too, otherwise the vertices themselves are stored as values.
+    """
+    vertices = graph.vertices
+    has_positions = all(isinstance(v, Node) for v in vertices) and len(vertices) > 0
+    values = [v.value for v in vertices] if has_positions else list(vertices)
+    index = {v : i for i, v in enumerate(vertices)}
+
+    indptr = np.zeros(len(vertices) + 1, dtype=np.int64)
+    indices : list[int] = []
+    weights : list = []
+    for i, v in enumerate(vertices):
+        for u in graph.adjacent_vertices(v):
+            indices.append(index[u])
+            weights.append(graph.get_connection_weight(v, u))
+        indptr[i + 1] = len(indices)
+
+    value_kind = _value_kind(values)
+    weight_kind, weight_kinds = _weight_kinds(weights)
+    index_dtype = np.int32 if len(vertices) < 2**31 else np.int64
+
+    arrays : dict[str, np.ndarray] = {
+        "indptr" : indptr,
+        "indices" : np.array(indices, dtype=index_dtype),
+        "weights" : np.array(weights, dtype=_WEIGHT_DTYPES[weight_kind]),
+    }
+    if weight_kinds is not None:
+        arrays["weight_kinds"] = weight_kinds
+
+    if value_kind == "int":
+        arrays["values"] = np.array(values, dtype=np.int64)
+    else:
+        encoded = [v.encode("utf-8") for v in values]
+        arrays["value_offsets"] = np.cumsum([0] + [len(e) for e in encoded], dtype=np.int64)
+        arrays["value_bytes"] = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+    if has_positions:
+        positions = visualizer.NodeStore.positions_of(vertices)
+        arrays["x"] = np.ascontiguousarray(positions[:, 0])
+        arrays["y"] = np.ascontiguousarray(positions[:, 1])
+
+    header = {
+        "n_vertices" : len(vertices),
+        "n_edges" : len(indices),
+        "value_kind" : value_kind,
+        "weight_kind" : weight_kind,
+        "has_positions" : has_positions,
+        "arrays" : {},
+    }
+
+    # The offsets depend on the header length, which depends on the offsets.
+    # Reserving a fixed width for every offset makes the header length stable
+    for name, array in arrays.items():
+        header["arrays"][name] = {"dtype" : array.dtype.str, "shape" : list(array.shape), "offset" : 10**15}
+    header_length = len(json.dumps(header).encode("utf-8"))
+
+    offset = _PREFIX.size + header_length
+    for name, array in arrays.items():
+        offset += -offset % _ALIGNMENT
+        header["arrays"][name]["offset"] = offset
+        offset += array.nbytes
+
+    header_bytes = json.dumps(header).encode("utf-8").ljust(header_length)
+
+    with open(filename, "wb") as file:
+        file.write(_PREFIX.pack(MAGIC, FORMAT_VERSION, header_length))
+        file.write(header_bytes)
+        for name, array in arrays.items():
+            file.write(b"\0" * (header["arrays"][name]["offset"] - file.tell()))
+            file.write(array.tobytes())
+
+class GraphFile:
+    """
+    Graph saved with 'save_graph', opened without reading its contents.
+
+    The arrays are memory mapped, so opening is instant and only the pages that
+    are used get read. 'to_graph' builds the full Graph.
+    """
+    def __init__(self, filename : str) -> None:
+        self.__filename = filename
+
+        with open(filename, "rb") as file:
+            magic, version, header_length = _PREFIX.unpack(file.read(_PREFIX.size))
+            if magic != MAGIC:
+                raise ValueError(f"'{filename}' is not a graph file")
+            if version != FORMAT_VERSION:
+                raise ValueError(f"Unsupported graph file version {version}")
+            self.__header = json.loads(file.read(header_length))
+
+        self.__arrays : dict[str, np.ndarray] = {}
+
+    def array(self, name : str) -> np.ndarray | None:
+        """Returns the memory mapped array, or None if the file doesn't have it."""
+        if name not in self.__arrays:
+            info = self.__header["arrays"].get(name)
+            if info is None:
+                return None
+
+            shape = tuple(info["shape"])
+            if 0 in shape:
+                # numpy can't map empty regions
+                self.__arrays[name] = np.empty(shape, dtype=info["dtype"])
+            else:
+                self.__arrays[name] = np.memmap(self.__filename, dtype=info["dtype"], mode="r",
+                                                offset=info["offset"], shape=shape)
+        return self.__arrays[name]
+
+    @property
+    def n_vertices(self) -> int:
+        return self.__header["n_vertices"]
+
+    @property
+    def n_edges(self) -> int:
+        return self.__header["n_edges"]
+
+    @property
+    def has_positions(self) -> bool:
+        return self.__header["has_positions"]
+
+    @property
+    def indptr(self) -> np.ndarray:
+        return self.array("indptr")
+
+    @property
+    def indices(self) -> np.ndarray:
+        return self.array("indices")
+
+    @property
+    def weights(self) -> np.ndarray:
+        return self.array("weights")
+
+    @property
+    def x(self) -> np.ndarray | None:
+        return self.array("x")
+
+    @property
+    def y(self) -> np.ndarray | None:
+        return self.array("y")
+
+    def value(self, i : int) -> int | str:
+        if self.__header["value_kind"] == "int":
+            return int(self.array("values")[i])
+
+        offsets = self.array("value_offsets")
+        return self.array("value_bytes")[offsets[i]:offsets[i + 1]].tobytes().decode("utf-8")
+
+    def values(self) -> list[int | str]:
+        if self.__header["value_kind"] == "int":
+            return self.array("values").tolist()
+
+        offsets = self.array("value_offsets").tolist()
+        data = self.array("value_bytes").tobytes()
+        return [data[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(self.n_vertices)]
+
+    def neighbors(self, i : int) -> np.ndarray:
+        indptr = self.indptr
+        return self.indices[indptr[i]:indptr[i + 1]]
+
+    def to_graph(self, nodes : bool = True) -> Graph:
+        """
+        Builds the Graph. Its vertices are Nodes at the saved positions, unless the
+        file has no positions or 'nodes' is False, in which case they are the values.
+        """
+        values = self.values()
+        if nodes and self.has_positions:
+            vertices = visualizer.NodeStore.default_store.create_nodes(values, self.x, self.y)
+        else:
+            vertices = values
+
+        indptr = self.indptr.tolist()
+        indices = self.indices.tolist()
+        weights = self.weights.tolist()
+        if self.__header["weight_kind"] == "mixed":
+            types = list(_WEIGHT_KINDS)
+            weights = [types[kind](w) for kind, w in zip(self.array("weight_kinds").tolist(), weights)]
+
+        adjacency = {}
+        for i, v in enumerate(vertices):
+            start, end = indptr[i], indptr[i + 1]
+            adjacency[v] = {vertices[j] : w for j, w in zip(indices[start:end], weights[start:end])}
+
+        return Graph(adjacency)
+
+def load_graph(filename : str, nodes : bool = True) -> Graph:
+    return GraphFile(filename).to_graph(nodes)
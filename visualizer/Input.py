@@ -7,6 +7,7 @@ class Input():
         self.buttons : dict[int, Button | MouseButton]= {}
         self.__mouse_pos : Vector2 = Vector2.ZERO
         self.__last_mouse_pos : Vector2 = Vector2.ZERO
+        self.__moved = False
     
     @property
     def mouse_pos(self):
@@ -14,8 +15,14 @@ class Input():
     
     @property
     def last_mouse_pos(self):
+        """Where the mouse was before the last update"""
         return self.__last_mouse_pos
     
+    @property
+    def moved(self) -> bool:
+        """Whether the mouse moved in the last update"""
+        return self.__moved
+    
     def is_pressed(self, key_code):
         if key_code in self.buttons:
             return self.buttons[key_code].pressed
@@ -29,10 +36,13 @@ class Input():
             return self.buttons[key_code]
     
     def update(self, delta_time, events):
+        # All the motion of a frame counts as a single move, from where the mouse was to where it ended
+        self.__last_mouse_pos = self.__mouse_pos
+        self.__moved = False
         for event in events:
             if event.type == pygame.MOUSEMOTION:
-                self.__last_mouse_pos = self.__mouse_pos
-                self.__mouse_pos = Vector2(*pygame.mouse.get_pos())
+                self.__mouse_pos = Vector2(*event.pos)
+                self.__moved = True
             
             elif event.type == pygame.KEYDOWN:
                 key_code = event.key
@@ -45,6 +55,8 @@ class Input():
                     self.buttons[key_code].release()
             
             elif event.type == pygame.MOUSEBUTTONDOWN:
+                # Presses start where the button went down, even if no motion was reported there
+                self.__mouse_pos = Vector2(*event.pos)
                 mouse_button = event.button 
                 if mouse_button in self.buttons:
                     self.buttons[mouse_button].press()
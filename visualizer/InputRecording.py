@@ -0,0 +1,82 @@
+"""
+Recording of input sessions to a file, and replaying them.
+
+Every frame is one JSON line with the time it lasted and the input events it
+had, so a replay feeds the viewer the same events with the same frame times,
+whatever the machine, and can run headless as a reproducible workload.
+"""
+from typing import Iterator, TextIO
+import json
+
+import pygame
+
+# Events kept and the attributes they need
+RECORDED_EVENTS : dict[int, tuple[str, ...]] = {
+    pygame.QUIT : (),
+    pygame.MOUSEMOTION : ("pos", "rel", "buttons"),
+    pygame.MOUSEBUTTONDOWN : ("pos", "button"),
+    pygame.MOUSEBUTTONUP : ("pos", "button"),
+    pygame.MOUSEWHEEL : ("x", "y"),
+    pygame.KEYDOWN : ("key", "mod"),
+    pygame.KEYUP : ("key", "mod"),
+    pygame.WINDOWSIZECHANGED : ("x", "y"),
+}
+
+def encode_event(event : pygame.event.Event) -> dict | None:
+    """The event as JSON, or None if it isn't recorded"""
+    attributes = RECORDED_EVENTS.get(event.type)
+    if attributes is None:
+        return None
+    encoded = {"type" : pygame.event.event_name(event.type)}
+    for name in attributes:
+        value = getattr(event, name)
+        encoded[name] = list(value) if isinstance(value, tuple) else value
+    return encoded
+
+_EVENT_TYPES = {pygame.event.event_name(t) : t for t in RECORDED_EVENTS}
+
+def decode_event(encoded : dict) -> pygame.event.Event:
+    attributes = {name : tuple(value) if isinstance(value, list) else value
+                  for name, value in encoded.items() if name != "type"}
+    return pygame.event.Event(_EVENT_TYPES[encoded["type"]], attributes)
+
+class InputRecorder:
+    """Writes the events of every frame to a file, given with 'record'."""
+    def __init__(self, file : str | TextIO) -> None:
+        self.__owned = isinstance(file, str)
+        self.file = open(file, "w") if self.__owned else file
+        self.frames = 0
+
+    def record(self, delta_time : float, events : list[pygame.event.Event]) -> None:
+        encoded = [e for e in map(encode_event, events) if e is not None]
+        self.file.write(json.dumps({"delta_time" : delta_time, "events" : encoded}) + "\n")
+        self.frames += 1
+
+    def close(self) -> None:
+        if self.__owned:
+            self.file.close()
+        else:
+            self.file.flush()
+
+    def __enter__(self) -> "InputRecorder":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+class InputPlayer:
+    """Reads a recording back, one (delta_time, events) pair per frame."""
+    def __init__(self, file : str | TextIO) -> None:
+        if isinstance(file, str):
+            with open(file) as f:
+                lines = f.readlines()
+        else:
+            lines = file.readlines()
+        self.__frames = [json.loads(line) for line in lines if line.strip()]
+
+    def __len__(self) -> int:
+        return len(self.__frames)
+
+    def __iter__(self) -> Iterator[tuple[float, list[pygame.event.Event]]]:
+        for frame in self.__frames:
+            yield frame["delta_time"], [decode_event(e) for e in frame["events"]]
@@ -0,0 +1,125 @@
+from collections import OrderedDict, deque
+import math
+import time
+
+import pygame
+from pygame.surface import Surface
+
+# Font sizes are rounded to one of 8 sizes per doubling
+SIZE_BUCKET_RATIO = 2 ** (1 / 8)
+
+class FontPool:
+    """
+    One pygame font per size, shared by every label of that size. Fonts don't
+    outlive pygame.quit(), even if pygame is initialized again, so they are
+    dropped when it quits.
+    """
+    def __init__(self, name : str = None) -> None:
+        self.name = name
+        self.__fonts : dict[int, pygame.font.Font] = {}
+        self.__quit_registered = False
+
+    def __on_quit(self) -> None:
+        self.__quit_registered = False
+        self.__fonts.clear()
+
+    def get(self, size : int) -> pygame.font.Font:
+        if not pygame.font.get_init():
+            # Using a font of an earlier pygame session crashes
+            self.__fonts.clear()
+            pygame.font.init()
+        font = self.__fonts.get(size)
+        if font is None:
+            font = pygame.font.Font(self.name, size)
+            self.__fonts[size] = font
+            if not self.__quit_registered:
+                pygame.register_quit(self.__on_quit)
+                self.__quit_registered = True
+        return font
+
+    def clear(self) -> None:
+        self.__fonts.clear()
+
+def size_bucket(size : float) -> int:
+    return round(math.log(max(size, 1), SIZE_BUCKET_RATIO))
+
+def bucket_size(bucket : int) -> int:
+    """Font size every size in the bucket is rendered with"""
+    return max(1, round(SIZE_BUCKET_RATIO ** bucket))
+
+class LabelCache:
+    """
+    Rendered labels keyed by (text, size bucket), so a label is rendered again
+    when the zoom changes its size enough, and shared by every node with the same text.
+
+    The least recently used labels are evicted once the surfaces take more than
+    'max_bytes'. Labels that will probably be needed soon can be queued with
+    'prewarm' and rendered between frames by 'process_pending'.
+    """
+    def __init__(self, max_bytes : int = 8 * 1024 * 1024, color : tuple[int, int, int] = (0, 0, 0), fonts : FontPool = None) -> None:
+        self.max_bytes = max_bytes
+        self.color = color
+        self.fonts = fonts if fonts is not None else FontPool()
+
+        self.__labels : OrderedDict[tuple[str, int], Surface] = OrderedDict()
+        self.__bytes = 0
+        self.__pending : deque[tuple[str, int]] = deque()
+        self.__pending_keys : set[tuple[str, int]] = set()
+
+    def __len__(self) -> int:
+        return len(self.__labels)
+
+    @property
+    def bytes(self) -> int:
+        return self.__bytes
+
+    @property
+    def pending(self) -> int:
+        return len(self.__pending)
+
+    def __render(self, key : tuple[str, int]) -> Surface:
+        text, bucket = key
+        surface = self.fonts.get(bucket_size(bucket)).render(text, True, self.color)
+        self.__labels[key] = surface
+        self.__bytes += surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+        while self.__bytes > self.max_bytes and len(self.__labels) > 1:
+            _, evicted = self.__labels.popitem(last=False)
+            self.__bytes -= evicted.get_width() * evicted.get_height() * evicted.get_bytesize()
+        return surface
+
+    def get(self, text : str, size : float) -> Surface:
+        """The label rendered at the size of the bucket 'size' falls in, rendering it if needed"""
+        key = (text, size_bucket(size))
+        surface = self.__labels.get(key)
+        if surface is None:
+            return self.__render(key)
+        self.__labels.move_to_end(key)
+        return surface
+
+    def prewarm(self, texts, size : float) -> None:
+        """Queues the labels that aren't cached yet to be rendered by 'process_pending'"""
+        bucket = size_bucket(size)
+        for text in texts:
+            key = (text, bucket)
+            if key not in self.__labels and key not in self.__pending_keys:
+                self.__pending.append(key)
+                self.__pending_keys.add(key)
+
+    def process_pending(self, time_budget : float = 0.002) -> int:
+        """Renders queued labels until 'time_budget' seconds have passed. Returns how many were rendered."""
+        deadline = time.perf_counter() + time_budget
+        rendered = 0
+        while self.__pending and time.perf_counter() < deadline:
+            key = self.__pending.popleft()
+            self.__pending_keys.discard(key)
+            if key not in self.__labels:
+                self.__render(key)
+                rendered += 1
+        return rendered
+
+    def clear(self) -> None:
+        self.__labels.clear()
+        self.__bytes = 0
+        self.__pending.clear()
+        self.__pending_keys.clear()
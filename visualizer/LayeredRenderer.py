@@ -0,0 +1,66 @@
+from typing import Callable, Hashable
+
+import pygame
+from pygame.surface import Surface
+
+class LayeredRenderer:
+    """
+    Draws a frame as a scene layer (edges, nodes and labels) with overlays on top
+    (like the arrow of a new edge).
+
+    While the scene is static, it is drawn once to an offscreen surface. Later
+    frames with the same key only restore the scene under the last overlays, draw
+    the new ones and update those rects of the display. When there are no
+    overlays nothing is drawn at all.
+    """
+    def __init__(self) -> None:
+        self.__scene : Surface = None
+        self.__scene_key : Hashable = None
+        self.__overlay_rects : list[pygame.Rect] = []
+
+    def invalidate(self) -> None:
+        self.__scene_key = None
+
+    def draw(
+        self,
+        screen : Surface,
+        key : Hashable,
+        static : bool,
+        draw_scene : Callable[[Surface], None],
+        draw_overlay : Callable[[Surface], list[pygame.Rect]]
+    ) -> bool:
+        """
+        'key' must change whenever the scene would look different, and 'static'
+        be false while it changes every frame. Returns whether the display was updated.
+        """
+        if not static:
+            # Caching a scene that won't be drawn again is wasted work
+            self.__scene_key = None
+            draw_scene(screen)
+            self.__overlay_rects = draw_overlay(screen)
+            pygame.display.flip()
+            return True
+
+        if self.__scene is None or self.__scene.get_size() != screen.get_size():
+            self.__scene = Surface(screen.get_size())
+            self.__scene_key = None
+
+        if key != self.__scene_key:
+            draw_scene(self.__scene)
+            self.__scene_key = key
+            screen.blit(self.__scene, (0, 0))
+            self.__overlay_rects = draw_overlay(screen)
+            pygame.display.flip()
+            return True
+
+        # Only the overlays can have changed
+        dirty = self.__overlay_rects
+        for rect in dirty:
+            screen.blit(self.__scene, rect, rect)
+        self.__overlay_rects = draw_overlay(screen)
+        dirty = dirty + self.__overlay_rects
+        if not dirty:
+            return False
+
+        pygame.display.update(dirty)
+        return True
@@ -0,0 +1,121 @@
+import math
+
+import numpy as np
+import pygame
+
+from physics.SpatialGrid import cell_keys
+from visualizer.Camera import Camera
+from visualizer.SceneIndex import SceneIndex
+
+class Clusters:
+    """Nodes of a scene grouped by the grid cell they are in."""
+    def __init__(self, cell_size : float, node_cluster : np.ndarray, centroids : np.ndarray,
+                 counts : np.ndarray, components : np.ndarray) -> None:
+        self.cell_size = cell_size
+        # Cluster of every vertex of the scene
+        self.node_cluster = node_cluster
+        # Mean position, number of nodes and most common component of every cluster
+        self.centroids = centroids
+        self.counts = counts
+        self.components = components
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+class LevelOfDetail:
+    """
+    Below 'cluster_zoom' the nodes are drawn as one glyph per grid cell, and the
+    edges between two cells as a single line whose width grows with the number of
+    edges it bundles. Edges inside a cell aren't drawn.
+
+    Cells are 'cell_pixels' to twice that wide on screen, with their world size
+    doubling every time the zoom halves, so each zoom level is a level of a
+    quadtree. The glyphs on screen are bounded by the number of cells that fit in
+    the window, and the bundles by 'max_bundles'.
+    """
+    def __init__(self, cluster_zoom : float = 0.35, cell_pixels : float = 48, max_bundles : int = 1024) -> None:
+        self.cluster_zoom = cluster_zoom
+        self.cell_pixels = cell_pixels
+        self.max_bundles = max_bundles
+
+    def active(self, camera : Camera) -> bool:
+        return camera.zoom_level < self.cluster_zoom
+
+    def cell_size(self, zoom : float) -> float:
+        """World size of the cells at a zoom level"""
+        return self.cell_pixels * 2 ** math.ceil(math.log2(1 / zoom))
+
+    def clusters(self, scene_index : SceneIndex, zoom : float) -> Clusters:
+        cell_size = self.cell_size(zoom)
+        positions = scene_index.positions
+        cells = np.floor(positions / cell_size).astype(np.int64)
+        keys = cell_keys(cells[:, 0], cells[:, 1])
+        _, node_cluster, counts = np.unique(keys, return_inverse=True, return_counts=True)
+        node_cluster = node_cluster.reshape(-1)
+
+        n_clusters = len(counts)
+        centroids = np.empty((n_clusters, 2))
+        centroids[:, 0] = np.bincount(node_cluster, positions[:, 0], n_clusters) / counts
+        centroids[:, 1] = np.bincount(node_cluster, positions[:, 1], n_clusters) / counts
+
+        # The most common component of each cluster gives its color
+        components = scene_index.components
+        n_components = int(components.max()) + 1 if len(components) > 0 else 1
+        pairs, pair_counts = np.unique(node_cluster * n_components + components, return_counts=True)
+        pair_clusters = pairs // n_components
+        order = np.lexsort((pair_counts, pair_clusters))
+        last_of_cluster = np.append(pair_clusters[order][1:] != pair_clusters[order][:-1], True)
+        cluster_components = np.zeros(n_clusters, dtype=np.int64)
+        cluster_components[pair_clusters[order][last_of_cluster]] = (pairs % n_components)[order][last_of_cluster]
+
+        return Clusters(cell_size, node_cluster, centroids, counts, cluster_components)
+
+    def bundles(self, scene_index : SceneIndex, clusters : Clusters) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """The two clusters and number of edges of every pair of clusters joined by an edge"""
+        sources, targets = scene_index.edges
+        a, b = clusters.node_cluster[sources], clusters.node_cluster[targets]
+        between = a != b
+        a, b = np.minimum(a, b)[between], np.maximum(a, b)[between]
+
+        pairs, counts = np.unique(a * len(clusters) + b, return_counts=True)
+        return pairs // len(clusters), pairs % len(clusters), counts
+
+    def draw(
+        self,
+        surface : pygame.Surface,
+        scene_index : SceneIndex,
+        camera : Camera,
+        colors : list[tuple[int, int, int]],
+        edge_color : pygame.Color,
+        node_radius : float
+    ) -> None:
+        """Draws the clusters of the scene. 'node_radius' is in screen pixels."""
+        if len(scene_index.vertices) == 0:
+            return
+
+        clusters = self.clusters(scene_index, camera.zoom_level)
+        centers = camera.world_to_screen_many(clusters.centroids)
+        cell_pixels = clusters.cell_size * camera.zoom_level
+        radii = np.clip(node_radius * np.sqrt(clusters.counts), node_radius, cell_pixels / 3)
+
+        window_width, window_height = camera.window_size
+        on_screen = ((centers[:, 0] + radii >= 0) & (centers[:, 0] - radii <= window_width) &
+                     (centers[:, 1] + radii >= 0) & (centers[:, 1] - radii <= window_height))
+
+        # Bundles with a box outside the window are skipped, and only the largest ones are kept
+        a, b, counts = self.bundles(scene_index, clusters)
+        start, end = centers[a], centers[b]
+        in_window = ((np.maximum(start[:, 0], end[:, 0]) >= 0) & (np.minimum(start[:, 0], end[:, 0]) <= window_width) &
+                     (np.maximum(start[:, 1], end[:, 1]) >= 0) & (np.minimum(start[:, 1], end[:, 1]) <= window_height))
+        start, end, counts = start[in_window], end[in_window], counts[in_window]
+        if len(counts) > self.max_bundles:
+            largest = np.argpartition(counts, -self.max_bundles)[-self.max_bundles:]
+            start, end, counts = start[largest], end[largest], counts[largest]
+
+        widths = np.minimum(1 + np.log2(counts).astype(np.int64), int(cell_pixels / 4) + 1)
+        for p1, p2, width in zip(start.tolist(), end.tolist(), widths.tolist()):
+            pygame.draw.line(surface, edge_color, p1, p2, width)
+
+        components = clusters.components.tolist()
+        for i, center, radius in zip(np.flatnonzero(on_screen).tolist(), centers[on_screen].tolist(), radii[on_screen].tolist()):
+            pygame.draw.circle(surface, colors[components[i]], center, radius)
@@ -0,0 +1,261 @@
+import math
+
+import pygame
+
+from graph.Graph import Graph
+from graph.Metrics import Metrics
+from visualizer.Input import Input
+from visualizer.Node import Node
+from visualizer.Camera import Camera
+from visualizer.SceneIndex import SceneIndex
+from visualizer.LevelOfDetail import LevelOfDetail
+from visualizer.LayeredRenderer import LayeredRenderer
+from physics.Simulation import Simulation
+from physics.SimulationPool import SimulationPool
+import visualizer.GraphDrawer
+from visualizer.GraphDrawer import LEFT_MOUSE_BUTTON, MIDDLE_MOUSE_BUTTON, RIGHT_MOUSE_BUTTON, SETTLED_SPEED
+
+FPS = 60
+# Graphs on screen that aren't under the mouse tick once every this many ticks
+BACKGROUND_DIVISOR = 4
+TITLE_SIZE = 20
+BORDER = (200, 200, 200)
+ACTIVE_BORDER = (40, 40, 255)
+
+# Events with a position, which is made relative to the tile they go to
+_POSITIONED_EVENTS = (pygame.MOUSEMOTION, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP)
+
+class GraphTile:
+    """
+    One graph of the viewer, drawn in 'rect' of the window, with its own camera,
+    input and simulation. The scene is cached on a surface of its own, so tiles
+    that don't change aren't drawn again when others do.
+    """
+    def __init__(self, name : str, graph : Graph[Node], metrics : Metrics = None, node_radius : int = 20) -> None:
+        self.name = name
+        self.graph = graph
+        self.node_radius = node_radius
+        self.rect = pygame.Rect(0, 0, 1, 1)
+
+        self.camera = Camera((1, 1))
+        self.scene_index = SceneIndex()
+        self.level_of_detail = LevelOfDetail()
+        self.simulation = Simulation(graph, FPS, metrics=metrics)
+        self.input = Input()
+        self.drag_node : Node = None
+        self.camera_moving = False
+
+        self.__scene_tick = -1
+        self.__scene_interpolated = False
+        self.__surface : pygame.Surface = None
+        self.__surface_key = None
+
+        self.input.add_mouse_button(LEFT_MOUSE_BUTTON, short_press_threshold=0.2)
+        self.input.add_mouse_button(MIDDLE_MOUSE_BUTTON, 0.2)
+        self.input.add_mouse_button(RIGHT_MOUSE_BUTTON, 0.2)
+        self.input.add_press_function(LEFT_MOUSE_BUTTON, self.__on_left_press)
+        self.input.add_short_release_function(LEFT_MOUSE_BUTTON, self.__on_left_click)
+        self.input.add_long_release_function(LEFT_MOUSE_BUTTON, self.__on_left_drag_stop)
+        self.input.add_short_release_function(RIGHT_MOUSE_BUTTON, self.__on_right_click)
+
+    # Input handling, with the same controls as GraphDrawer. Changes are sent to the simulation
+    def __node_at(self, screen_pos, distance : float) -> Node | None:
+        x, y = self.camera.screen_to_world(screen_pos)
+        return visualizer.GraphDrawer.collides_with_any_node(x, y, self.graph, distance, self.scene_index)
+
+    def __on_left_press(self):
+        self.drag_node = self.__node_at(self.input.mouse_pos, self.node_radius)
+
+    def __on_left_click(self):
+        if self.__node_at(self.input.mouse_pos, 2 * self.node_radius) is None:
+            x, y = self.camera.screen_to_world(self.input.mouse_pos)
+            self.simulation.submit(lambda graph : graph.add(Node(len(graph.vertices), x, y)))
+
+    def __on_right_click(self):
+        node = self.__node_at(self.input.mouse_pos, self.node_radius)
+        if node is not None:
+            self.simulation.remove(node)
+
+    def __on_left_drag_stop(self, start_pos, end_pos):
+        if self.drag_node is not None:
+            end_node = self.__node_at(end_pos, self.node_radius)
+            if end_node is not None and end_node != self.drag_node:
+                self.simulation.connect(self.drag_node, end_node, 1)
+
+    @property
+    def busy(self) -> bool:
+        """Whether a mouse button is held on the tile, which keeps the mouse captured by it"""
+        return any(self.input.is_pressed(button) for button in (LEFT_MOUSE_BUTTON, MIDDLE_MOUSE_BUTTON, RIGHT_MOUSE_BUTTON))
+
+    def resize(self, rect : pygame.Rect) -> None:
+        self.rect = pygame.Rect(rect)
+        self.camera.window_size = self.rect.size
+
+    def update(self, delta_time : float, events : list[pygame.event.Event]) -> None:
+        """Input of a frame, with positions relative to the tile"""
+        with self.simulation.lock:
+            self.input.update(delta_time, events)
+            for event in events:
+                visualizer.GraphDrawer.handle_event(event, self.camera, self.graph, self.input, self.simulation, delta_time)
+            if self.input.moved:
+                visualizer.GraphDrawer.handle_mouse_motion(self.camera, self.graph, self.input, self.simulation, self.scene_index)
+
+        self.camera_moving = self.camera.follow(delta_time)
+        if self.input.is_long_pressed(LEFT_MOUSE_BUTTON) and self.drag_node is not None:
+            self.simulation.drag(self.drag_node, self.camera.screen_to_world(self.input.mouse_pos))
+        else:
+            self.simulation.drag(None, None)
+        self.simulation.settled_speed = SETTLED_SPEED / self.camera.zoom_level
+
+    def update_scene(self) -> tuple[tuple, bool]:
+        """Moves the scene index to the last positions. Returns the key of the scene and whether it is static."""
+        with self.simulation.lock:
+            snapshot, positions = self.simulation.interpolated()
+            settled = self.simulation.settled
+            if snapshot.version == self.graph.version and (snapshot.tick != self.__scene_tick or self.__scene_interpolated or not settled):
+                self.scene_index.update(self.graph, positions)
+                self.__scene_tick = snapshot.tick
+                self.__scene_interpolated = not settled
+            key = (self.graph.version, self.__scene_tick, tuple(self.camera.position), self.camera.zoom_level, self.rect.size)
+        return key, settled and not self.__scene_interpolated and not self.camera_moving
+
+    def draw_scene(self, surface : pygame.Surface, key : tuple) -> None:
+        """Draws the tile at its rect of 'surface', from its cached scene if 'key' didn't change"""
+        if self.__surface is None or self.__surface.get_size() != self.rect.size:
+            self.__surface = pygame.Surface(self.rect.size)
+            self.__surface_key = None
+        if key != self.__surface_key:
+            with self.simulation.lock:
+                visualizer.GraphDrawer.draw_scene(self.__surface, self.graph, self.camera, self.node_radius, self.scene_index, self.level_of_detail)
+            self.__surface_key = key
+        surface.blit(self.__surface, self.rect)
+
+    def draw_overlay(self, surface : pygame.Surface) -> list[pygame.Rect]:
+        rects = visualizer.GraphDrawer.draw_overlay(surface.subsurface(self.rect), self.camera, self.input, self.drag_node)
+        return [rect.move(self.rect.topleft).clip(self.rect) for rect in rects]
+
+def tile_rects(n_tiles : int, size : tuple[int, int], columns : int = None) -> list[pygame.Rect]:
+    """A grid of 'n_tiles' rects covering 'size', with 'columns' columns or as square as possible"""
+    if n_tiles == 0:
+        return []
+    columns = columns or math.ceil(math.sqrt(n_tiles))
+    rows = math.ceil(n_tiles / columns)
+    width, height = size
+    rects = []
+    for i in range(n_tiles):
+        row, column = divmod(i, columns)
+        left, top = column * width // columns, row * height // rows
+        right, bottom = (column + 1) * width // columns, (row + 1) * height // rows
+        # A pixel between tiles for the border
+        rects.append(pygame.Rect(left, top, max(right - left - 1, 1), max(bottom - top - 1, 1)))
+    return rects
+
+def main(graphs : dict[str, Graph[Node]], columns : int = None, metrics : Metrics = None) -> None:
+    """
+    Shows every graph in one window, as tiles of a grid. The tile under the mouse
+    gets the input, with the controls of GraphDrawer, and its simulation runs at
+    full rate. Other tiles tick every BACKGROUND_DIVISOR ticks.
+
+    F shows only the active graph, or the tiles again, and Tab and Shift+Tab go
+    through the graphs while only one is shown. Graphs that aren't shown are paused.
+    All the simulations are stepped by a single SimulationPool thread, and the
+    frame is drawn by a single LayeredRenderer, which only draws the tiles that changed.
+    """
+    pygame.init()
+    screen = pygame.display.set_mode((1200, 800), pygame.RESIZABLE)
+    pygame.display.set_caption("Graphs")
+
+    tiles = [GraphTile(name, graph, metrics) for name, graph in graphs.items()]
+    active = 0
+    # Only the active tile is shown while this is set
+    single = False
+    # Tile the mouse is held down on, which gets every mouse event until it is released
+    captured : GraphTile = None
+    mouse_pos = (0, 0)
+
+    def shown() -> list[GraphTile]:
+        return [tiles[active]] if single else tiles
+
+    def layout() -> None:
+        for tile, rect in zip(shown(), tile_rects(len(shown()), screen.get_size(), columns)):
+            tile.resize(rect)
+        renderer.invalidate()
+
+    def tile_at(pos : tuple[int, int]) -> int | None:
+        for tile in shown():
+            if tile.rect.collidepoint(pos):
+                return tiles.index(tile)
+        return None
+
+    renderer = LayeredRenderer()
+    pool = SimulationPool(FPS)
+    for tile in tiles:
+        pool.add(tile.simulation)
+    layout()
+    pool.start()
+
+    clock = pygame.time.Clock()
+    delta_time = 0
+    running = True
+    while running:
+        tile_events : dict[GraphTile, list[pygame.event.Event]] = {tile : [] for tile in tiles}
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.WINDOWSIZECHANGED:
+                layout()
+            elif event.type == pygame.WINDOWEXPOSED:
+                renderer.invalidate()
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_f:
+                single = not single
+                layout()
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_TAB and single and captured is None:
+                active = (active + (-1 if event.mod & pygame.KMOD_SHIFT else 1)) % len(tiles)
+                layout()
+            elif event.type in _POSITIONED_EVENTS or event.type == pygame.MOUSEWHEEL:
+                if event.type in _POSITIONED_EVENTS:
+                    mouse_pos = event.pos
+                # The mouse moves between tiles only while no button is held
+                if captured is None:
+                    under_mouse = tile_at(mouse_pos)
+                    if under_mouse is None:
+                        continue
+                    active = under_mouse
+                tile = captured or tiles[active]
+                if event.type in _POSITIONED_EVENTS:
+                    attributes = event.dict | {"pos" : (mouse_pos[0] - tile.rect.x, mouse_pos[1] - tile.rect.y)}
+                    event = pygame.event.Event(event.type, attributes)
+                tile_events[tile].append(event)
+
+        keys = []
+        static = True
+        for tile in tiles:
+            tile.update(delta_time, tile_events[tile])
+            captured = tile if tile.busy else (None if captured is tile else captured)
+
+            is_shown = tile in shown()
+            pool.set_divisor(tile.simulation, (1 if tile is tiles[active] else BACKGROUND_DIVISOR) if is_shown else 0)
+            if is_shown:
+                key, tile_static = tile.update_scene()
+                keys.append(key)
+                static = static and tile_static
+
+        def draw_scene(surface : pygame.Surface) -> None:
+            surface.fill(BORDER)
+            for tile, key in zip(shown(), keys):
+                tile.draw_scene(surface, key)
+                title = visualizer.GraphDrawer.label_cache.get(tile.name, TITLE_SIZE)
+                surface.blit(title, title.get_rect(topleft=(tile.rect.x + 6, tile.rect.y + 4)))
+            if not single:
+                pygame.draw.rect(surface, ACTIVE_BORDER, tiles[active].rect.inflate(2, 2), width=2)
+
+        renderer.draw(screen, (tuple(keys), active, single), static, draw_scene, tiles[active].draw_overlay)
+
+        visualizer.GraphDrawer.label_cache.process_pending()
+        delta_time = clock.tick(FPS) / 1000
+
+    pool.stop()
+    # Labels and fonts belong to this pygame session
+    visualizer.GraphDrawer.label_cache.clear()
+    visualizer.GraphDrawer.label_cache.fonts.clear()
+    pygame.quit()
@@ -1,24 +1,59 @@
+import sys
+
 from visualizer.Vector2 import Vector2
+from visualizer.NodeStore import NodeStore, default_store
 
 class Node[T]:
-    def __init__(self, value:T, x, y) -> None:
+    """
+    A vertex with a position. The position, velocity, pinned flag and colour
+    live in a slot of a NodeStore, 'default_store' unless another one is given.
+    """
+    __slots__ = ("__value", "__store", "__slot")
+    
+    def __init__(self, value:T, x, y, store:NodeStore = None) -> None:
         self.__value = value
-        self.x = x
-        self.y = y
+        self.__store = store if store is not None else default_store
+        self.__slot = self.__store.allocate(x, y)
+    
+    @classmethod
+    def _in_slot(cls, value:T, store:NodeStore, slot:int) -> 'Node[T]':
+        """
+        A node for a slot already allocated in 'store', for NodeStore.create_nodes.
+        The node releases the slot when collected, so a slot must only get one.
+        """
+        node = cls.__new__(cls)
+        node.__value = value
+        node.__store = store
+        node.__slot = slot
+        return node
+    
+    def __del__(self):
+        # Missing if __init__ failed
+        store = getattr(self, "_Node__store", None)
+        if store is not None:
+            store.release(self.__slot)
+    
+    @property
+    def store(self) -> NodeStore:
+        return self.__store
+    
+    @property
+    def slot(self) -> int:
+        return self.__slot
     
     @property
-    def x(self):
-        return self.__x
+    def x(self) -> float:
+        return self.__store.positions.item(self.__slot, 0)
     @x.setter
     def x(self, x):
-        self.__x = x
+        self.__store.positions[self.__slot, 0] = x
     
     @property
-    def y(self):
-        return self.__y
+    def y(self) -> float:
+        return self.__store.positions.item(self.__slot, 1)
     @y.setter
     def y(self, y):
-        self.__y = y
+        self.__store.positions[self.__slot, 1] = y
     
     @property
     def value(self) -> T:
@@ -29,11 +64,42 @@ class Node[T]:
     
     @property
     def pos(self):
-        return Vector2(self.x, self.y)
+        return Vector2(*self.__store.positions[self.__slot].tolist())
     @pos.setter
     def pos(self, pos : Vector2):
-        self.x = pos.x
-        self.y = pos.y
+        self.__store.positions[self.__slot] = (pos.x, pos.y)
+    
+    @property
+    def velocity(self) -> Vector2:
+        return Vector2(*self.__store.velocities[self.__slot].tolist())
+    @velocity.setter
+    def velocity(self, velocity : Vector2):
+        self.__store.velocities[self.__slot] = (velocity.x, velocity.y)
+    
+    @property
+    def pinned(self) -> bool:
+        """Pinned nodes are only moved by dragging them"""
+        return bool(self.__store.pinned[self.__slot])
+    @pinned.setter
+    def pinned(self, pinned : bool):
+        self.__store.pinned[self.__slot] = pinned
+    
+    @property
+    def color(self) -> tuple[int, int, int] | None:
+        """Drawn instead of the colour of its component, if set"""
+        r, g, b, a = self.__store.colors[self.__slot].tolist()
+        return (r, g, b) if a > 0 else None
+    @color.setter
+    def color(self, color : tuple[int, int, int] | None):
+        self.__store.colors[self.__slot] = (*color, 255) if color is not None else (0, 0, 0, 0)
+    
+    def __sizeof__(self) -> int:
+        # The node, its value and its share of the store, without the rest of the store
+        return object.__sizeof__(self) + sys.getsizeof(self.__value) + self.__store.slot_nbytes
+    
+    def __reduce__(self):
+        # Pickled without the store, unpickled into the default one
+        return (Node, (self.__value, self.x, self.y))
     
     def __eq__(self, other: object) -> bool:
         if type(other) is Node:
@@ -48,4 +114,4 @@ class Node[T]:
         return str(self.value)
     
     def __repr__(self) -> str:
-        return f"{self.value}"
\ No newline at end of file
+        return f"{self.value}"
@@ -0,0 +1,135 @@
+from typing import Sequence, TYPE_CHECKING
+import threading
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from visualizer.Node import Node
+
+class NodeStore:
+    """
+    Positions, velocities, pinned flags and colours of nodes, in contiguous NumPy
+    arrays with one slot (row) per node. Nodes are views of their slot, so
+    vectorized code can work on the arrays directly.
+
+    Slots of nodes that are garbage collected are reused. The arrays are
+    replaced by bigger ones when full, so they shouldn't be kept across allocations.
+    """
+    def __init__(self, capacity : int = 256) -> None:
+        self.positions = np.full((capacity, 2), np.nan)
+        self.velocities = np.zeros((capacity, 2))
+        self.pinned = np.zeros(capacity, dtype=bool)
+        # RGBA, nodes without a colour have an alpha of 0
+        self.colors = np.zeros((capacity, 4), dtype=np.uint8)
+
+        # Reentrant, since a node can be collected (and release its slot) in the middle of an allocation
+        self.__lock = threading.RLock()
+        self.__size = 0
+        self.__free : list[int] = []
+        # The same slots, to tell whether a slot is free
+        self.__free_set : set[int] = set()
+
+    @property
+    def capacity(self) -> int:
+        return len(self.positions)
+
+    def __len__(self) -> int:
+        """Slots in use"""
+        return self.__size - len(self.__free)
+
+    @property
+    def slot_nbytes(self) -> int:
+        """Bytes a single slot takes across all the arrays"""
+        return sum(array.nbytes // len(array) for array in (self.positions, self.velocities, self.pinned, self.colors))
+
+    def __grow(self, needed : int) -> None:
+        capacity = max(self.capacity * 2, needed)
+        def grown(array : np.ndarray, fill) -> np.ndarray:
+            new = np.full((capacity,) + array.shape[1:], fill, dtype=array.dtype)
+            new[:len(array)] = array
+            return new
+        self.positions = grown(self.positions, np.nan)
+        self.velocities = grown(self.velocities, 0)
+        self.pinned = grown(self.pinned, False)
+        self.colors = grown(self.colors, 0)
+
+    def __reset(self, slots : np.ndarray | int, x, y) -> None:
+        self.positions[slots, 0] = x
+        self.positions[slots, 1] = y
+        self.velocities[slots] = 0
+        self.pinned[slots] = False
+        self.colors[slots] = 0
+
+    def allocate(self, x : float, y : float) -> int:
+        """A free slot, at (x, y) and with every other field cleared"""
+        with self.__lock:
+            if self.__free:
+                slot = self.__free.pop()
+                self.__free_set.discard(slot)
+            else:
+                if self.__size == self.capacity:
+                    self.__grow(self.__size + 1)
+                slot = self.__size
+                self.__size += 1
+            self.__reset(slot, x, y)
+        return slot
+
+    def allocate_many(self, x : np.ndarray, y : np.ndarray) -> np.ndarray:
+        """Consecutive new slots for many nodes at once, at the given positions"""
+        n = len(x)
+        with self.__lock:
+            if self.__size + n > self.capacity:
+                self.__grow(self.__size + n)
+            slots = np.arange(self.__size, self.__size + n)
+            self.__size += n
+            self.__reset(slots, x, y)
+        return slots
+
+    def release(self, slot : int) -> None:
+        """Frees 'slot' for reuse. Slots that are already free are left alone, so they can't be handed out twice."""
+        with self.__lock:
+            if slot in self.__free_set:
+                return
+            self.positions[slot] = np.nan
+            self.__free.append(slot)
+            self.__free_set.add(slot)
+
+    def create_nodes[T](self, values : Sequence[T], x : np.ndarray, y : np.ndarray) -> list["Node[T]"]:
+        """Nodes for many values at once, stored in this store"""
+        from visualizer.Node import Node
+        slots = self.allocate_many(np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64))
+        return [Node._in_slot(value, self, slot) for value, slot in zip(values, slots.tolist())]
+
+# Where nodes go unless another store is given
+default_store = NodeStore()
+
+def _slots(nodes : Sequence["Node"]) -> tuple[NodeStore | None, np.ndarray]:
+    """The store all the nodes are in, or None if they are in different ones, and their slots"""
+    if len(nodes) == 0:
+        return default_store, np.empty(0, dtype=np.int64)
+    store = nodes[0].store
+    if any(n.store is not store for n in nodes):
+        return None, np.empty(0, dtype=np.int64)
+    return store, np.fromiter((n.slot for n in nodes), dtype=np.int64, count=len(nodes))
+
+def positions_of(nodes : Sequence["Node"]) -> np.ndarray:
+    """x and y of every node as an (n, 2) array"""
+    store, slots = _slots(nodes)
+    if store is None:
+        return np.array([(n.x, n.y) for n in nodes], dtype=np.float64).reshape(-1, 2)
+    return store.positions[slots]
+
+def set_positions(nodes : Sequence["Node"], positions : np.ndarray) -> None:
+    """Moves every node to its row of an (n, 2) array"""
+    store, slots = _slots(nodes)
+    if store is None:
+        for n, (x, y) in zip(nodes, positions.tolist()):
+            n.x, n.y = x, y
+    else:
+        store.positions[slots] = positions
+
+def pinned_of(nodes : Sequence["Node"]) -> np.ndarray:
+    store, slots = _slots(nodes)
+    if store is None:
+        return np.array([n.pinned for n in nodes], dtype=bool)
+    return store.pinned[slots]
@@ -0,0 +1,193 @@
+import numpy as np
+
+from graph.Graph import Graph
+from visualizer.Node import Node
+from visualizer.Camera import Camera
+import visualizer.NodeStore
+from physics.SpatialGrid import SpatialGrid
+import physics.Collisions
+
+def edge_trails(sources : np.ndarray, targets : np.ndarray, n_vertices : int, directed : bool):
+    """
+    Splits the edges into trails: chains of edges where each one starts at the
+    vertex the previous one ended, so every trail can be drawn as a single polyline.
+    Edges may be walked backwards. In undirected graphs only one edge of each
+    pair is walked.
+    
+    Returns the edges in trail order, whether each of them is walked backwards,
+    where every trail starts in those arrays, and the trail of every edge.
+    """
+    sources, targets = sources.tolist(), targets.tolist()
+    edge_trail = [-1] * len(sources)
+    
+    incident : list[list[int]] = [[] for _ in range(n_vertices)]
+    twins : dict[tuple[int, int], int] = {}
+    for e, (u, v) in enumerate(zip(sources, targets)):
+        if not directed and (v, u) in twins:
+            continue
+        twins[(u, v)] = e
+        incident[u].append(e)
+        if u != v:
+            incident[v].append(e)
+    
+    order : list[int] = []
+    backwards : list[bool] = []
+    starts : list[int] = []
+    used = [False] * len(sources)
+    
+    # Trails starting at vertices with an odd number of edges are longer
+    odd_first = sorted(range(n_vertices), key=lambda v : len(incident[v]) % 2 == 0)
+    for start in odd_first:
+        while incident[start]:
+            v = start
+            starts.append(len(order))
+            while True:
+                while incident[v] and used[incident[v][-1]]:
+                    incident[v].pop()
+                if not incident[v]:
+                    break
+                e = incident[v].pop()
+                used[e] = True
+                edge_trail[e] = len(starts) - 1
+                order.append(e)
+                backwards.append(sources[e] != v)
+                v = targets[e] if sources[e] == v else sources[e]
+            if starts[-1] == len(order):
+                starts.pop()
+    starts.append(len(order))
+    
+    # Skipped edges belong to the trail of their twin
+    for e, (u, v) in enumerate(zip(sources, targets)):
+        if edge_trail[e] == -1:
+            edge_trail[e] = edge_trail[twins[(v, u)]]
+    
+    return (np.array(order, dtype=np.int64), np.array(backwards, dtype=bool),
+            np.array(starts, dtype=np.int64), np.array(edge_trail, dtype=np.int64))
+
+class SceneIndex:
+    """
+    Spatial index over the nodes and edge bounding boxes of a graph, used to
+    only draw what is inside the window and to find what is under the mouse.
+
+    'update' must be called after every physics step. The vertex order, edge
+    list and component of every node are only rebuilt when the graph changes.
+    """
+    def __init__(self, cell_size : float = 200) -> None:
+        self.__node_grid = SpatialGrid(cell_size)
+        self.__edge_grid = SpatialGrid(cell_size)
+        
+        self.__graph_version = -1
+        self.__graph : Graph[Node] = None
+        self.__vertices : tuple[Node, ...] = ()
+        self.__components : list[int] = []
+        self.__component_array = np.empty(0, dtype=np.int64)
+        self.__edge_sources = np.empty(0, dtype=np.int64)
+        self.__edge_targets = np.empty(0, dtype=np.int64)
+        self.__trails = edge_trails(self.__edge_sources, self.__edge_targets, 0, True)
+        
+        self.__positions = np.empty((0, 2))
+    
+    @property
+    def vertices(self) -> tuple[Node, ...]:
+        return self.__vertices
+    
+    @property
+    def positions(self) -> np.ndarray:
+        """x and y of every vertex as an (n, 2) array, as of the last update"""
+        return self.__positions
+    
+    @property
+    def edges(self) -> tuple[np.ndarray, np.ndarray]:
+        """Indices of the source and target vertex of every edge"""
+        return self.__edge_sources, self.__edge_targets
+    
+    @property
+    def trails(self) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """The edges split in polylines, see 'edge_trails'"""
+        return self.__trails
+    
+    @property
+    def components(self) -> np.ndarray:
+        """Connected component of every vertex"""
+        return self.__component_array
+    
+    def component(self, i : int) -> int:
+        return self.__components[i]
+    
+    def indexes(self, graph : Graph[Node]) -> bool:
+        """Whether the index has the current vertices of 'graph'"""
+        return graph is self.__graph and graph.version == self.__graph_version
+    
+    def node_at(self, x : float, y : float, radius : float) -> Node | None:
+        """The node closest to (x, y), if any is closer than 'radius', as of the last update"""
+        i = self.__node_grid.nearest(x, y, radius)
+        return self.__vertices[i] if i is not None else None
+    
+    def __rebuild_topology(self, graph : Graph[Node]) -> None:
+        self.__graph = graph
+        self.__graph_version = graph.version
+        self.__vertices = graph.vertices
+        index = {v : i for i, v in enumerate(self.__vertices)}
+        
+        sources, targets = [], []
+        for i, v in enumerate(self.__vertices):
+            for u in graph.adjacent_vertices(v):
+                sources.append(i)
+                targets.append(index[u])
+        self.__edge_sources = np.array(sources, dtype=np.int64)
+        self.__edge_targets = np.array(targets, dtype=np.int64)
+        self.__trails = edge_trails(self.__edge_sources, self.__edge_targets, len(self.__vertices), graph.is_directed)
+        
+        self.__components = [0] * len(self.__vertices)
+        if len(self.__vertices) > 0:
+            for c, component in enumerate(graph.connected_components):
+                for v in component:
+                    self.__components[index[v]] = c
+        self.__component_array = np.array(self.__components, dtype=np.int64)
+    
+    def update(self, graph : Graph[Node], positions : np.ndarray = None) -> None:
+        """
+        Indexes the positions of the nodes of the graph, or 'positions' if given:
+        an (n, 2) array in the order of 'graph.vertices'.
+        """
+        if graph is not self.__graph or graph.version != self.__graph_version:
+            self.__rebuild_topology(graph)
+        
+        if positions is None:
+            positions = visualizer.NodeStore.positions_of(self.__vertices)
+        self.__positions = positions
+        x, y = self.__positions[:, 0], self.__positions[:, 1]
+        self.__node_grid.build_points(x, y)
+        
+        x1, x2 = x[self.__edge_sources], x[self.__edge_targets]
+        y1, y2 = y[self.__edge_sources], y[self.__edge_targets]
+        self.__edge_grid.build_boxes(np.minimum(x1, x2), np.minimum(y1, y2), np.maximum(x1, x2), np.maximum(y1, y2))
+    
+    def edges_crossing(self, p : tuple[float, float], q : tuple[float, float]) -> np.ndarray:
+        """Indices of the edges the segment pq crosses, as of the last update"""
+        (px, py), (qx, qy) = p, q
+        edges = self.__edge_grid.query_box(min(px, qx), min(py, qy), max(px, qx), max(py, qy))
+        sources, targets = self.__positions[self.__edge_sources[edges]], self.__positions[self.__edge_targets[edges]]
+        return edges[physics.Collisions.segments_intersect_many(p, q, sources, targets)]
+    
+    def visible(self, camera : Camera, margin : float = 0) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Indices of the vertices and edges that may be inside the window, which is
+        widened by 'margin' screen pixels on every side.
+        """
+        window_width, window_height = camera.window_size
+        corners = camera.screen_to_world_many(np.array([(-margin, -margin), (window_width + margin, window_height + margin)]))
+        (min_x, min_y), (max_x, max_y) = corners.tolist()
+        x, y = self.__positions[:, 0], self.__positions[:, 1]
+        
+        nodes = self.__node_grid.query_box(min_x, min_y, max_x, max_y)
+        node_x, node_y = x[nodes], y[nodes]
+        nodes = nodes[(node_x >= min_x) & (node_x <= max_x) & (node_y >= min_y) & (node_y <= max_y)]
+        
+        edges = self.__edge_grid.query_box(min_x, min_y, max_x, max_y)
+        x1, x2 = x[self.__edge_sources[edges]], x[self.__edge_targets[edges]]
+        y1, y2 = y[self.__edge_sources[edges]], y[self.__edge_targets[edges]]
+        edges = edges[(np.maximum(x1, x2) >= min_x) & (np.minimum(x1, x2) <= max_x) &
+                      (np.maximum(y1, y2) >= min_y) & (np.minimum(y1, y2) <= max_y)]
+        
+        return nodes, edges
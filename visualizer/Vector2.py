@@ -2,27 +2,22 @@ from math import sqrt, cos, sin, degrees, radians, atan2
 import numbers
 
 class Vector2:
-    def __init__(self, x:float=0, y:float=0) -> None:        
-        self.__x = x
-        self.__y = y
-    
-    @property
-    def x(self):
-        return self.__x
-    @x.setter
-    def x(self, x):
-        self.__x = x
+    """
+    2D vector. Operators always return a new vector, even the augmented ones
+    (+=, -=, *=, /=), since constants like Vector2.ZERO are shared. The verb
+    methods (set, add, subtract, scale, normalize, rotate, clamp_magnitude)
+    change the vector in place and return it, for loops that shouldn't allocate.
+    """
+    __slots__ = ("x", "y")
     
-    @property
-    def y(self):
-        return self.__y
-    @y.setter
-    def y(self, y):
-        self.__y = y
+    def __init__(self, x:float=0, y:float=0) -> None:        
+        self.x = x
+        self.y = y
     
     @property
     def magnitude(self):
-        return sqrt(self.x*self.x + self.y*self.y)
+        x, y = self.x, self.y
+        return sqrt(x*x + y*y)
     
     @property
     def normalized(self):
@@ -30,12 +25,35 @@ class Vector2:
         if magnitude != 0:
             return self / magnitude
         else:
-            return Vector2.ZERO
+            return Vector2()
     
-    def normalize(self):
+    def normalize(self) -> 'Vector2':
         magnitude = sqrt(self.x*self.x + self.y*self.y)
         self.x /= magnitude
         self.y /= magnitude
+        return self
+    
+    def set(self, x:float, y:float) -> 'Vector2':
+        self.x = x
+        self.y = y
+        return self
+    
+    def add(self, other:'Vector2', factor:float=1) -> 'Vector2':
+        """Adds 'other' times 'factor' in place"""
+        self.x += other.x * factor
+        self.y += other.y * factor
+        return self
+    
+    def subtract(self, other:'Vector2', factor:float=1) -> 'Vector2':
+        """Subtracts 'other' times 'factor' in place"""
+        self.x -= other.x * factor
+        self.y -= other.y * factor
+        return self
+    
+    def scale(self, factor:float) -> 'Vector2':
+        self.x *= factor
+        self.y *= factor
+        return self
     
     def dot(self, other:'Vector2') -> 'Vector2':
         return self.x * other.x + self.y * other.y
@@ -45,8 +63,10 @@ class Vector2:
         y = self.x * sin(angle) + self.y * cos(angle)
         return Vector2(x, y)
     
-    def rotate(self, angle):
-        self = Vector2(*self.rotated(angle))
+    def rotate(self, angle) -> 'Vector2':
+        angle = radians(angle)
+        c, s = cos(angle), sin(angle)
+        return self.set(self.x * c - self.y * s, self.x * s + self.y * c)
 
     @property
     def angle(self) -> float:
@@ -66,11 +86,11 @@ class Vector2:
     def down(self):
         return Vector2(-self.x, -self.y)
     
-    def clamp_magnitude(self, n_max):
+    def clamp_magnitude(self, n_max) -> 'Vector2':
         n = self.magnitude
         if n > 0:
-            f = min(1, n_max / n)
-            self *= f
+            self.scale(min(1, n_max / n))
+        return self
     
     def __str__(self):
         return f"{self.x}, {self.y}"
@@ -84,7 +104,7 @@ class Vector2:
         return self.__add__(other)
     
     def __mul__(self, other) -> 'Vector2':
-        if isinstance(other, numbers.Number):
+        if type(other) is float or type(other) is int or isinstance(other, numbers.Number):
             return Vector2(self.x * other, self.y * other)
         else:
             raise(TypeError("unsupported operand type(s)"))
@@ -94,7 +114,7 @@ class Vector2:
         return self.__mul__(other)
 
     def __truediv__(self, other) -> 'Vector2':
-        if isinstance(other, numbers.Number):
+        if type(other) is float or type(other) is int or isinstance(other, numbers.Number):
             if other == 0:
                 raise ZeroDivisionError("division by zero")
             return Vector2(self.x / other, self.y / other)